@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the Penguin Classifier.
+Run from the project root, e.g. ``python -m benchmarks.hot_paths``.
+"""
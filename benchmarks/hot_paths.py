@@ -0,0 +1,503 @@
+"""
+Latency benchmarks of the inference, data and UI hot paths.
+Times every path across dataset sizes, writes the results as JSON and
+compares them with a stored baseline to catch regressions.
+"""
+
+import argparse
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.penguin_classifier import dataset
+from src.penguin_classifier.cache import ColumnarCache
+from src.penguin_classifier.config import (
+    FEATURES,
+    NUMERICAL_FEATURES,
+    PROJ_ROOT,
+    RANDOM_SEED,
+    RAW_DATA_PATH,
+)
+from src.penguin_classifier.dataset import (
+    DatasetStore,
+    PredictionHistoryWriter,
+    load_combined_data,
+    load_data,
+    save_prediction,
+)
+from src.penguin_classifier.modeling.predict import (
+    get_pipeline,
+    predict_batch_species,
+    predict_single_penguin_proba,
+)
+from src.penguin_classifier.plots import create_scatter_plot, figure_cache
+from src.penguin_classifier.synthetic import (
+    PenguinGenerator,
+    write_synthetic_csv,
+)
+from src.penguin_classifier.ui import callbacks
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+RESULTS_PATH = PROJ_ROOT / "reports" / "benchmarks" / "hot_paths.json"
+
+# Rows of raw data the dataset-dependent paths are timed on
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+BATCH_SIZES = [1, 100, 1_000, 10_000]
+# Timed samples per case; each sample runs the case for about TARGET_S
+DEFAULT_REPEAT = 7
+TARGET_S = 0.05
+MAX_LOOPS = 1_000
+# A case regresses if its fastest sample grows by more than this share and
+# by more than NOISE_FLOOR_S (the baseline can override it per case name)
+DEFAULT_THRESHOLD = 0.5
+NOISE_FLOOR_S = 50e-6
+
+PENGUIN = {
+    "island": "Biscoe",
+    "bill_length_mm": 46.5,
+    "bill_depth_mm": 15.0,
+    "flipper_length_mm": 215.0,
+    "body_mass_g": 5000.0,
+    "sex": "female",
+}
+
+
+@dataclass
+class Case:
+    """
+    One benchmarked call.
+
+    Attributes:
+        name (str): The hot path, e.g. ``create_scatter_plot``.
+        params (dict): What distinguishes this case from others of the
+            same name, e.g. the dataset size.
+        run (Callable[[], object]): The timed call.
+        setup (Callable[[], object], optional): Untimed preparation before
+            every call; cases with a setup are timed one call at a time.
+    """
+
+    name: str
+    params: dict
+    run: object
+    setup: object = None
+
+    @property
+    def id(self) -> str:
+        """Stable identifier used to match results with the baseline."""
+        params = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}[{params}]" if params else self.name
+
+
+@dataclass
+class Environment:
+    """Isolated dataset of one size that the data and UI cases run on."""
+
+    rows: int
+    raw_path: Path
+    store: DatasetStore
+    cache: ColumnarCache
+
+
+def _penguin_frame() -> pd.DataFrame:
+    """One penguin as the UI passes it to the model."""
+    return pd.DataFrame({column: [value] for column, value in PENGUIN.items()})
+
+
+@contextmanager
+def isolated_dataset(rows: int, workdir: Path, fake_trigger: bool = True):
+    """
+    Points the data layer at a synthetic dataset of ``rows`` raw rows.
+
+    The prediction history, the columnar cache and the dataset store live
+    in ``workdir``, so the project's data directory is never touched.
+
+    Args:
+        rows (int): Rows of synthetic raw data.
+        workdir (Path): Scratch directory.
+        fake_trigger (bool): Replace the Dash callback context, so the
+            callbacks can be called outside of a request.
+
+    Yields:
+        Environment: The isolated dataset.
+    """
+    raw_path = workdir / f"raw-{rows}.csv"
+    if not raw_path.exists():
+        write_synthetic_csv(raw_path, rows, seed=RANDOM_SEED)
+    writer = PredictionHistoryWriter(path=workdir / f"history-{rows}.csv")
+    cache = ColumnarCache(workdir / "cache")
+    store = DatasetStore(raw_path=raw_path, writer=writer, cache=cache)
+
+    replacements = [
+        (dataset, "history_writer", writer),
+        (dataset, "dataset_store", store),
+        (dataset, "data_cache", cache),
+        (callbacks, "dataset_store", store),
+    ]
+    if fake_trigger:
+        trigger = SimpleNamespace(triggered_id="classify_button")
+        replacements.append((callbacks, "ctx", trigger))
+
+    with ExitStack() as stack:
+        for target, name, value in replacements:
+            stack.enter_context(patch.object(target, name, value))
+        stack.callback(writer.close)
+        figure_cache.clear()
+        store.snapshot()
+        yield Environment(
+            rows=rows, raw_path=raw_path, store=store, cache=cache
+        )
+
+
+def model_cases() -> list[Case]:
+    """Cases that depend on the model only."""
+    pipeline = get_pipeline()
+    generator = PenguinGenerator.fit(load_data(filepath=RAW_DATA_PATH))
+    batch = generator.sample(max(BATCH_SIZES), np.random.default_rng(0))
+    batch = batch.dropna(subset=NUMERICAL_FEATURES)[FEATURES]
+    single = _penguin_frame()
+
+    cases = [
+        Case(
+            "predict_single_penguin_proba",
+            {},
+            lambda: predict_single_penguin_proba(features=single),
+        )
+    ]
+    for size in BATCH_SIZES:
+        features = batch.iloc[:size]
+        cases.append(
+            Case(
+                "predict_batch_species",
+                {"batch": size},
+                lambda f=features: predict_batch_species(f, pipeline),
+            )
+        )
+    return cases
+
+
+def dataset_cases(env: Environment) -> list[Case]:
+    """Cases whose cost grows with the size of the dataset."""
+    rows = {"rows": env.rows}
+    penguin = _penguin_frame().assign(species="Gentoo")
+    callback_args = {
+        "n_clicks": 1,
+        "x_axis": "flipper_length_mm",
+        "y_axis": "bill_length_mm",
+        **PENGUIN,
+        "latest_prediction": None,
+    }
+
+    def history_page():
+        return callbacks.update_history_table(
+            page_current=0,
+            page_size=15,
+            sort_by=[{"column_id": "body_mass_g", "direction": "desc"}],
+            filter_query="{species} = Gentoo",
+            version=env.store.version,
+        )
+
+    return [
+        Case(
+            "load_data",
+            {**rows, "cache": False},
+            lambda: load_data(filepath=env.raw_path, use_cache=False),
+        ),
+        Case(
+            "load_data",
+            {**rows, "cache": True},
+            lambda: load_data(filepath=env.raw_path, use_cache=True),
+        ),
+        Case("load_combined_data", rows, load_combined_data),
+        Case("save_prediction", rows, lambda: save_prediction(penguin)),
+        Case(
+            "create_scatter_plot",
+            rows,
+            lambda: create_scatter_plot(
+                df_historic=load_combined_data(),
+                x_column="flipper_length_mm",
+                y_column="bill_length_mm",
+                size_column="body_mass_g",
+            ),
+        ),
+        # A new row invalidates the cached row order, like a refresh
+        # after a classification
+        Case(
+            "history_table",
+            rows,
+            history_page,
+            setup=lambda: save_prediction(penguin),
+        ),
+        Case(
+            "classify_penguin",
+            {**rows, "figure": "patch"},
+            lambda: callbacks.classify_penguin(
+                **callback_args, figure_version=env.store.version
+            ),
+        ),
+        Case(
+            "classify_penguin",
+            {**rows, "figure": "rebuild"},
+            lambda: callbacks.classify_penguin(**callback_args),
+        ),
+    ]
+
+
+def measure(case: Case, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Times a case and summarizes the seconds per call.
+
+    Args:
+        case (Case): The case.
+        repeat (int): Number of timed samples.
+
+    Returns:
+        dict: The case id, name, params and timing statistics.
+    """
+    if case.setup:
+        case.setup()
+    start = time.perf_counter()
+    case.run()  # Warm-up, also calibrates the loop count
+    elapsed = time.perf_counter() - start
+    loops = (
+        1 if case.setup else min(MAX_LOOPS, max(1, int(TARGET_S / elapsed)))
+    )
+
+    samples = []
+    for _ in range(repeat):
+        total = 0.0
+        for _ in range(loops):
+            if case.setup:
+                case.setup()
+            start = time.perf_counter()
+            case.run()
+            total += time.perf_counter() - start
+        samples.append(total / loops)
+
+    return {
+        "id": case.id,
+        "name": case.name,
+        "params": case.params,
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "loops": loops,
+    }
+
+
+def _git_commit() -> str | None:
+    """Returns the current commit, if the project is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJ_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    sizes: list[int] = DEFAULT_SIZES,
+    repeat: int = DEFAULT_REPEAT,
+    workdir: Path | None = None,
+) -> dict:
+    """
+    Runs all cases and collects the results.
+
+    Args:
+        sizes (list[int]): Dataset sizes for the dataset cases.
+        repeat (int): Timed samples per case.
+        workdir (Path, optional): Scratch directory (default: a temporary
+            directory that is removed afterwards).
+
+    Returns:
+        dict: ``meta`` about the environment and a list of ``results``.
+    """
+    results = []
+
+    def record(case: Case) -> None:
+        result = measure(case, repeat=repeat)
+        results.append(result)
+        logger.info(f"{result['id']}: {result['median_s'] * 1e3:.3f} ms")
+
+    with ExitStack() as stack:
+        # Keep the application's own logging out of the timings
+        logger.disable("src.penguin_classifier")
+        stack.callback(logger.enable, "src.penguin_classifier")
+        for case in model_cases():
+            record(case)
+
+        if workdir is None:
+            workdir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        for rows in sizes:
+            with isolated_dataset(rows, Path(workdir)) as env:
+                for case in dataset_cases(env):
+                    record(case)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scikit-learn": sklearn.__version__,
+            "sizes": sizes,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[dict]:
+    """
+    Compares timings with a baseline report.
+
+    The fastest sample of every case is compared, which is least affected
+    by other load on the machine.
+
+    Args:
+        report (dict): Output of ``run_benchmarks``.
+        baseline (dict): An earlier report, optionally with per-name
+            ``thresholds``.
+        threshold (float): Allowed relative slowdown for other names.
+
+    Returns:
+        list[dict]: One entry per case found in both reports, with the
+            ``ratio`` of the timings and whether it is a ``regression``.
+    """
+    thresholds = baseline.get("thresholds", {})
+    previous = {result["id"]: result for result in baseline["results"]}
+    comparison = []
+    for result in report["results"]:
+        if result["id"] not in previous:
+            continue
+        before = previous[result["id"]]["min_s"]
+        after = result["min_s"]
+        limit = thresholds.get(result["name"], threshold)
+        comparison.append(
+            {
+                "id": result["id"],
+                "baseline_s": before,
+                "current_s": after,
+                "ratio": after / before if before else float("inf"),
+                "threshold": limit,
+                "regression": after > before * (1 + limit)
+                and after - before > NOISE_FLOOR_S,
+            }
+        )
+    return comparison
+
+
+def _print_comparison(comparison: list[dict]) -> None:
+    """Prints the comparison as a table."""
+    print(f"\n{'case':<55}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for entry in comparison:
+        flag = "  REGRESSION" if entry["regression"] else ""
+        print(
+            f"{entry['id']:<55}"
+            f"{entry['baseline_s'] * 1e3:>10.3f}ms"
+            f"{entry['current_s'] * 1e3:>10.3f}ms"
+            f"{entry['ratio']:>8.2f}{flag}"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for the hot path benchmarks."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the hot paths and compare with a baseline."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Raw dataset sizes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Timed samples per case (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=RESULTS_PATH,
+        help="Where to write the JSON results (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="Baseline to compare with (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed relative slowdown (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline instead of comparing",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(sizes=args.sizes, repeat=args.repeat)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    logger.success(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        thresholds = {}
+        if args.baseline.exists():
+            thresholds = json.loads(args.baseline.read_text()).get(
+                "thresholds", {}
+            )
+        args.baseline.write_text(
+            json.dumps({**report, "thresholds": thresholds}, indent=2) + "\n"
+        )
+        logger.success(f"Baseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        logger.warning(f"No baseline at {args.baseline}, nothing to compare")
+        return
+
+    comparison = compare(
+        report, json.loads(args.baseline.read_text()), args.threshold
+    )
+    _print_comparison(comparison)
+    regressions = [entry["id"] for entry in comparison if entry["regression"]]
+    if regressions:
+        logger.error(f"{len(regressions)} regression(s): {regressions}")
+        sys.exit(1)
+    logger.success("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,732 @@
+"""
+Load test of the Dash callback endpoint under a gunicorn deployment.
+Starts ``src.penguin_classifier.app:server`` on an isolated synthetic
+dataset, replays ``_dash-update-component`` requests from concurrent
+virtual users and reports throughput, latency percentiles and error rates.
+"""
+
+import argparse
+import atexit
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+import http.client
+import json
+import os
+from pathlib import Path
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+from benchmarks.hot_paths import _git_commit
+from src.penguin_classifier.config import (
+    NUMERICAL_FEATURES,
+    PROJ_ROOT,
+    RANDOM_SEED,
+    RAW_DATA_PATH,
+)
+from src.penguin_classifier.dataset import load_data
+from src.penguin_classifier.synthetic import (
+    PenguinGenerator,
+    write_synthetic_csv,
+)
+
+RESULTS_PATH = PROJ_ROOT / "reports" / "benchmarks" / "load_test.json"
+# Throughput depends on the machine, so the baseline stays local
+BASELINE_PATH = RESULTS_PATH.with_name("load_test_baseline.json")
+
+# Passed to the gunicorn workers started by this module
+WORKDIR_ENV = "PENGUIN_LOAD_TEST_DIR"
+ROWS_ENV = "PENGUIN_LOAD_TEST_ROWS"
+
+DEFAULT_ROWS = 10_000
+DEFAULT_WORKERS = 2
+DEFAULT_THREADS = 4
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION_S = 30.0
+DEFAULT_WARMUP_S = 5.0
+# Share of requests per scenario (see SCENARIOS)
+DEFAULT_MIX = {"classify": 0.6, "figure": 0.2, "table": 0.2}
+# Seconds to wait for the server to answer after starting it
+STARTUP_TIMEOUT_S = 120.0
+REQUEST_TIMEOUT_S = 30.0
+# A scenario regresses if its throughput drops or its p95 latency grows by
+# more than this share
+DEFAULT_THRESHOLD = 0.25
+
+UPDATE_PATH = "/_dash-update-component"
+DEPENDENCIES_PATH = "/_dash-dependencies"
+
+# Scenario -> an output of the callback it calls. Axis changes are remapped
+# in the browser; on the server they cost a figure request for the axes.
+SCENARIOS = {
+    "classify": "classification_result.children",
+    "figure": "scatter_graph.figure",
+    "table": "history_table.data",
+}
+AXIS_PAIRS = [
+    (x, y) for x in NUMERICAL_FEATURES for y in NUMERICAL_FEATURES if x != y
+]
+TABLE_SORTS = [
+    [],
+    [{"column_id": "body_mass_g", "direction": "desc"}],
+    [{"column_id": "bill_length_mm", "direction": "asc"}],
+]
+TABLE_FILTERS = ["", "{species} = Gentoo", "{island} = Dream"]
+
+
+def isolated_server():
+    """
+    gunicorn app factory: the app on the dataset prepared by ``main``.
+
+    Every worker points the data layer at the synthetic data, history and
+    cache in ``$PENGUIN_LOAD_TEST_DIR``, so the project's data directory is
+    not modified.
+
+    Returns:
+        Flask: The ``app.server`` instance.
+    """
+    from benchmarks.hot_paths import isolated_dataset
+    from src.penguin_classifier.app import server
+
+    stack = ExitStack()
+    stack.enter_context(
+        isolated_dataset(
+            int(os.environ[ROWS_ENV]),
+            Path(os.environ[WORKDIR_ENV]),
+            fake_trigger=False,
+        )
+    )
+    atexit.register(stack.close)
+    return server
+
+
+class HttpClient:
+    """
+    Minimal JSON client for one server, usable from many threads.
+
+    Every request opens its own connection, so a slow or closed connection
+    never affects other virtual users.
+    """
+
+    def __init__(self, base_url: str, timeout: float = REQUEST_TIMEOUT_S):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+
+    def request(
+        self, method: str, path: str, body: dict | None = None
+    ) -> tuple[int, bytes]:
+        """
+        Sends one request.
+
+        Args:
+            method (str): ``GET`` or ``POST``.
+            path (str): Request path.
+            body (dict, optional): JSON body.
+
+        Returns:
+            tuple[int, bytes]: Status code and response body.
+        """
+        connection = http.client.HTTPConnection(
+            self.host, self.port, timeout=self.timeout
+        )
+        try:
+            headers = {}
+            data = None
+            if body is not None:
+                data = json.dumps(body).encode()
+                headers["Content-Type"] = "application/json"
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+
+def _parse_outputs(output: str) -> dict | list[dict]:
+    """Splits a Dash output string into the ``outputs`` of a request."""
+    if not output.startswith(".."):
+        component, prop = output.rsplit(".", 1)
+        return {"id": component, "property": prop}
+    return [
+        dict(zip(("id", "property"), part.rsplit(".", 1)))
+        for part in output[2:-2].split("...")
+    ]
+
+
+def _find_callbacks(dependencies: list[dict]) -> dict[str, dict]:
+    """Picks the server-side callback of every scenario."""
+    callbacks = {}
+    for scenario, output in SCENARIOS.items():
+        for dependency in dependencies:
+            outputs = dependency["output"].strip(".").split("...")
+            if dependency.get("clientside_function") is None and any(
+                part.split("@")[0] == output for part in outputs
+            ):
+                callbacks[scenario] = dependency
+                break
+        else:
+            raise ValueError(f"No server callback has the output {output}")
+    return callbacks
+
+
+@dataclass
+class VirtualUser:
+    """
+    One simulated browser session.
+
+    Keeps the dataset version of its last response, which the browser
+    sends along like the app's ``dataset_version`` store.
+    """
+
+    rng: random.Random
+    dataset_version: int | None = None
+    clicks: int = 0
+    results: list[tuple] = field(default_factory=list)
+
+
+class LoadGenerator:
+    """
+    Replays the app's callback requests from concurrent virtual users.
+
+    Request bodies are built from the callback definitions the server
+    publishes (``/_dash-dependencies``), so they match what the browser
+    sends for the current version of the app.
+
+    Args:
+        client: Object with ``request(method, path, body)`` returning the
+            status code and body, e.g. ``HttpClient``.
+        mix (dict[str, float]): Relative frequency of every scenario.
+        seed (int): Seed of the penguins and request sequences.
+    """
+
+    def __init__(self, client, mix: dict[str, float], seed: int):
+        unknown = set(mix) - set(SCENARIOS)
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {sorted(unknown)}")
+        self.client = client
+        self.scenarios = [name for name, share in mix.items() if share > 0]
+        self.weights = [mix[name] for name in self.scenarios]
+        self.seed = seed
+        status, body = client.request("GET", DEPENDENCIES_PATH)
+        if status != 200:
+            raise RuntimeError(f"{DEPENDENCIES_PATH} returned {status}")
+        self.callbacks = _find_callbacks(json.loads(body))
+        generator = PenguinGenerator.fit(load_data(filepath=RAW_DATA_PATH))
+        penguins = generator.sample(10_000, np.random.default_rng(seed))
+        self.penguins = penguins.dropna(subset=NUMERICAL_FEATURES)
+
+    def _payload(self, scenario: str, user: VirtualUser) -> dict:
+        """Builds the request body of one scenario for one user."""
+        dependency = self.callbacks[scenario]
+        values = {}
+        changed = []
+        if scenario == "classify":
+            user.clicks += 1
+            penguin = self.penguins.iloc[
+                user.rng.randrange(len(self.penguins))
+            ]
+            x_axis, y_axis = user.rng.choice(AXIS_PAIRS)
+            values = {
+                "classify_button.n_clicks": user.clicks,
+                "scatter_x_axis.value": x_axis,
+                "scatter_y_axis.value": y_axis,
+                "island_input.value": penguin["island"],
+                "sex_input.value": (
+                    penguin["sex"] if pd.notna(penguin["sex"]) else None
+                ),
+                "latest_prediction_store.data": None,
+                "dataset_version.data": user.dataset_version,
+            }
+            for column in NUMERICAL_FEATURES:
+                values[f"{column}_input.value"] = float(penguin[column])
+            changed = ["classify_button.n_clicks"]
+        elif scenario == "figure":
+            x_axis, y_axis = user.rng.choice(AXIS_PAIRS)
+            values = {
+                "classify_button.n_clicks": None,
+                "scatter_x_axis.value": x_axis,
+                "scatter_y_axis.value": y_axis,
+                "dataset_version.data": user.dataset_version,
+            }
+        elif scenario == "table":
+            values = {
+                "history_table.page_current": user.rng.randrange(5),
+                "history_table.page_size": 15,
+                "history_table.sort_by": user.rng.choice(TABLE_SORTS),
+                "history_table.filter_query": user.rng.choice(TABLE_FILTERS),
+                "dataset_version.data": user.dataset_version,
+            }
+            changed = ["history_table.page_current"]
+
+        def fill(items: list[dict]) -> list[dict]:
+            return [
+                {
+                    **item,
+                    "value": values.get(f"{item['id']}.{item['property']}"),
+                }
+                for item in items
+            ]
+
+        return {
+            "output": dependency["output"],
+            "outputs": _parse_outputs(dependency["output"]),
+            "inputs": fill(dependency["inputs"]),
+            "changedPropIds": changed,
+            "state": fill(dependency["state"]),
+        }
+
+    def send(self, scenario: str, user: VirtualUser) -> tuple[float, str]:
+        """
+        Sends one request of a scenario.
+
+        Args:
+            scenario (str): Key of ``SCENARIOS``.
+            user (VirtualUser): The session sending it.
+
+        Returns:
+            tuple[float, str]: Latency in seconds and the error kind, or
+                an empty string on success.
+        """
+        payload = self._payload(scenario, user)
+        start = time.perf_counter()
+        try:
+            status, body = self.client.request("POST", UPDATE_PATH, payload)
+        except (OSError, http.client.HTTPException) as e:
+            return time.perf_counter() - start, type(e).__name__
+        latency = time.perf_counter() - start
+        if status != 200:
+            return latency, f"http_{status}"
+        try:
+            response = json.loads(body)["response"]
+        except (ValueError, KeyError):
+            return latency, "invalid_response"
+        if "dataset_version" in response:
+            user.dataset_version = response["dataset_version"]["data"]
+        if (
+            scenario == "classify"
+            and response["classification_result"]["color"] != "success"
+        ):
+            return latency, "classification_failed"
+        return latency, ""
+
+    def run(
+        self,
+        concurrency: int,
+        duration: float,
+        warmup: float = 0.0,
+        think_time: float = 0.0,
+    ) -> dict:
+        """
+        Runs the virtual users and summarizes the measured window.
+
+        Each user sends its next request as soon as the previous one is
+        answered (plus ``think_time``). Requests started during the
+        warm-up are sent but not reported.
+
+        Args:
+            concurrency (int): Number of virtual users.
+            duration (float): Seconds measured after the warm-up.
+            warmup (float): Seconds before the measurement starts.
+            think_time (float): Pause of a user between requests.
+
+        Returns:
+            dict: Summary per scenario and in ``total``.
+        """
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+        users = [
+            VirtualUser(rng=random.Random(f"{self.seed}-{index}"))
+            for index in range(concurrency)
+        ]
+
+        def loop(user: VirtualUser) -> None:
+            while True:
+                sent = time.perf_counter()
+                if sent >= stop_at:
+                    return
+                scenario = user.rng.choices(self.scenarios, self.weights)[0]
+                latency, error = self.send(scenario, user)
+                if sent >= measure_from:
+                    user.results.append((scenario, latency, error))
+                if think_time:
+                    time.sleep(think_time)
+
+        threads = [
+            threading.Thread(target=loop, args=(user,), daemon=True)
+            for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Requests still running at the deadline extend the window
+        elapsed = max(time.perf_counter(), stop_at) - measure_from
+
+        results = [result for user in users for result in user.results]
+        summary = {
+            scenario: summarize(
+                [r for r in results if r[0] == scenario], elapsed
+            )
+            for scenario in self.scenarios
+        }
+        summary["total"] = summarize(results, elapsed)
+        return summary
+
+
+def summarize(results: list[tuple], elapsed: float) -> dict:
+    """
+    Aggregates ``(scenario, latency, error)`` results of one window.
+
+    Args:
+        results (list[tuple]): The results.
+        elapsed (float): Length of the window in seconds.
+
+    Returns:
+        dict: Request and error counts, throughput and latency statistics
+            (in milliseconds) of the successful requests.
+    """
+    errors = {}
+    latencies = []
+    for _, latency, error in results:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+        else:
+            latencies.append(latency * 1e3)
+
+    latency_ms = None
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        latency_ms = {
+            "mean": round(float(np.mean(latencies)), 3),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(np.max(latencies)), 3),
+        }
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": sum(errors.values()) / len(results) if results else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 3),
+        "latency_ms": latency_ms,
+    }
+
+
+def _free_port() -> int:
+    """Returns a TCP port that is currently unused on localhost."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class GunicornServer:
+    """
+    The app served by gunicorn in a child process, on an isolated dataset.
+
+    Args:
+        workdir (Path): Scratch directory for data, history and cache.
+        rows (int): Rows of synthetic raw data.
+        workers (int): gunicorn worker processes.
+        threads (int): Threads per worker.
+    """
+
+    def __init__(self, workdir: Path, rows: int, workers: int, threads: int):
+        self.workdir = Path(workdir)
+        self.rows = rows
+        self.workers = workers
+        self.threads = threads
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = self.workdir / "server.log"
+        self._process = None
+
+    def __enter__(self) -> "GunicornServer":
+        raw_path = self.workdir / f"raw-{self.rows}.csv"
+        if not raw_path.exists():
+            write_synthetic_csv(raw_path, self.rows, seed=RANDOM_SEED)
+        command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--bind",
+            f"127.0.0.1:{self.port}",
+            "--workers",
+            str(self.workers),
+            "--threads",
+            str(self.threads),
+            "--timeout",
+            "120",
+            "benchmarks.load_test:isolated_server()",
+        ]
+        env = {
+            **os.environ,
+            WORKDIR_ENV: str(self.workdir),
+            ROWS_ENV: str(self.rows),
+        }
+        with open(self.log_path, "wb") as log:
+            self._process = subprocess.Popen(
+                command, cwd=PROJ_ROOT, env=env, stdout=log, stderr=log
+            )
+        self._wait_until_ready()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._process.send_signal(signal.SIGTERM)
+        try:
+            self._process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+    def _wait_until_ready(self) -> None:
+        """Polls the server until it answers or the start fails."""
+        client = HttpClient(self.url, timeout=5)
+        deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                break
+            try:
+                if client.request("GET", DEPENDENCIES_PATH)[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.5)
+        self.__exit__()
+        log = self.log_path.read_text(errors="replace")[-2000:]
+        raise RuntimeError(f"gunicorn did not start:\n{log}")
+
+
+def compare(
+    report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[dict]:
+    """
+    Compares a load test with an earlier one.
+
+    Args:
+        report (dict): Output of ``main``.
+        baseline (dict): An earlier report with the same settings.
+        threshold (float): Allowed relative loss of throughput and growth
+            of the p95 latency.
+
+    Returns:
+        list[dict]: One entry per scenario found in both reports.
+    """
+    comparison = []
+    for scenario, result in report["results"].items():
+        before = baseline["results"].get(scenario)
+        if not before or not before["latency_ms"] or not result["latency_ms"]:
+            continue
+        throughput = result["throughput_rps"] / before["throughput_rps"]
+        p95 = result["latency_ms"]["p95"] / before["latency_ms"]["p95"]
+        comparison.append(
+            {
+                "scenario": scenario,
+                "throughput_ratio": round(throughput, 3),
+                "p95_ratio": round(p95, 3),
+                "regression": throughput < 1 - threshold
+                or p95 > 1 + threshold
+                or result["error_rate"] > before["error_rate"],
+            }
+        )
+    return comparison
+
+
+def _print_report(report: dict) -> None:
+    """Prints the results as a table."""
+    print(
+        f"\n{'scenario':<12}{'requests':>10}{'rps':>10}{'errors':>8}"
+        f"{'p50':>10}{'p95':>10}{'p99':>10}"
+    )
+    for scenario, result in report["results"].items():
+        latency = result["latency_ms"] or {}
+        print(
+            f"{scenario:<12}{result['requests']:>10}"
+            f"{result['throughput_rps']:>10.1f}"
+            f"{result['error_rate']:>8.1%}"
+            + "".join(
+                f"{latency.get(key, float('nan')):>8.1f}ms"
+                for key in ("p50", "p95", "p99")
+            )
+        )
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    """Parses ``classify=0.6,figure=0.2,table=0.2``."""
+    mix = {}
+    for part in text.split(","):
+        name, _, share = part.partition("=")
+        mix[name.strip()] = float(share)
+    return mix
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for the load test."""
+    parser = argparse.ArgumentParser(
+        description="Load test the Dash callbacks under gunicorn."
+    )
+    parser.add_argument(
+        "--url",
+        help="Test a running server instead of starting one "
+        "(its data directory receives the predictions)",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=DEFAULT_ROWS,
+        help="Rows of synthetic raw data (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="gunicorn workers (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=DEFAULT_THREADS,
+        help="Threads per worker (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Virtual users (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=DEFAULT_DURATION_S,
+        help="Measured seconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=DEFAULT_WARMUP_S,
+        help="Unmeasured seconds before (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Pause of a user between requests in seconds",
+    )
+    parser.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default=DEFAULT_MIX,
+        help="Share per scenario, e.g. classify=0.6,figure=0.2,table=0.2",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=RANDOM_SEED,
+        help="Seed of the request sequence (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=RESULTS_PATH,
+        help="Where to write the JSON results (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="Earlier results to compare with, if present "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed relative loss (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline instead of comparing",
+    )
+    args = parser.parse_args(argv)
+
+    with ExitStack() as stack:
+        url = args.url
+        if url is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+            server = stack.enter_context(
+                GunicornServer(
+                    Path(workdir), args.rows, args.workers, args.threads
+                )
+            )
+            url = server.url
+        logger.info(
+            f"Load testing {url} with {args.concurrency} users "
+            f"for {args.duration}s"
+        )
+        generator = LoadGenerator(HttpClient(url), args.mix, args.seed)
+        results = generator.run(
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+            think_time=args.think_time,
+        )
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "url": args.url,
+            "rows": None if args.url else args.rows,
+            "workers": None if args.url else args.workers,
+            "threads": None if args.url else args.threads,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "think_time_s": args.think_time,
+            "mix": args.mix,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    _print_report(report)
+    logger.success(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        logger.success(f"Baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        comparison = compare(
+            report, json.loads(args.baseline.read_text()), args.threshold
+        )
+        for entry in comparison:
+            flag = "  REGRESSION" if entry["regression"] else ""
+            print(
+                f"{entry['scenario']:<12}throughput x"
+                f"{entry['throughput_ratio']:.2f}, p95 x"
+                f"{entry['p95_ratio']:.2f}{flag}"
+            )
+        if any(entry["regression"] for entry in comparison):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+JSON REST inference endpoint served by the Dash/Flask server.
+Concurrent requests are coalesced into micro-batches, so each model call
+scores many records at once instead of paying per-request overhead.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import Future, TimeoutError
+from dataclasses import dataclass, field
+import math
+import os
+import queue
+import threading
+import time
+
+from flask import Blueprint, Flask, jsonify, request
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+from src.penguin_classifier.config import (
+    API_BATCH_WINDOW_MS,
+    API_MAX_BATCH_SIZE,
+    API_MAX_RECORDS_PER_REQUEST,
+    API_REQUEST_TIMEOUT_S,
+    CATEGORICAL_FEATURES,
+    NUMERICAL_FEATURES,
+    SPECIES,
+)
+from src.penguin_classifier.dataset import save_verified_labels
+from src.penguin_classifier.modeling.predict import (
+    predict_species_proba_with_classes,
+)
+
+
+@dataclass
+class _Job:
+    """Records of one request and the future that receives their results."""
+
+    records: list[dict]
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into vectorized model calls.
+
+    A background thread waits for the first queued request, then keeps
+    collecting requests until ``window_ms`` has passed or ``max_batch_size``
+    records are queued, and scores all of them with one ``predict_fn`` call.
+    ``predict_fn`` returns species, probabilities and the class labels of
+    the probability columns.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[
+            [list[dict]], tuple[np.ndarray, np.ndarray, np.ndarray]
+        ],
+        window_ms: float = API_BATCH_WINDOW_MS,
+        max_batch_size: int = API_MAX_BATCH_SIZE,
+    ):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: queue.Queue[_Job] = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def submit(self, records: list[dict]) -> Future:
+        """
+        Queues records for the next micro-batch.
+
+        Args:
+            records (list[dict]): Validated feature records.
+
+        Returns:
+            Future: Resolves to ``(species, probabilities, classes)`` for
+                the records.
+        """
+        self._ensure_worker()
+        job = _Job(records=records)
+        self._queue.put(job)
+        return job.future
+
+    def _ensure_worker(self) -> None:
+        """Starts the batching thread, again after a fork if necessary."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            threading.Thread(
+                target=self._run, name="api-micro-batcher", daemon=True
+            ).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        """Batching loop executed by the background thread."""
+        jobs_queue = self._queue
+        while True:
+            batch = [jobs_queue.get()]
+            size = len(batch[0].records)
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    job = jobs_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(job)
+                size += len(job.records)
+            self._score(batch)
+
+    def _score(self, batch: list[_Job]) -> None:
+        """Scores a batch and hands each request its slice of the results."""
+        records = [record for job in batch for record in job.records]
+        try:
+            species, probabilities, classes = self.predict_fn(records)
+        except Exception:
+            # Isolate the failing request instead of failing the whole batch
+            for job in batch:
+                try:
+                    job.future.set_result(self.predict_fn(job.records))
+                except Exception as e:
+                    job.future.set_exception(e)
+            return
+
+        start = 0
+        for job in batch:
+            stop = start + len(job.records)
+            job.future.set_result(
+                (species[start:stop], probabilities[start:stop], classes)
+            )
+            start = stop
+
+
+def parse_records(payload, with_species: bool = False) -> list[dict]:
+    """
+    Normalizes and validates the JSON body of a prediction request.
+
+    Accepts a single record, a list of records, or ``{"records": [...]}``.
+
+    Args:
+        payload: Decoded JSON body.
+        with_species (bool): Require and keep a known ``species`` per
+            record (for verified labels).
+
+    Returns:
+        list[dict]: Records with float measurements and optional ``sex``.
+
+    Raises:
+        ValueError: If the payload or one of the records is invalid.
+    """
+    if isinstance(payload, dict) and "records" in payload:
+        payload = payload["records"]
+    records = [payload] if isinstance(payload, dict) else payload
+    if not isinstance(records, list) or not records:
+        raise ValueError("Expected a record or a non-empty list of records.")
+    if len(records) > API_MAX_RECORDS_PER_REQUEST:
+        raise ValueError(
+            f"At most {API_MAX_RECORDS_PER_REQUEST} records per request."
+        )
+
+    parsed = []
+    for index, record in enumerate(records):
+        where = f"Record {index}"
+        if not isinstance(record, dict):
+            raise ValueError(f"{where} is not an object.")
+        clean = {}
+        for feature in NUMERICAL_FEATURES:
+            value = record.get(feature)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{where}: '{feature}' must be a number.")
+            try:
+                value = float(value)
+            except OverflowError:
+                raise ValueError(
+                    f"{where}: '{feature}' is out of range."
+                ) from None
+            if not math.isfinite(value):
+                raise ValueError(f"{where}: '{feature}' must be finite.")
+            clean[feature] = value
+        for feature in CATEGORICAL_FEATURES:
+            value = record.get(feature)
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"{where}: '{feature}' must be a string.")
+            clean[feature] = value
+        if not clean["island"]:
+            raise ValueError(f"{where}: 'island' is required.")
+        if with_species:
+            if record.get("species") not in SPECIES:
+                raise ValueError(
+                    f"{where}: 'species' must be one of {', '.join(SPECIES)}."
+                )
+            clean["species"] = record["species"]
+        parsed.append(clean)
+    return parsed
+
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+# One batcher per process, fed by all request threads of that process
+batcher = MicroBatcher(predict_fn=predict_species_proba_with_classes)
+
+
+@api.post("/predict")
+def predict():
+    """
+    Classifies one or more penguins.
+
+    Returns:
+        Response: ``{"predictions": [{"species", "confidence",
+            "probabilities"}, ...]}`` in request order, or an error message.
+    """
+    try:
+        records = parse_records(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    try:
+        species, probabilities, classes = batcher.submit(records).result(
+            timeout=API_REQUEST_TIMEOUT_S
+        )
+    except TimeoutError:
+        logger.warning("Prediction request timed out")
+        return jsonify(error="Prediction timed out."), 503
+    except Exception:
+        logger.exception("Error in prediction endpoint:")
+        return jsonify(error="Prediction failed."), 500
+
+    classes = [str(label) for label in classes]
+    predictions = [
+        {
+            "species": str(label),
+            "confidence": round(float(np.max(row)), 4),
+            "probabilities": dict(zip(classes, np.round(row, 4).tolist())),
+        }
+        for label, row in zip(species, probabilities)
+    ]
+    return jsonify(predictions=predictions)
+
+
+@api.post("/labels")
+def add_verified_labels():
+    """
+    Records penguins whose species was confirmed in the field.
+
+    Accepts the same bodies as ``/predict`` with a ``species`` per record.
+    The records are appended to the verified labels file that the online
+    learner trains on.
+
+    Returns:
+        Response: ``{"recorded": <count>}``, or an error message.
+    """
+    try:
+        records = parse_records(
+            request.get_json(silent=True), with_species=True
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    try:
+        save_verified_labels(pd.DataFrame(records))
+    except Exception:
+        logger.exception("Error in verified labels endpoint:")
+        return jsonify(error="Could not record the labels."), 500
+    return jsonify(recorded=len(records))
+
+
+def register_api(server: Flask) -> None:
+    """
+    Mounts the REST endpoints on the Flask server behind the Dash app.
+
+    Args:
+        server (Flask): The ``app.server`` instance.
+    """
+    server.register_blueprint(api)
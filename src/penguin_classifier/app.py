@@ -5,22 +5,41 @@ Configures the UI layout, initializes callbacks, and starts the web server.
 
 from dash import Dash
 import dash_bootstrap_components as dbc
+import argparse
+import gc
 import os
+import time
 import webbrowser
 from threading import Timer
 
+from loguru import logger
+
+from src.penguin_classifier.api import register_api
+from src.penguin_classifier.config import (
+    FEATURE_CONSTRAINTS,
+    ISLAND_OPTIONS,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_THREADS,
+    SERVER_TIMEOUT_S,
+    SERVER_WORKERS,
+    SEX_OPTIONS,
+)
+from src.penguin_classifier.dataset import dataset_store
+from src.penguin_classifier.modeling.predict import model_holder
+from src.penguin_classifier.monitoring import register_metrics, registry
+from src.penguin_classifier.profiling import register_profiling
 from src.penguin_classifier.ui.layout import create_layout
 
-# Import callbacks to ensure they are registered with the Dash app
-# noinspection PyUnusedImports
-import src.penguin_classifier.ui.callbacks
+# Importing the callbacks registers them with the Dash app
+from src.penguin_classifier.ui.callbacks import warm_up_figure
 
 
-def open_browser():
+def open_browser(port: int = SERVER_PORT):
     """
     Opens the default web browser to the application's local address.
     """
-    webbrowser.open_new("http://127.0.0.1:8050/")
+    webbrowser.open_new(f"http://127.0.0.1:{port}/")
 
 
 # Initialize Dash app with Bootstrap theme
@@ -30,10 +49,176 @@ app.title = "Penguin Classifier"
 app.layout = create_layout()
 
 server = app.server
+register_api(server)
+register_metrics(server)
+register_profiling(server)
 
 
-if __name__ == "__main__":
+def _default_penguin() -> dict:
+    """Returns the input form's default values as one penguin."""
+    penguin = {
+        feature: limits["default"]
+        for feature, limits in FEATURE_CONSTRAINTS.items()
+    }
+    penguin["island"] = ISLAND_OPTIONS[0]["value"]
+    penguin["sex"] = SEX_OPTIONS[0]["value"]
+    return penguin
+
+
+def warm_up() -> None:
+    """
+    Loads the model and the dataset, runs one prediction and builds the
+    default scatter plot.
+
+    Importing the app loads none of these; they are loaded on first use,
+    or here, before the server accepts requests, so the first request
+    does not pay for unpickling the model (and importing scikit-learn),
+    reading and cleaning the data, the first call into the inference path
+    or building the initial figure.
+
+    The model is loaded synchronously, so no background reload holds its
+    lock when the server forks, and the metrics recorded meanwhile are
+    dropped: the warm-up is not traffic.
+    """
+    steps = {
+        "model": model_holder.reload,
+        "dataset": dataset_store.snapshot,
+        "prediction": lambda: model_holder.current.predict(_default_penguin()),
+        "figure": warm_up_figure,
+    }
+    durations = []
+    start = time.perf_counter()
+    for name, step in steps.items():
+        step_start = time.perf_counter()
+        step()
+        durations.append(f"{name} {time.perf_counter() - step_start:.2f}s")
+    registry.reset()
+    logger.info(
+        f"Warm-up done in {time.perf_counter() - start:.2f}s "
+        f"({', '.join(durations)})"
+    )
+
+
+def _post_fork(arbiter, worker) -> None:
+    """Resets per-process state inherited from the gunicorn master."""
+    model_holder.after_fork()
+    registry.reset()
+    gc.enable()
+
+
+def available_cpus() -> int:
+    """Returns the CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def run_production(
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    workers: int | None = SERVER_WORKERS,
+    threads: int = SERVER_THREADS,
+) -> None:
+    """
+    Serves the app with gunicorn, sharing the warm state between workers.
+
+    The model and the dataset are loaded and a prediction is run in the
+    master process before the workers are forked (``preload_app``), so
+    all workers share these pages copy-on-write instead of loading their
+    own copies. The garbage collector is off in the master and its
+    objects are frozen before every fork, because a collection would
+    write to every tracked object and unshare the pages; workers collect
+    as usual. Each worker starts with its own model lock and zeroed
+    metrics.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on.
+        workers (int, optional): Worker processes (default: one per
+            available CPU core).
+        threads (int): Request threads per worker.
+    """
+    # gunicorn does not run on Windows, where only the dev server works
+    from gunicorn.app.base import BaseApplication
+
+    gc.disable()
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers or available_cpus(),
+        "threads": threads,
+        "timeout": SERVER_TIMEOUT_S,
+        "preload_app": True,
+        "pre_fork": lambda arbiter, worker: gc.freeze(),
+        "post_fork": _post_fork,
+    }
+
+    class ProductionServer(BaseApplication):
+        """gunicorn application serving the preloaded ``server``."""
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            warm_up()
+            return server
+
+    logger.info(
+        f"Serving on {options['bind']} with {options['workers']} workers "
+        f"x {threads} threads"
+    )
+    ProductionServer().run()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for the web application."""
+    parser = argparse.ArgumentParser(description="Run the Penguin Classifier.")
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Serve with gunicorn instead of the debug server",
+    )
+    parser.add_argument(
+        "--host",
+        help=f"Interface to listen on (default: {SERVER_HOST} in "
+        "production, 127.0.0.1 otherwise)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SERVER_PORT,
+        help="Port to listen on (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SERVER_WORKERS,
+        help="Worker processes in production (default: one per CPU core)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=SERVER_THREADS,
+        help="Threads per worker in production (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.production:
+        run_production(
+            host=args.host or SERVER_HOST,
+            port=args.port,
+            workers=args.workers,
+            threads=args.threads,
+        )
+        return
+
     if os.environ.get("WERKZEUG_RUN_MAIN") is None:
-        Timer(interval=2, function=open_browser).start()
+        Timer(
+            interval=2, function=open_browser, kwargs={"port": args.port}
+        ).start()
 
-    app.run(debug=True, port=8050)
+    app.run(debug=True, host=args.host or "127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+/*
+ * Client-side callbacks for the Penguin Classifier dashboard.
+ * Served automatically by Dash from the assets folder.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    penguins: {
+        /*
+         * Maps the scatter traces onto a new pair of axes.
+         *
+         * The species traces take their coordinates from the plot data
+         * store (see plots.create_plot_data), whose traces follow the same
+         * order; the trailing "Latest Prediction" trace is placed from the
+         * latest prediction store. No request is sent to the server.
+         */
+        remapAxes: function (xColumn, yColumn, plotData, latest, figure) {
+            if (!plotData || !figure) {
+                return window.dash_clientside.no_update;
+            }
+            const sizeColumn = plotData.size_column;
+            const row = latest && latest.length ? latest[0] : null;
+
+            const data = figure.data.map(function (trace, index) {
+                const columns = plotData.traces[index];
+                if (!columns) {
+                    return Object.assign({}, trace, {
+                        x: row ? [row[xColumn]] : [],
+                        y: row ? [row[yColumn]] : [],
+                    });
+                }
+                let hover = "species=" + trace.name +
+                    "<br>" + xColumn + "=%{x}<br>" + yColumn + "=%{y}";
+                const update = {x: columns[xColumn], y: columns[yColumn]};
+                if (sizeColumn && trace.marker && trace.marker.size) {
+                    update.marker = Object.assign({}, trace.marker, {
+                        size: columns[sizeColumn],
+                    });
+                    hover += "<br>" + sizeColumn + "=%{marker.size}";
+                }
+                update.hovertemplate = hover + "<extra></extra>";
+                return Object.assign({}, trace, update);
+            });
+
+            const layout = Object.assign({}, figure.layout, {
+                xaxis: Object.assign({}, figure.layout.xaxis, {
+                    title: {text: xColumn},
+                    autorange: true,
+                }),
+                yaxis: Object.assign({}, figure.layout.yaxis, {
+                    title: {text: yColumn},
+                    autorange: true,
+                }),
+            });
+            return {data: data, layout: layout};
+        },
+    },
+});
@@ -0,0 +1,354 @@
+"""
+Columnar on-disk cache for parsed CSV data.
+Stores DataFrames as one memory-mappable .npy file per column, validated
+against a content hash of the CSV they were parsed from.
+"""
+
+from collections.abc import Iterable
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import uuid
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+from src.penguin_classifier.config import DATA_CACHE_DIR
+
+# Bump when the on-disk layout changes to invalidate old entries
+_FORMAT_VERSION = 1
+
+
+def _prefix_digest(path: Path, length: int) -> str:
+    """Returns the SHA-256 of the first ``length`` bytes of a file."""
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """
+    Memory-mapped columnar copies of DataFrames parsed from CSV files.
+
+    Each entry remembers the byte length and SHA-256 of the source it was
+    built from. An entry is valid for a file whose first ``length`` bytes
+    still hash to the stored digest, which covers both unchanged files and
+    append-only files like the prediction history (``read_prefix``).
+    Numerical columns are mapped read-only straight from disk; text columns
+    are stored as integer codes plus a category table.
+    """
+
+    def __init__(self, cache_dir: Path = DATA_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def read_csv(self, source: Path, **read_csv_kwargs) -> pd.DataFrame:
+        """
+        Returns the parsed CSV, from the cache when it is up to date.
+
+        Args:
+            source (Path): The CSV file.
+            **read_csv_kwargs: Passed to ``pd.read_csv`` on a cache miss.
+
+        Returns:
+            pd.DataFrame: The same frame ``pd.read_csv`` would return.
+        """
+        return self.get_or_build(
+            source, "csv", lambda: pd.read_csv(source, **read_csv_kwargs)
+        )
+
+    def get_or_build(
+        self, source: Path, namespace: str, build
+    ) -> pd.DataFrame:
+        """
+        Returns a cached frame derived from ``source`` or builds and stores it.
+
+        Args:
+            source (Path): File the frame is derived from.
+            namespace (str): Distinguishes different frames of one source.
+            build (Callable[[], pd.DataFrame]): Creates the frame on a miss.
+
+        Returns:
+            pd.DataFrame: The cached or freshly built frame.
+        """
+        source = Path(source)
+        size = source.stat().st_size  # raises FileNotFoundError
+        frame, length = self.read_prefix(source, namespace)
+        if frame is not None and length == size:
+            return frame
+
+        frame = build()
+        self.write(source, namespace, frame, size)
+        return frame
+
+    def read_prefix(
+        self, source: Path, namespace: str
+    ) -> tuple[pd.DataFrame | None, int]:
+        """
+        Loads an entry that is still valid for the start of ``source``.
+
+        Args:
+            source (Path): File the entry was built from.
+            namespace (str): Entry namespace.
+
+        Returns:
+            tuple[pd.DataFrame | None, int]: The frame and the number of
+                source bytes it covers, or ``(None, 0)`` on a miss.
+        """
+        index_path = self._index_path(source, namespace)
+        try:
+            meta = json.loads(index_path.read_text())
+            stat = Path(source).stat()
+            length = meta["length"]
+            if meta["format"] != _FORMAT_VERSION or stat.st_size < length:
+                return None, 0
+
+            # Same size and mtime: skip hashing the file
+            unchanged = (stat.st_size, stat.st_mtime_ns) == (
+                length,
+                meta["mtime_ns"],
+            )
+            if not unchanged and (
+                _prefix_digest(source, length) != meta["sha256"]
+            ):
+                return None, 0
+
+            frame = self._load_entry(self.cache_dir / meta["entry"], meta)
+            return frame, length
+        except FileNotFoundError:
+            return None, 0
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache {index_path}: {e}")
+            return None, 0
+
+    def write(
+        self, source: Path, namespace: str, frame: pd.DataFrame, length: int
+    ) -> None:
+        """
+        Stores ``frame`` as derived from the first ``length`` bytes of source.
+
+        Failures are logged and otherwise ignored, since the cache is only
+        an accelerator.
+
+        Args:
+            source (Path): File the frame was derived from.
+            namespace (str): Entry namespace.
+            frame (pd.DataFrame): The data to cache.
+            length (int): Number of source bytes the frame represents.
+        """
+        source = Path(source)
+        index_path = self._index_path(source, namespace)
+        entry = f"{index_path.stem}-{uuid.uuid4().hex[:12]}"
+        entry_dir = self.cache_dir / entry
+        try:
+            columns = self._write_columns(entry_dir, frame)
+            self._register(
+                source, index_path, entry, columns, len(frame), length
+            )
+            logger.info(f"Cached {len(frame)} rows of {source} ({namespace})")
+        except Exception as e:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            logger.warning(f"Could not cache {source}: {e}")
+
+    def write_chunks(
+        self,
+        source: Path,
+        namespace: str,
+        chunks: Iterable[pd.DataFrame],
+        n_rows: int,
+        categories: dict[str, list[str]],
+    ) -> None:
+        """
+        Stores a frame that is produced chunk by chunk.
+
+        Columns are written into preallocated memory-mapped files, so the
+        frame never has to fit into memory. ``chunks`` may write ``source``
+        as it goes: the entry is validated against the source only once
+        the last chunk has been consumed.
+
+        Args:
+            source (Path): File the frame is derived from.
+            namespace (str): Entry namespace.
+            chunks (Iterable[pd.DataFrame]): Parts of the frame, in order.
+            n_rows (int): Total number of rows in ``chunks``.
+            categories (dict[str, list[str]]): All values of every text
+                column, which fixes the integer codes up front.
+
+        Raises:
+            ValueError: If the chunks do not add up to ``n_rows``.
+        """
+        source = Path(source)
+        index_path = self._index_path(source, namespace)
+        entry = f"{index_path.stem}-{uuid.uuid4().hex[:12]}"
+        entry_dir = self.cache_dir / entry
+        entry_dir.mkdir(parents=True, exist_ok=True)
+
+        columns, arrays, start = None, None, 0
+        try:
+            for chunk in chunks:
+                if columns is None:
+                    columns, arrays = self._allocate_columns(
+                        entry_dir, chunk, n_rows, categories
+                    )
+                stop = start + len(chunk)
+                if stop > n_rows:
+                    raise ValueError(f"More than {n_rows} rows")
+                for column, array in zip(columns, arrays):
+                    values = chunk[column["name"]]
+                    if column["kind"] == "category":
+                        values = pd.Categorical(
+                            values, categories=column["categories"]
+                        ).codes
+                    array[start:stop] = values
+                start = stop
+            if start != n_rows:
+                raise ValueError(f"Expected {n_rows} rows, got {start}")
+            for array in arrays or []:
+                array.flush()
+            arrays = None
+            self._register(
+                source,
+                index_path,
+                entry,
+                columns or [],
+                n_rows,
+                source.stat().st_size,
+            )
+            logger.info(f"Cached {n_rows} rows of {source} ({namespace})")
+        except BaseException:
+            arrays = None
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            raise
+
+    def _register(
+        self,
+        source: Path,
+        index_path: Path,
+        entry: str,
+        columns: list[dict],
+        rows: int,
+        length: int,
+    ) -> None:
+        """Points the index at a completely written entry directory."""
+        stat = source.stat()
+        meta = {
+            "format": _FORMAT_VERSION,
+            "source": str(source),
+            "entry": entry,
+            "length": length,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _prefix_digest(source, length),
+            "rows": rows,
+            "columns": columns,
+        }
+        old_entry = None
+        if index_path.exists():
+            old_entry = json.loads(index_path.read_text()).get("entry")
+
+        tmp_index = index_path.with_suffix(".json.tmp")
+        tmp_index.write_text(json.dumps(meta, indent=2))
+        os.replace(tmp_index, index_path)
+
+        # Readers that mapped the old files keep them until they close
+        if old_entry and old_entry != entry:
+            shutil.rmtree(self.cache_dir / old_entry, ignore_errors=True)
+
+    def _index_path(self, source: Path, namespace: str) -> Path:
+        """Index file name, unique per absolute source path and namespace."""
+        location = hashlib.sha1(str(Path(source).resolve()).encode())
+        name = f"{Path(source).stem}-{namespace}-{location.hexdigest()[:8]}"
+        return self.cache_dir / f"{name}.json"
+
+    @staticmethod
+    def _allocate_columns(
+        entry_dir: Path,
+        sample: pd.DataFrame,
+        n_rows: int,
+        categories: dict[str, list[str]],
+    ) -> tuple[list[dict], list[np.memmap]]:
+        """Creates one writable .npy map per column of ``sample``."""
+        columns, arrays = [], []
+        for position, name in enumerate(sample.columns):
+            series = sample[name]
+            column = {
+                "name": name,
+                "file": f"{position}.npy",
+                "dtype": str(series.dtype),
+            }
+            if series.dtype.kind in "biuf":
+                dtype = series.dtype
+                column["kind"] = "numeric"
+            else:
+                dtype = np.int32
+                column["kind"] = "category"
+                column["categories"] = [str(c) for c in categories[name]]
+            arrays.append(
+                np.lib.format.open_memmap(
+                    entry_dir / column["file"],
+                    mode="w+",
+                    dtype=dtype,
+                    shape=(n_rows,),
+                )
+            )
+            columns.append(column)
+        return columns, arrays
+
+    @staticmethod
+    def _write_columns(entry_dir: Path, frame: pd.DataFrame) -> list[dict]:
+        """Saves every column as .npy and returns the column metadata."""
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        columns = []
+        for position, name in enumerate(frame.columns):
+            series = frame[name]
+            file_name = f"{position}.npy"
+            column = {
+                "name": name,
+                "file": file_name,
+                "dtype": str(series.dtype),
+            }
+            if series.dtype.kind in "biuf":
+                values = series.to_numpy()
+                column["kind"] = "numeric"
+            else:
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+                values = codes.astype(np.int32)
+                column["kind"] = "category"
+                column["categories"] = [str(c) for c in categories]
+            np.save(entry_dir / file_name, values, allow_pickle=False)
+            columns.append(column)
+        return columns
+
+    @staticmethod
+    def _load_entry(entry_dir: Path, meta: dict) -> pd.DataFrame:
+        """Maps the column files of an entry back into a DataFrame."""
+        data = {}
+        # Zero-length arrays cannot be memory-mapped
+        mmap_mode = "r" if meta["rows"] else None
+        for column in meta["columns"]:
+            values = np.load(entry_dir / column["file"], mmap_mode=mmap_mode)
+            # Plain ndarray view, still backed by the mapped file
+            values = values.view(np.ndarray)
+            if column["kind"] == "numeric":
+                data[column["name"]] = pd.Series(
+                    values, dtype=values.dtype, copy=False
+                )
+                continue
+            table = np.array(column["categories"] + [np.nan], dtype=object)
+            # Code -1 (missing) selects the trailing NaN
+            objects = table[np.asarray(values)]
+            dtype = None if column["dtype"] == "object" else column["dtype"]
+            data[column["name"]] = pd.Series(objects, dtype=dtype or object)
+        return pd.DataFrame(data, copy=False)
+
+
+# Shared cache for the project's data directory
+data_cache = ColumnarCache()
@@ -13,16 +13,207 @@ DATA_DIR = PROJ_ROOT / "data"
 
 RAW_DATA_PATH = DATA_DIR / "raw" / "data.csv"
 PROCESSED_DATA_PATH = DATA_DIR / "processed" / "prediction_history.csv"
+# Observations with confirmed species (CSV_HEADER columns), appended by
+# field teams and consumed by the online learner (see modeling/online.py)
+VERIFIED_LABELS_PATH = DATA_DIR / "processed" / "verified_labels.csv"
+# Binary columnar copies of parsed CSV files (see cache.py)
+DATA_CACHE_DIR = DATA_DIR / "cache"
+# Uploaded files, results and status of background jobs (see jobs.py)
+JOBS_DIR = DATA_DIR / "jobs"
+# Temporary shards written during out-of-core training
+INTERIM_DATA_DIR = DATA_DIR / "interim"
 
 MODEL_PATH = PROJ_ROOT / "models" / "pipeline.joblib"
+# Artifacts of past training runs, keyed by data, config and versions
+RUN_CACHE_DIR = PROJ_ROOT / "models" / "run_cache"
+# Incrementally trained model and its read position in VERIFIED_LABELS_PATH
+ONLINE_STATE_PATH = PROJ_ROOT / "models" / "online_state.joblib"
+# Artifact the online learner publishes; it only replaces MODEL_PATH (the
+# tuned model served by the app) when run with --serve
+ONLINE_MODEL_PATH = PROJ_ROOT / "models" / "online_pipeline.joblib"
 REPORTS_DIR = PROJ_ROOT / "reports"
 FIGURES_DIR = REPORTS_DIR / "figures"
 METRICS_PATH = REPORTS_DIR / "metrics.json"
+# cProfile dumps of sampled or flagged requests (see profiling.py)
+PROFILES_DIR = REPORTS_DIR / "profiles"
+
+# --- Model Serving ---
+# Minimum number of seconds between two checks of the model artifact on disk.
+# The in-memory pipeline is swapped as soon as a changed artifact is detected.
+MODEL_RELOAD_CHECK_INTERVAL = 2.0
+
+# --- Prediction History ---
+# Predictions are queued in memory and appended to PROCESSED_DATA_PATH in
+# batches by a background thread: whichever limit is reached first
+HISTORY_FLUSH_INTERVAL_S = 0.5
+HISTORY_FLUSH_SIZE = 100
+# fsync after every batch so flushed predictions survive a crash
+HISTORY_FSYNC = True
+
+# --- Data Cache ---
+# Read CSV sources through the memory-mapped columnar cache
+USE_DATA_CACHE = True
+
+# --- Batch Prediction ---
+# Rows per chunk when scoring large CSV files; bounds memory per worker
+BATCH_CHUNK_SIZE = 50_000
+# Worker processes used for scoring (None = one per CPU core)
+BATCH_WORKERS = None
+
+# --- Background Jobs ---
+# Uploaded CSV files are classified by a separate process per job
+JOB_CHUNK_SIZE = 10_000
+# Scoring processes used by each job (see BATCH_WORKERS)
+JOB_WORKERS = 1
+# Largest accepted upload; bigger files: batch CLI
+JOB_MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+# Finished jobs and their files are deleted after this many seconds
+JOB_RETENTION_S = 24 * 60 * 60
+# How often the dashboard polls the status of a running job
+JOB_POLL_INTERVAL_MS = 1_000
+
+# --- REST API ---
+# Requests arriving within this window are scored in one vectorized call
+API_BATCH_WINDOW_MS = 2.0
+# A micro-batch is scored early once it holds this many records
+API_MAX_BATCH_SIZE = 512
+# Upper bound for records in a single request (larger files: batch CLI)
+API_MAX_RECORDS_PER_REQUEST = 10_000
+# Seconds a request waits for its micro-batch before giving up
+API_REQUEST_TIMEOUT_S = 10.0
+
+# --- Production Server ---
+# Address of the gunicorn server started by ``app.py --production``
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 8050
+# Worker processes (None = one per available CPU core); the model and the
+# dataset are loaded once and shared by all workers copy-on-write
+SERVER_WORKERS = None
+# Request threads per worker; requests also wait on I/O, the history file
+# and the API micro-batcher, so a few threads keep a core busy
+SERVER_THREADS = 4
+# Workers silent for longer than this are restarted
+SERVER_TIMEOUT_S = 60
+
+# --- Monitoring ---
+# Time request stages and count predictions (see monitoring.py)
+METRICS_ENABLED = True
+# Route of the Prometheus text endpoint on the Flask server
+METRICS_ENDPOINT = "/metrics"
+# Upper bounds (seconds) of the latency histogram buckets
+METRICS_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+# --- Profiling ---
+# Share of requests profiled (0 = off); the PENGUIN_PROFILE_SAMPLE
+# environment variable overrides it without a code change
+PROFILE_SAMPLE_RATE = 0.0
+# A request is also profiled if it carries this header with the value of
+# the PENGUIN_PROFILE_TOKEN environment variable (ignored while unset)
+PROFILE_HEADER = "X-Penguin-Profile"
+# Only requests to these paths are profiled: Dash callbacks and the API
+PROFILE_PATH_PREFIXES = ("/_dash-update-component", "/api/")
+# Newest profile files kept in PROFILES_DIR
+PROFILE_MAX_FILES = 200
+# Functions listed per summary, by cumulative time
+PROFILE_TOP_FUNCTIONS = 25
+
+# --- Startup Budget ---
+# Packages of the web UI; only the app itself should import them
+STARTUP_UI_PACKAGES = ("dash", "dash_bootstrap_components", "plotly", "flask")
+# Packages the prediction path loads on first use (unpickling the model)
+STARTUP_MODEL_PACKAGES = ("sklearn", "scipy")
+# Import time (seconds, from ``python -X importtime``) allowed per entry
+# point and packages it must not import (see startup.py)
+STARTUP_BUDGETS = {
+    "src.penguin_classifier.app": {
+        "max_import_s": 2.5,
+        "forbidden": STARTUP_MODEL_PACKAGES,
+    },
+    "src.penguin_classifier.modeling.predict": {
+        "max_import_s": 1.0,
+        "forbidden": STARTUP_UI_PACKAGES + STARTUP_MODEL_PACKAGES,
+    },
+    "src.penguin_classifier.modeling.batch": {
+        "max_import_s": 1.0,
+        "forbidden": STARTUP_UI_PACKAGES + STARTUP_MODEL_PACKAGES,
+    },
+    "src.penguin_classifier.jobs": {
+        "max_import_s": 1.0,
+        "forbidden": STARTUP_UI_PACKAGES + STARTUP_MODEL_PACKAGES,
+    },
+    "src.penguin_classifier.synthetic": {
+        "max_import_s": 1.0,
+        "forbidden": STARTUP_UI_PACKAGES + STARTUP_MODEL_PACKAGES,
+    },
+}
 
 # --- ML Constants ---
 RANDOM_SEED = 42
 TEST_SPLIT_SIZE = 0.2
 
+# --- Hyperparameter Search ---
+# Candidate values for the classifier (see modeling/search.py)
+PARAM_GRID = {
+    "classifier__C": [0.1, 1.0, 10.0],
+    "classifier__solver": ["lbfgs", "newton-cg"],
+}
+SEARCH_CV_FOLDS = 5
+# One of "grid", "random" or "halving"
+SEARCH_STRATEGY = "grid"
+# Budget for cross-validation (None = unlimited)
+SEARCH_MAX_SECONDS = None
+SEARCH_MAX_FITS = None
+# Candidates sampled by the "random" strategy
+SEARCH_RANDOM_CANDIDATES = 10
+# Share of candidates dropped per "halving" round is 1 - 1 / factor
+SEARCH_HALVING_FACTOR = 3
+
+# --- Run Cache ---
+# Training runs kept in RUN_CACHE_DIR (least recently used are removed)
+RUN_CACHE_MAX_ENTRIES = 20
+
+# --- Online Learning ---
+# Verified rows per partial_fit call
+ONLINE_BATCH_SIZE = 256
+# The model is published to ONLINE_MODEL_PATH after this many new rows or
+# seconds, whichever comes first, and at the end of every run
+ONLINE_PUBLISH_ROWS = 5_000
+ONLINE_PUBLISH_INTERVAL_S = 60.0
+# Seconds between checks for new verified labels in --follow mode
+ONLINE_POLL_INTERVAL_S = 5.0
+# Shuffled passes over RAW_DATA_PATH when the online model is created
+ONLINE_BOOTSTRAP_EPOCHS = 20
+# L2 regularization of the SGD classifier
+ONLINE_ALPHA = 1e-4
+
+# --- Out-of-Core Training ---
+# Rows parsed per chunk while streaming the training CSV
+OOC_CHUNK_SIZE = 100_000
+# Training rows are spilled to shards of about this size (bytes of the
+# source file); one shard is held in memory at a time during an epoch
+OOC_SHARD_BYTES = 256 * 1024 * 1024
+# Passes of the SGD classifier over the training split
+OOC_EPOCHS = 5
+
+# --- Synthetic Data ---
+# Groups (species, island, sex) with fewer rows borrow the covariance of
+# their species when synthetic penguins are generated (see synthetic.py)
+SYNTHETIC_MIN_GROUP_ROWS = 10
+
 # --- Feature Definitions ---
 # Columns used for prediction and CSV exports
 CSV_HEADER = [
@@ -44,6 +235,9 @@ NUMERICAL_FEATURES = [
 
 CATEGORICAL_FEATURES = ["island", "sex"]
 
+# Target classes, fixed up front for models that learn incrementally
+SPECIES = ["Adelie", "Chinstrap", "Gentoo"]
+
 # Complete list of features expected by the model pipeline
 FEATURES = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
 
@@ -73,3 +267,24 @@ SEX_OPTIONS: list[dict] = [
 
 # Styling constant for Bootstrap components
 OFFSET = "mb-3"
+
+# Rows per page of the prediction history table (paged on the server)
+HISTORY_PAGE_SIZE = 15
+
+
+# --- Scatter Plot ---
+# The browser keeps the plot columns of the dataset (see plots.py) and
+# switches axes locally; up to this many new rows are sent as a delta,
+# larger gaps resend the columns
+PLOT_DATA_MAX_PATCH_ROWS = 1_000
+# Level of detail: larger histories are downsampled to about this many
+# points (stratified by species and feature-space density)
+PLOT_MAX_POINTS = 20_000
+# The newest rows are always plotted, whatever the downsampling
+PLOT_KEEP_NEWEST = 1_000
+# Bins per numerical feature for the density-preserving downsampling
+PLOT_DENSITY_BINS = 12
+# Above this many points, traces are rendered with WebGL instead of SVG
+PLOT_WEBGL_THRESHOLD = 5_000
+# Serialized figures kept per dataset version, one per axis selection
+FIGURE_CACHE_SIZE = 32
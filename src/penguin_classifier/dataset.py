@@ -3,16 +3,42 @@ Utility functions for data ingestion, cleaning, and persistence.
 Handles both the initial dataset and the history of user predictions.
 """
 
+import atexit
+import csv
+from dataclasses import dataclass
+import io
+import math
+import os
 from pathlib import Path
+import threading
 from loguru import logger
+import numpy as np
 import pandas as pd
 
+from src.penguin_classifier.cache import ColumnarCache, data_cache
 from src.penguin_classifier.config import (
+    CATEGORICAL_FEATURES,
     CSV_HEADER,
+    FEATURES,
+    HISTORY_FLUSH_INTERVAL_S,
+    HISTORY_FLUSH_SIZE,
+    HISTORY_FSYNC,
     NUMERICAL_FEATURES,
     PROCESSED_DATA_PATH,
     RAW_DATA_PATH,
+    USE_DATA_CACHE,
+    VERIFIED_LABELS_PATH,
 )
+from src.penguin_classifier.monitoring import (
+    FunctionMetric,
+    registry,
+    timed,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single process only
+    fcntl = None
 
 
 def fetch_and_save_raw_data() -> None:
@@ -36,12 +62,18 @@ def fetch_and_save_raw_data() -> None:
     return None
 
 
-def load_data(filepath: Path) -> pd.DataFrame:
+def load_data(
+    filepath: Path, use_cache: bool = USE_DATA_CACHE
+) -> pd.DataFrame:
     """
     Reads a CSV file into a DataFrame.
 
+    Unless disabled, the parsed file is served from the memory-mapped
+    columnar cache, which is rebuilt whenever the file content changes.
+
     Args:
         filepath (Path): Path to the target CSV file.
+        use_cache (bool): Read through the columnar cache.
 
     Returns:
         pd.DataFrame: The loaded dataset.
@@ -50,6 +82,8 @@ def load_data(filepath: Path) -> pd.DataFrame:
         FileNotFoundError: If the file does not exist at the specified path.
     """
     try:
+        if use_cache:
+            return data_cache.read_csv(filepath)
         data = pd.read_csv(filepath)
         return data
     except FileNotFoundError:
@@ -72,6 +106,56 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
+def valid_feature_rows(df: pd.DataFrame) -> pd.Series:
+    """
+    Flags observations that can be passed to the model.
+
+    Mirrors ``clean_data`` for unlabeled input: a row is valid when all
+    numerical features are present and numeric and the island is known.
+
+    Args:
+        df (pd.DataFrame): Raw observations, e.g. one chunk of a survey file.
+
+    Returns:
+        pd.Series: Boolean mask aligned with ``df``.
+    """
+    numeric = df[NUMERICAL_FEATURES].apply(pd.to_numeric, errors="coerce")
+    return numeric.notna().all(axis="columns") & df["island"].notna()
+
+
+def split_labeled_rows(
+    df: pd.DataFrame, classes: list[str] | None = None
+) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Extracts model-ready features and labels from raw labeled rows.
+
+    Unlike ``clean_data`` this tolerates text in numerical columns, as
+    found in appended or streamed CSV files, and drops those rows.
+
+    Args:
+        df (pd.DataFrame): Raw observations with a species column.
+        classes (list[str], optional): Only keep rows of these species.
+
+    Returns:
+        tuple[pd.DataFrame, pd.Series]: Features (X) and Target labels (y).
+    """
+    labeled = df["species"].notna()
+    if classes is not None:
+        labeled &= df["species"].isin(classes)
+    df = df[valid_feature_rows(df) & labeled]
+    features = df[FEATURES].copy()
+    # Row hashes (see out_of_core.py) depend on dtype, which must not
+    # depend on the chunk: a chunk without missing values parses integer
+    # columns as int64, one without any sex as float64
+    features[NUMERICAL_FEATURES] = (
+        features[NUMERICAL_FEATURES].apply(pd.to_numeric).astype("float64")
+    )
+    features[CATEGORICAL_FEATURES] = features[CATEGORICAL_FEATURES].astype(
+        object
+    )
+    return features, df["species"]
+
+
 def split_feature_from_target(df: pd.DataFrame) -> tuple[pd.DataFrame, list]:
     """
     Separates the target labels from the input features.
@@ -88,43 +172,457 @@ def split_feature_from_target(df: pd.DataFrame) -> tuple[pd.DataFrame, list]:
     return features, target
 
 
+def _format_field(value) -> str:
+    """Renders a value the way ``DataFrame.to_csv`` does (NaN -> empty)."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value)
+
+
+class PredictionHistoryWriter:
+    """
+    Group-commit writer for the append-only prediction history CSV.
+
+    Records are queued in memory and appended by a background thread once
+    ``flush_size`` records are waiting or ``flush_interval`` seconds have
+    passed. Each batch is written with a single ``O_APPEND`` write under an
+    exclusive file lock, so several server processes can share the file
+    without interleaving lines. Pending records are flushed at exit.
+    """
+
+    def __init__(
+        self,
+        path: Path = PROCESSED_DATA_PATH,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL_S,
+        flush_size: int = HISTORY_FLUSH_SIZE,
+        fsync: bool = HISTORY_FSYNC,
+    ):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.fsync = fsync
+        # Held while a batch moves from memory to disk; readers that need a
+        # consistent file + pending snapshot take it as well
+        self.io_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending: list[dict] = []
+        self._in_flight: list[dict] = []
+        self._pid = None
+        self._closed = False
+        self._listeners = []
+        atexit.register(self.close)
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a callback for completed writes.
+
+        The callback receives the ``(start, end)`` byte range of each batch
+        this writer appended and runs while ``io_lock`` is held.
+
+        Args:
+            listener (Callable[[int, int], None]): The callback.
+        """
+        self._listeners.append(listener)
+
+    def append(self, records: list[dict]) -> None:
+        """
+        Queues prediction records for the next batch.
+
+        Args:
+            records (list[dict]): Records with (at least) the CSV_HEADER keys.
+        """
+        self._ensure_worker()
+        with self._cond:
+            self._pending.extend(records)
+            if len(self._pending) >= self.flush_size:
+                self._cond.notify()
+
+    def pending(self) -> list[dict]:
+        """
+        Returns records that are not yet visible in the history file.
+
+        Returns:
+            list[dict]: Queued and in-flight records, oldest first.
+        """
+        with self._cond:
+            return self._in_flight + self._pending
+
+    def flush(self) -> None:
+        """
+        Synchronously writes all queued records to disk.
+
+        Raises:
+            OSError: If the batch cannot be written. Its records are put
+                back in front of the queue, so the next flush retries them.
+        """
+        with self.io_lock:
+            with self._cond:
+                self._in_flight, self._pending = self._pending, []
+            try:
+                if self._in_flight:
+                    self._write(self._in_flight)
+            except BaseException:
+                with self._cond:
+                    self._pending = self._in_flight + self._pending
+                    self._in_flight = []
+                raise
+            finally:
+                with self._cond:
+                    self._in_flight = []
+
+    def close(self) -> None:
+        """Flushes pending records and stops the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def _ensure_worker(self) -> None:
+        """Starts the flush thread, again after a fork if necessary."""
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._closed = False
+            threading.Thread(
+                target=self._run, name="history-writer", daemon=True
+            ).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        """Flush loop executed by the background thread."""
+        while True:
+            with self._cond:
+                if len(self._pending) < self.flush_size and not self._closed:
+                    self._cond.wait(timeout=self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(f"Could not write to {self.path}")
+                # The batch is queued again; retry after the interval
+                with self._cond:
+                    if not self._closed:
+                        self._cond.wait(timeout=self.flush_interval)
+
+    @timed("history_flush")
+    def _write(self, records: list[dict]) -> None:
+        """Appends records in a single locked write."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerows(
+            [_format_field(record.get(column)) for column in CSV_HEADER]
+            for record in records
+        )
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            data = buffer.getvalue()
+            start = os.fstat(fd).st_size
+            if start == 0:
+                data = ",".join(CSV_HEADER) + "\n" + data
+            encoded = data.encode("utf-8")
+            view = memoryview(encoded)
+            while view:
+                view = view[os.write(fd, view) :]
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)  # also releases the lock
+
+        for listener in self._listeners:
+            listener(start, start + len(encoded))
+
+
+# Shared by every request handled in this process
+history_writer = PredictionHistoryWriter()
+# Observations whose species was confirmed in the field
+verified_labels_writer = PredictionHistoryWriter(VERIFIED_LABELS_PATH)
+
+# Columns kept as Python objects rather than pandas' inferred string dtype,
+# so read-only views can be built without copying or re-validating them
+_OBJECT_COLUMNS = [c for c in CSV_HEADER if c not in NUMERICAL_FEATURES]
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """
+    Read-only view of the combined dataset at one version.
+
+    Attributes:
+        version (int): Number of rows in the store when the view was taken.
+        data (pd.DataFrame): Raw and history rows, newest first.
+    """
+
+    version: int
+    data: pd.DataFrame
+
+
+class DatasetStore:
+    """
+    In-memory combined dataset that grows with the prediction history.
+
+    The raw data is read and cleaned once. New predictions of this process
+    are appended directly; rows written by other processes are picked up by
+    reading only the new tail of the history file. Columns are stored in
+    preallocated arrays that double when full, so appending and taking a
+    snapshot cost the same regardless of how large the history is.
+    """
+
+    def __init__(
+        self,
+        raw_path: Path = RAW_DATA_PATH,
+        writer: PredictionHistoryWriter = history_writer,
+        cache: ColumnarCache | None = data_cache,
+    ):
+        self.raw_path = Path(raw_path)
+        self.writer = writer
+        self.cache = cache
+        self.history_path = writer.path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._columns: dict[str, np.ndarray] = {}
+        self._size = 0
+        # Bytes of the history file already merged into the arrays
+        self._offset = 0
+        # Byte ranges appended by our own writer (rows already in memory)
+        self._own_ranges: list[tuple[int, int]] = []
+        self._snapshot: DatasetSnapshot | None = None
+        writer.add_listener(self._on_flush)
+
+    @property
+    def version(self) -> int:
+        """Current dataset version (grows with every appended row)."""
+        return self._size
+
+    def snapshot(self) -> DatasetSnapshot:
+        """
+        Returns a read-only view of all rows, newest first.
+
+        Returns:
+            DatasetSnapshot: The current version and its DataFrame.
+        """
+        self._refresh()
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != self._size:
+                snapshot = DatasetSnapshot(self._size, self._build_view())
+                self._snapshot = snapshot
+            return snapshot
+
+    def append(self, records: list[dict]) -> None:
+        """
+        Adds new predictions and queues them for the history file.
+
+        Args:
+            records (list[dict]): Records with (at least) the CSV_HEADER keys.
+        """
+        with self._lock:
+            if self._loaded:
+                self._extend(
+                    pd.DataFrame.from_records(records, columns=CSV_HEADER)
+                )
+            # Under our lock, so a concurrent load sees them exactly once
+            self.writer.append(records)
+
+    def _refresh(self) -> None:
+        """Loads the data on first use, then merges new history lines."""
+        with self.writer.io_lock, self._lock:
+            if not self._loaded:
+                self._load()
+                return
+
+            size = (
+                self.history_path.stat().st_size
+                if self.history_path.exists()
+                else 0
+            )
+            if size < self._offset:
+                logger.warning(f"{self.history_path} was truncated, reloading")
+                self._loaded = False
+                self._load()
+            elif size > self._offset:
+                self._read_tail(size)
+
+    @timed("dataset_load")
+    def _load(self) -> None:
+        """Reads the raw data, the whole history and queued predictions."""
+        self._columns, self._size = {}, 0
+        self._offset, self._own_ranges = 0, []
+
+        def clean_raw():
+            raw_data = load_data(self.raw_path, use_cache=False)
+            return clean_data(raw_data)[CSV_HEADER]
+
+        if self.cache is None:
+            cleaned = clean_raw()
+        else:
+            cleaned = self.cache.get_or_build(
+                self.raw_path, "clean", clean_raw
+            )
+        self._extend(cleaned)
+        if self.history_path.exists():
+            self._load_history(raw_rows=len(cleaned))
+        pending = self.writer.pending()
+        if pending:
+            self._extend(
+                pd.DataFrame.from_records(pending, columns=CSV_HEADER)
+            )
+        self._loaded = True
+
+    def _load_history(self, raw_rows: int) -> None:
+        """Reads the history from its cached prefix plus the new tail."""
+        if self.cache is not None:
+            history, self._offset = self.cache.read_prefix(
+                self.history_path, "history"
+            )
+            if history is not None:
+                self._extend(history)
+        cached_offset = self._offset
+
+        size = self.history_path.stat().st_size
+        if size > self._offset:
+            self._read_tail(size)
+
+        if self.cache is not None and self._offset > cached_offset:
+            # Compact: cache everything parsed so far for the next start
+            compacted = pd.DataFrame(
+                {
+                    column: self._columns[column][raw_rows : self._size]
+                    for column in CSV_HEADER
+                }
+            )
+            self.cache.write(
+                self.history_path, "history", compacted, self._offset
+            )
+
+    @timed("history_read")
+    def _read_tail(self, size: int) -> None:
+        """Parses complete history lines between the offset and ``size``."""
+        with open(self.history_path, "rb") as f:
+            f.seek(self._offset)
+            content = f.read(size - self._offset)
+        # A concurrent writer may not have finished its last line yet
+        end = self._offset + content.rfind(b"\n") + 1
+        if end == self._offset:
+            return
+
+        base = position = self._offset
+        parts, remaining = [], []
+        for start, stop in sorted(self._own_ranges):
+            if stop > end:
+                remaining.append((start, stop))
+                continue
+            parts.append(content[position - base : start - base])
+            position = stop
+        parts.append(content[position - base : end - base])
+        self._own_ranges = remaining
+        self._offset = end
+
+        data = b"".join(parts)
+        if not data.strip():
+            return
+        new_rows = pd.read_csv(
+            io.BytesIO(data),
+            header=None,
+            names=CSV_HEADER,
+            dtype={column: object for column in _OBJECT_COLUMNS},
+        )
+        is_header = new_rows["species"].eq("species")
+        self._extend(new_rows[~is_header])
+
+    def _on_flush(self, start: int, stop: int) -> None:
+        """Writer callback: remembers byte ranges holding our own rows."""
+        with self._lock:
+            if self._loaded:
+                self._own_ranges.append((start, stop))
+
+    def _extend(self, frame: pd.DataFrame) -> None:
+        """Appends rows to the column arrays, growing them if needed."""
+        count = len(frame)
+        if count == 0:
+            return
+        needed = self._size + count
+        capacity = len(next(iter(self._columns.values()), ()))
+        if needed > capacity:
+            capacity = max(needed, 2 * capacity, 1024)
+            for column in CSV_HEADER:
+                dtype = object if column in _OBJECT_COLUMNS else np.float64
+                grown = np.empty(capacity, dtype=dtype)
+                if column in self._columns:
+                    grown[: self._size] = self._columns[column][: self._size]
+                self._columns[column] = grown
+        for column in CSV_HEADER:
+            values = frame[column].to_numpy(
+                dtype=object if column in _OBJECT_COLUMNS else np.float64,
+                na_value=np.nan,
+            )
+            self._columns[column][self._size : needed] = values
+        self._size = needed
+
+    def _build_view(self) -> pd.DataFrame:
+        """Wraps reversed, read-only slices of the arrays in a DataFrame."""
+        series = {}
+        for column in CSV_HEADER:
+            values = self._columns.get(column, np.empty(0))[: self._size][::-1]
+            values.flags.writeable = False
+            series[column] = pd.Series(values, dtype=values.dtype, copy=False)
+        return pd.DataFrame(series, copy=False)
+
+
+# Shared by every request handled in this process
+dataset_store = DatasetStore()
+registry.register(
+    FunctionMetric(
+        "penguin_dataset_rows",
+        "Rows of the combined dataset held in memory.",
+        lambda: dataset_store.version,
+    )
+)
+
+
 def save_prediction(new_data: pd.DataFrame = None):
     """
-    Appends a new prediction record to the processed history CSV.
+    Adds new prediction records to the dataset and the history CSV.
+
+    The records are visible to ``load_combined_data`` immediately and are
+    written to disk in the background by ``history_writer``.
 
     Args:
-        new_data (pd.DataFrame): A single-row DataFrame containing the features and the predicted species.
+        new_data (pd.DataFrame): A DataFrame containing the features and the predicted species.
     """
-    file_exists = Path(PROCESSED_DATA_PATH).exists()
-
     # Ensure columns are in the correct order before saving
-    new_data_ordered = new_data[CSV_HEADER]
-    new_data_ordered.to_csv(
-        PROCESSED_DATA_PATH, mode="a", header=not file_exists, index=False
-    )
+    dataset_store.append(new_data[CSV_HEADER].to_dict("records"))
+
+
+def save_verified_labels(labeled: pd.DataFrame) -> None:
+    """
+    Appends observations with a confirmed species to the verified labels.
+
+    The rows are on disk when this returns, ready for the online learner
+    (see modeling/online.py). They are not added to the prediction history.
+
+    Args:
+        labeled (pd.DataFrame): Features and the verified species.
+    """
+    verified_labels_writer.append(labeled[CSV_HEADER].to_dict("records"))
+    verified_labels_writer.flush()
 
 
-def load_combined_data():
+def load_combined_data() -> pd.DataFrame:
     """
     Merges historical raw data with user-generated prediction history.
 
     Used for updating the UI dashboard to show both original data
-    points and new predictions in the plots and tables.
+    points and new predictions in the plots and tables. Served from the
+    in-memory ``dataset_store``; the returned frame is a read-only view.
 
     Returns:
         pd.DataFrame: Concatenated dataset, reversed for chronological display.
     """
-    raw_data = load_data(RAW_DATA_PATH)
-    cleaned_data = clean_data(raw_data)
-
-    if not PROCESSED_DATA_PATH.exists():
-        return cleaned_data.iloc[::-1]
-
-    prediction_history = load_data(PROCESSED_DATA_PATH)
-    if prediction_history.notna().any().any():
-        updated_data = pd.concat(
-            [cleaned_data, prediction_history], axis="rows"
-        )
-        return updated_data.iloc[::-1]
-
-    return cleaned_data.iloc[::-1]
+    return dataset_store.snapshot().data
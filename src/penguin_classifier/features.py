@@ -13,13 +13,19 @@ from src.penguin_classifier.config import (
 )
 
 
-def build_preprocessor() -> ColumnTransformer:
+def build_preprocessor(
+    categories: list[list] | None = None,
+) -> ColumnTransformer:
     """
     Creates a scikit-learn ColumnTransformer for automated feature scaling and encoding.
 
     Numerical features are scaled to zero mean and unit variance using StandardScaler.
     Categorical features are transformed into binary vectors using OneHotEncoder.
 
+    Args:
+        categories (list[list], optional): Fixed categories per categorical
+            feature. By default they are learned from the training data.
+
     Returns:
         ColumnTransformer: A configured preprocessor to be used in a model pipeline.
     """
@@ -27,7 +33,9 @@ def build_preprocessor() -> ColumnTransformer:
 
     # Encoding categorical strings (e.g., Island names) into numeric format
     categorial_processor = OneHotEncoder(
-        handle_unknown="ignore", sparse_output=False
+        categories=categories or "auto",
+        handle_unknown="ignore",
+        sparse_output=False,
     )
 
     # Combining both processors into a single transformer object
@@ -0,0 +1,244 @@
+"""
+Disk-backed background jobs for classifying uploaded CSV files.
+Every job runs in its own process and reports progress through a status
+file, so web workers only store the upload and poll the status.
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from loguru import logger
+import pandas as pd
+
+from src.penguin_classifier.config import (
+    FEATURES,
+    JOB_CHUNK_SIZE,
+    JOB_RETENTION_S,
+    JOB_WORKERS,
+    JOBS_DIR,
+    NUMERICAL_FEATURES,
+    PROJ_ROOT,
+)
+from src.penguin_classifier.dataset import history_writer, save_prediction
+from src.penguin_classifier.modeling.batch import predict_csv
+
+INPUT_FILE = "input.csv"
+OUTPUT_FILE = "output.csv"
+STATUS_FILE = "status.json"
+
+# Job ids are generated by uuid4().hex; anything else is rejected
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _read_status(job_dir: Path) -> dict:
+    """Loads the status file of a job."""
+    return json.loads((job_dir / STATUS_FILE).read_text())
+
+
+def _write_status(job_dir: Path, status: dict) -> None:
+    """Atomically replaces the status file of a job."""
+    tmp_path = job_dir / f"{STATUS_FILE}.tmp"
+    tmp_path.write_text(json.dumps(status))
+    os.replace(tmp_path, job_dir / STATUS_FILE)
+
+
+def _is_running(pid: int) -> bool:
+    """Checks whether a process with the given id exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobManager:
+    """
+    Starts classification jobs for uploaded files and reports their state.
+
+    Each job lives in its own directory below ``jobs_dir`` with the upload,
+    the scored output and a ``status.json`` written by the job process.
+    Since all state is on disk, any server process can report on any job.
+    """
+
+    def __init__(
+        self, jobs_dir: Path = JOBS_DIR, retention: float = JOB_RETENTION_S
+    ):
+        self.jobs_dir = Path(jobs_dir)
+        self.retention = retention
+
+    def submit(self, filename: str, content: bytes) -> str:
+        """
+        Stores an uploaded CSV file and starts classifying it.
+
+        Args:
+            filename (str): Name of the uploaded file (for display only).
+            content (bytes): The CSV file.
+
+        Returns:
+            str: The id of the new job.
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        job_dir = self.jobs_dir / job_id
+        job_dir.mkdir(parents=True)
+        (job_dir / INPUT_FILE).write_bytes(content)
+
+        lines = content.count(b"\n") + (not content.endswith(b"\n"))
+        _write_status(
+            job_dir,
+            {
+                "id": job_id,
+                "filename": Path(filename or "upload.csv").name,
+                "state": "queued",
+                "rows_total": max(0, lines - 1),
+                "rows_done": 0,
+                "created": time.time(),
+            },
+        )
+
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.penguin_classifier.jobs", job_dir],
+            cwd=PROJ_ROOT,
+            stdin=subprocess.DEVNULL,
+        )
+        # Reap the process when it exits; the job itself reports via disk
+        threading.Thread(target=process.wait, daemon=True).start()
+        # With the pid, ``status`` notices a process that dies before it
+        # reports; a job that already started keeps its own status
+        status = _read_status(job_dir)
+        if status["state"] == "queued":
+            _write_status(job_dir, {**status, "pid": process.pid})
+        logger.info(f"Started job {job_id} for {filename} (pid {process.pid})")
+        return job_id
+
+    def status(self, job_id: str) -> dict | None:
+        """
+        Returns the current status of a job.
+
+        Args:
+            job_id (str): The id returned by ``submit``.
+
+        Returns:
+            dict | None: The status (``state`` is one of queued, running,
+                done and failed), or None for unknown jobs.
+        """
+        if not isinstance(job_id, str) or not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            status = _read_status(self.jobs_dir / job_id)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if (
+            status["state"] in ("queued", "running")
+            and "pid" in status
+            and not _is_running(status["pid"])
+        ):
+            status.update(state="failed", error="The job process exited.")
+        return status
+
+    def result_path(self, job_id: str) -> Path | None:
+        """
+        Returns the scored file of a finished job.
+
+        Args:
+            job_id (str): The id returned by ``submit``.
+
+        Returns:
+            Path | None: The output CSV, or None if the job is not done.
+        """
+        status = self.status(job_id)
+        if status is None or status["state"] != "done":
+            return None
+        return self.jobs_dir / job_id / OUTPUT_FILE
+
+    def cleanup(self) -> None:
+        """Deletes jobs that were created more than ``retention`` ago."""
+        if not self.jobs_dir.exists():
+            return
+        cutoff = time.time() - self.retention
+        for job_dir in self.jobs_dir.iterdir():
+            try:
+                if job_dir.stat().st_mtime < cutoff:
+                    shutil.rmtree(job_dir)
+            except OSError as e:
+                logger.warning(f"Could not remove job {job_dir.name}: {e}")
+
+
+def run_job(job_dir: Path) -> None:
+    """
+    Classifies the upload of a job and records progress in its status.
+
+    Valid rows are added to the prediction history chunk by chunk, so
+    finished chunks are kept even if the job fails later.
+
+    Args:
+        job_dir (Path): Directory created by ``JobManager.submit``.
+    """
+    job_dir = Path(job_dir)
+    status = _read_status(job_dir)
+    status.update(state="running", pid=os.getpid(), started=time.time())
+    _write_status(job_dir, status)
+
+    def on_chunk(scored: pd.DataFrame) -> None:
+        valid = scored[scored["predicted_species"].notna()]
+        if len(valid):
+            records = valid[FEATURES].copy()
+            records[NUMERICAL_FEATURES] = records[NUMERICAL_FEATURES].apply(
+                pd.to_numeric
+            )
+            records["species"] = valid["predicted_species"]
+            save_prediction(records)
+            history_writer.flush()
+        status["rows_done"] += len(scored)
+        _write_status(job_dir, status)
+
+    try:
+        stats = predict_csv(
+            input_path=job_dir / INPUT_FILE,
+            output_path=job_dir / OUTPUT_FILE,
+            chunk_size=JOB_CHUNK_SIZE,
+            workers=JOB_WORKERS,
+            on_chunk=on_chunk,
+        )
+        status.update(
+            state="done",
+            rows_total=stats["rows"],
+            rows_done=stats["rows"],
+            valid_rows=stats["valid_rows"],
+        )
+    except Exception as e:
+        logger.exception(f"Job {job_dir.name} failed:")
+        status.update(state="failed", error=str(e))
+    status["finished"] = time.time()
+    _write_status(job_dir, status)
+
+
+# Shared by all callbacks of this process
+job_manager = JobManager()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point used to run a job in its own process."""
+    parser = argparse.ArgumentParser(
+        description="Run a background classification job."
+    )
+    parser.add_argument(
+        "job_dir", type=Path, help="Job directory created by JobManager"
+    )
+    args = parser.parse_args(argv)
+    run_job(args.job_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Streaming batch prediction for large CSV files.
+Reads observations in chunks, scores them in worker processes and writes the
+results in input order, so memory stays bounded regardless of file size.
+"""
+
+import argparse
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+import os
+from pathlib import Path
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+from src.penguin_classifier.config import (
+    BATCH_CHUNK_SIZE,
+    BATCH_WORKERS,
+    FEATURES,
+    NUMERICAL_FEATURES,
+)
+from src.penguin_classifier.dataset import valid_feature_rows
+from src.penguin_classifier.modeling.predict import (
+    get_classes,
+    predict_species_proba,
+)
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validates one chunk and appends prediction columns to it.
+
+    Invalid rows are kept (so output lines match input lines) but get empty
+    prediction columns.
+
+    Args:
+        chunk (pd.DataFrame): Raw observations.
+
+    Returns:
+        pd.DataFrame: The chunk with ``predicted_species``, ``confidence``
+            and one ``proba_<species>`` column per class.
+    """
+    classes = get_classes()
+    valid = valid_feature_rows(chunk).to_numpy()
+    features = chunk.loc[valid, FEATURES].copy()
+    features[NUMERICAL_FEATURES] = features[NUMERICAL_FEATURES].apply(
+        pd.to_numeric
+    )
+
+    species = np.full(len(chunk), None, dtype=object)
+    probabilities = np.full((len(chunk), len(classes)), np.nan)
+    if valid.any():
+        species[valid], probabilities[valid] = predict_species_proba(features)
+
+    scored = chunk.copy()
+    scored["predicted_species"] = species
+    scored["confidence"] = probabilities.max(axis=1).round(4)
+    for index, label in enumerate(classes):
+        scored[f"proba_{label}"] = probabilities[:, index].round(4)
+    return scored
+
+
+def _score_to_csv(
+    chunk: pd.DataFrame, header: bool, keep_frame: bool
+) -> tuple[str, int, int, pd.DataFrame | None]:
+    """Worker task: scores a chunk and renders it as CSV text."""
+    scored = score_chunk(chunk)
+    text = scored.to_csv(header=header, index=False)
+    valid_rows = int(scored["predicted_species"].notna().sum())
+    return text, len(scored), valid_rows, scored if keep_frame else None
+
+
+class _InlineExecutor(Executor):
+    """Runs tasks in the calling process; used for ``workers=1``."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def predict_csv(
+    input_path: Path,
+    output_path: Path,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    workers: int | None = BATCH_WORKERS,
+    on_chunk: Callable[[pd.DataFrame], None] | None = None,
+) -> dict:
+    """
+    Scores a CSV file chunk by chunk and streams the results to disk.
+
+    At most ``2 * workers`` chunks are held in memory at any time. Results
+    are written in input order.
+
+    Args:
+        input_path (Path): CSV with at least the model's feature columns.
+        output_path (Path): Destination CSV; overwritten if it exists.
+        chunk_size (int): Rows per chunk.
+        workers (int | None): Worker processes (None = one per CPU core,
+            1 = score in the calling process).
+        on_chunk (Callable, optional): Called with every scored chunk after
+            it was written, e.g. to report progress.
+
+    Returns:
+        dict: Row counts (``rows``, ``valid_rows``) of the run.
+
+    Raises:
+        ValueError: If required feature columns are missing from the input.
+    """
+    header = pd.read_csv(input_path, nrows=0).columns
+    missing = [column for column in FEATURES if column not in header]
+    if missing:
+        raise ValueError(f"Missing columns in {input_path}: {missing}")
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+
+    # Load the model before forking so workers inherit it
+    get_classes()
+    workers = workers or os.cpu_count() or 1
+    executor = (
+        _InlineExecutor() if workers == 1 else ProcessPoolExecutor(workers)
+    )
+    max_pending = 2 * workers
+    pending: deque[Future] = deque()
+    stats = {"rows": 0, "valid_rows": 0}
+
+    def write_next(out) -> None:
+        text, rows, valid_rows, scored = pending.popleft().result()
+        out.write(text)
+        stats["rows"] += rows
+        stats["valid_rows"] += valid_rows
+        if on_chunk is not None:
+            on_chunk(scored)
+
+    # Workers render CSV text so the parent only reads, forwards and writes
+    with executor, open(tmp_path, "w", newline="") as out:
+        chunks = pd.read_csv(input_path, chunksize=chunk_size)
+        for index, chunk in enumerate(chunks):
+            pending.append(
+                executor.submit(
+                    _score_to_csv, chunk, index == 0, on_chunk is not None
+                )
+            )
+            if len(pending) >= max_pending:
+                write_next(out)
+        while pending:
+            write_next(out)
+
+        if out.tell() == 0:
+            # Empty input: still produce a file with the output header
+            score_chunk(pd.DataFrame(columns=header)).to_csv(out, index=False)
+    tmp_path.replace(output_path)
+
+    logger.success(
+        f"Scored {stats['valid_rows']}/{stats['rows']} rows "
+        f"from {input_path} into {output_path}"
+    )
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for batch prediction."""
+    parser = argparse.ArgumentParser(
+        description="Predict penguin species for every row of a CSV file."
+    )
+    parser.add_argument("input", type=Path, help="CSV file to score")
+    parser.add_argument("output", type=Path, help="Destination CSV file")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=BATCH_CHUNK_SIZE,
+        help="Rows per chunk (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=BATCH_WORKERS,
+        help="Worker processes (default: one per CPU core)",
+    )
+    args = parser.parse_args(argv)
+
+    predict_csv(
+        input_path=args.input,
+        output_path=args.output,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
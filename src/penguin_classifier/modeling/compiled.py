@@ -0,0 +1,312 @@
+"""
+Compiled NumPy inference for fitted penguin pipelines.
+Flattens the preprocessor and the linear classifier into plain arrays, so
+labels and probabilities are computed in one vectorized pass without pandas.
+"""
+
+from collections.abc import Mapping, Sequence
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+# scikit-learn and SciPy take most of the import time of the serving path;
+# they are imported once a pipeline is compiled, i.e. after unpickling one
+if TYPE_CHECKING:
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.pipeline import Pipeline
+
+# Marker for "value not seen during training" in category lookups
+_UNKNOWN = -1
+
+
+def _is_missing(value) -> bool:
+    """True for NaN-like scalars that OneHotEncoder treats as a category."""
+    if value is pd.NA:
+        return True
+    return isinstance(value, float) and math.isnan(value)
+
+
+class CompiledPipeline:
+    """
+    Array-only equivalent of a fitted ``preprocessor -> classifier`` pipeline.
+
+    Supports the layout produced by ``build_pipeline``: a ColumnTransformer
+    with a StandardScaler and a OneHotEncoder (``handle_unknown="ignore"``)
+    followed by a multiclass LogisticRegression or log-loss SGDClassifier
+    (see ``online.py``), with softmax or one-vs-rest probabilities.
+    The arithmetic mirrors scikit-learn step by step, so predictions match
+    the original pipeline.
+    """
+
+    def __init__(
+        self,
+        numerical_features: list[str],
+        mean: np.ndarray,
+        scale: np.ndarray,
+        numerical_columns: np.ndarray,
+        categorical_features: list[str],
+        category_tables: list[dict],
+        missing_indices: list[int],
+        category_offsets: np.ndarray,
+        coef: np.ndarray,
+        intercept: np.ndarray,
+        classes: np.ndarray,
+        n_columns: int,
+        ovr: bool = False,
+    ):
+        self.numerical_features = numerical_features
+        self.mean = mean
+        self.scale = scale
+        self.numerical_columns = numerical_columns
+        self.categorical_features = categorical_features
+        self.category_tables = category_tables
+        self.missing_indices = missing_indices
+        self.category_offsets = category_offsets
+        self.coef_t = np.ascontiguousarray(coef.T)
+        self.intercept = intercept
+        self.classes = classes
+        self.n_columns = n_columns
+        self.ovr = ovr
+
+    @classmethod
+    def from_pipeline(cls, pipeline: "Pipeline") -> "CompiledPipeline":
+        """
+        Extracts scaler statistics, category tables and coefficients.
+
+        Args:
+            pipeline (Pipeline): A fitted pipeline built by ``build_pipeline``.
+
+        Returns:
+            CompiledPipeline: The flattened inference engine.
+
+        Raises:
+            TypeError: If the pipeline contains steps that cannot be compiled.
+        """
+        from sklearn.compose import ColumnTransformer
+        from sklearn.linear_model import LogisticRegression, SGDClassifier
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        if len(pipeline.steps) != 2:
+            raise TypeError("Expected a 'preprocessor -> classifier' pipeline")
+        preprocessor = pipeline.steps[0][1]
+        classifier = pipeline.steps[-1][1]
+
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise TypeError("Preprocessor must be a ColumnTransformer")
+        if not isinstance(classifier, (LogisticRegression, SGDClassifier)):
+            raise TypeError(
+                f"Cannot compile classifier {type(classifier).__name__}"
+            )
+        if (
+            isinstance(classifier, SGDClassifier)
+            and classifier.loss != "log_loss"
+        ):
+            raise TypeError("Only log-loss SGD classifiers can be compiled")
+        if classifier.coef_.shape[0] == 1:
+            raise TypeError("Only multiclass classifiers can be compiled")
+
+        numerical_features, categorical_features = [], []
+        mean, scale, numerical_columns = None, None, None
+        category_tables, missing_indices, offsets = [], [], []
+
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            output = preprocessor.output_indices_[name]
+            if isinstance(transformer, StandardScaler):
+                numerical_features = list(columns)
+                n = len(numerical_features)
+                mean = (
+                    transformer.mean_ if transformer.with_mean else np.zeros(n)
+                )
+                scale = (
+                    transformer.scale_
+                    if transformer.scale_ is not None
+                    else np.ones(n)
+                )
+                numerical_columns = np.arange(output.start, output.stop)
+            elif isinstance(transformer, OneHotEncoder):
+                if transformer.drop is not None or getattr(
+                    transformer, "_infrequent_enabled", False
+                ):
+                    raise TypeError(
+                        "Dropped/infrequent categories unsupported"
+                    )
+                if transformer.handle_unknown != "ignore":
+                    raise TypeError("OneHotEncoder must ignore unknowns")
+                offset = output.start
+                for column, categories in zip(
+                    columns, transformer.categories_
+                ):
+                    table, missing = {}, _UNKNOWN
+                    for index, category in enumerate(categories):
+                        if _is_missing(category):
+                            missing = offset + index
+                        else:
+                            table[category] = offset + index
+                    categorical_features.append(column)
+                    category_tables.append(table)
+                    missing_indices.append(missing)
+                    offsets.append(offset)
+                    offset += len(categories)
+            else:
+                raise TypeError(
+                    f"Cannot compile transformer {type(transformer).__name__}"
+                )
+
+        if numerical_columns is None:
+            raise TypeError("Preprocessor has no StandardScaler")
+
+        return cls(
+            numerical_features=numerical_features,
+            mean=np.asarray(mean, dtype=np.float64),
+            scale=np.asarray(scale, dtype=np.float64),
+            numerical_columns=numerical_columns,
+            categorical_features=categorical_features,
+            category_tables=category_tables,
+            missing_indices=missing_indices,
+            category_offsets=np.asarray(offsets),
+            coef=classifier.coef_,
+            intercept=classifier.intercept_,
+            classes=classifier.classes_,
+            n_columns=sum(
+                s.stop - s.start for s in preprocessor.output_indices_.values()
+            ),
+            ovr=_uses_ovr(classifier),
+        )
+
+    def predict(
+        self, features: pd.DataFrame | Mapping | Sequence[Mapping]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts labels and class probabilities in a single pass.
+
+        Args:
+            features (pd.DataFrame | Mapping | Sequence[Mapping]): A
+                DataFrame, one record as a dict, or a list of records.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Predicted labels of shape (n,)
+                and probabilities of shape (n, n_classes).
+        """
+        encoded = self.transform(features)
+        decision = encoded @ self.coef_t + self.intercept
+        labels = self.classes[np.argmax(decision, axis=1)]
+
+        if self.ovr:
+            from scipy.special import expit
+
+            # Same steps as LinearClassifierMixin._predict_proba_lr
+            expit(decision, out=decision)
+            decision /= np.sum(decision, axis=1).reshape((-1, 1))
+            return labels, decision
+
+        # Same steps as sklearn.utils.extmath.softmax
+        decision -= np.max(decision, axis=1).reshape((-1, 1))
+        np.exp(decision, out=decision)
+        decision /= np.sum(decision, axis=1).reshape((-1, 1))
+        return labels, decision
+
+    def transform(
+        self, features: pd.DataFrame | Mapping | Sequence[Mapping]
+    ) -> np.ndarray:
+        """
+        Builds the design matrix the classifier expects.
+
+        Args:
+            features (pd.DataFrame | Mapping | Sequence[Mapping]): Raw
+                penguin observations.
+
+        Returns:
+            np.ndarray: Scaled numerical and one-hot encoded features.
+
+        Raises:
+            ValueError: If a numerical feature is missing or not finite.
+        """
+        numerical, categorical = self._columns(features)
+        if not np.isfinite(numerical).all():
+            raise ValueError("Input contains NaN or infinity.")
+
+        encoded = np.zeros((numerical.shape[0], self.n_columns))
+        numerical -= self.mean
+        numerical /= self.scale
+        encoded[:, self.numerical_columns] = numerical
+
+        rows = np.arange(numerical.shape[0])
+        for indices in categorical:
+            known = indices != _UNKNOWN
+            encoded[rows[known], indices[known]] = 1.0
+        return encoded
+
+    def _columns(self, features) -> tuple[np.ndarray, list[np.ndarray]]:
+        """Splits the input into a float matrix and output column indices."""
+        if isinstance(features, pd.DataFrame):
+            numerical = features[self.numerical_features].to_numpy(
+                dtype=np.float64, copy=True
+            )
+            categorical = [
+                self._lookup_array(
+                    features[column].to_numpy(dtype=object), position
+                )
+                for position, column in enumerate(self.categorical_features)
+            ]
+            return numerical, categorical
+
+        records = [features] if isinstance(features, Mapping) else features
+        numerical = np.array(
+            [
+                [record[column] for column in self.numerical_features]
+                for record in records
+            ],
+            dtype=np.float64,
+        ).reshape(len(records), len(self.numerical_features))
+        categorical = [
+            np.array(
+                [
+                    self._lookup(record.get(column), position)
+                    for record in records
+                ],
+                dtype=np.intp,
+            )
+            for position, column in enumerate(self.categorical_features)
+        ]
+        return numerical, categorical
+
+    def _lookup(self, value, position: int) -> int:
+        """Maps one categorical value to its one-hot output column."""
+        if value is None:
+            # sklearn does not match None against a NaN category
+            return _UNKNOWN
+        if _is_missing(value):
+            return self.missing_indices[position]
+        return self.category_tables[position].get(value, _UNKNOWN)
+
+    def _lookup_array(self, values: np.ndarray, position: int) -> np.ndarray:
+        """Vectorized ``_lookup`` for a column of a DataFrame."""
+        table = self.category_tables[position]
+        index = pd.Index(list(table.keys()), dtype=object)
+        positions = index.get_indexer(values)
+        mapped = np.where(
+            positions >= 0,
+            np.asarray(list(table.values()), dtype=np.intp)[positions],
+            _UNKNOWN,
+        )
+        missing = pd.isna(values) & (values != None)  # noqa: E711
+        mapped[missing] = self.missing_indices[position]
+        return mapped
+
+
+def _uses_ovr(classifier: "LogisticRegression | SGDClassifier") -> bool:
+    """True if the classifier computes one-vs-rest probabilities."""
+    from sklearn.linear_model import SGDClassifier
+
+    if isinstance(classifier, SGDClassifier):
+        return True
+    multi_class = getattr(classifier, "multi_class", "auto")
+    if multi_class == "deprecated":
+        multi_class = "auto"
+    return multi_class == "ovr" or (
+        multi_class == "auto" and classifier.solver == "liblinear"
+    )
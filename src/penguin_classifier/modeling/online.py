@@ -0,0 +1,347 @@
+"""
+Incremental training of the penguin classifier from verified labels.
+Keeps running scaler statistics and a partial-fit SGD classifier, so every
+update costs time proportional to the new rows, not to all data seen.
+"""
+
+import argparse
+from collections.abc import Iterator
+from dataclasses import dataclass
+import io
+import os
+from pathlib import Path
+import threading
+import time
+
+import joblib
+from loguru import logger
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from src.penguin_classifier.config import (
+    ISLAND_OPTIONS,
+    MODEL_PATH,
+    NUMERICAL_FEATURES,
+    ONLINE_ALPHA,
+    ONLINE_BATCH_SIZE,
+    ONLINE_BOOTSTRAP_EPOCHS,
+    ONLINE_MODEL_PATH,
+    ONLINE_POLL_INTERVAL_S,
+    ONLINE_PUBLISH_INTERVAL_S,
+    ONLINE_PUBLISH_ROWS,
+    ONLINE_STATE_PATH,
+    RANDOM_SEED,
+    RAW_DATA_PATH,
+    SEX_OPTIONS,
+    SPECIES,
+    VERIFIED_LABELS_PATH,
+)
+from src.penguin_classifier.dataset import load_data, split_labeled_rows
+from src.penguin_classifier.features import build_preprocessor
+from src.penguin_classifier.modeling.train import publish_model
+
+
+@dataclass
+class OnlineState:
+    """
+    Incrementally trained pipeline and its read position in the label file.
+
+    Attributes:
+        pipeline (Pipeline): ``preprocessor -> SGDClassifier`` pipeline.
+        offset (int): Bytes of the verified labels file already learned.
+        rows_seen (int): Verified rows learned so far.
+        batches (int): Mini-batches of verified rows learned so far.
+    """
+
+    pipeline: Pipeline
+    offset: int = 0
+    rows_seen: int = 0
+    batches: int = 0
+
+
+def build_online_pipeline(categories: list[list] | None = None) -> Pipeline:
+    """
+    Constructs a pipeline that can be trained one mini-batch at a time.
+
+    Categories and classes are fixed up front, so that the one-hot layout
+    and the classifier outputs never change between updates.
+
+    Args:
+        categories (list[list], optional): Categories per categorical
+            feature (default: the island and sex options of the UI).
+
+    Returns:
+        Pipeline: Unfitted scikit-learn pipeline.
+    """
+    preprocessor = build_preprocessor(
+        categories=categories
+        or [
+            [option["value"] for option in ISLAND_OPTIONS],
+            [option["value"] for option in SEX_OPTIONS],
+        ]
+    )
+    classifier = SGDClassifier(
+        loss="log_loss", alpha=ONLINE_ALPHA, random_state=RANDOM_SEED
+    )
+    return Pipeline(
+        steps=[
+            ("preprocessor", preprocessor),
+            ("classifier", classifier),
+        ]
+    )
+
+
+def partial_fit(
+    pipeline: Pipeline,
+    X: pd.DataFrame,
+    y: pd.Series,
+    update_scaler: bool = True,
+) -> None:
+    """
+    Updates an online pipeline with one mini-batch.
+
+    The scaler statistics are running means and variances over all rows
+    seen so far; the classifier takes one SGD pass over the batch.
+
+    Args:
+        pipeline (Pipeline): Pipeline built by ``build_online_pipeline``.
+        X (pd.DataFrame): Features of the batch.
+        y (pd.Series): Species of the batch.
+        update_scaler (bool): Include the batch in the scaler statistics
+            (disable when the rows were already seen in an earlier epoch).
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    if not hasattr(preprocessor, "transformers_"):
+        preprocessor.fit(X)
+    elif update_scaler:
+        scaler = preprocessor.named_transformers_["num"]
+        scaler.partial_fit(X[NUMERICAL_FEATURES])
+    pipeline.named_steps["classifier"].partial_fit(
+        preprocessor.transform(X), y, classes=SPECIES
+    )
+
+
+def read_label_batches(
+    path: Path, offset: int, batch_size: int = ONLINE_BATCH_SIZE
+) -> Iterator[tuple[pd.DataFrame, int]]:
+    """
+    Reads complete rows appended to a CSV file since ``offset``.
+
+    A trailing line without newline is still being written and is left for
+    the next read.
+
+    Args:
+        path (Path): CSV file with a header line.
+        offset (int): Bytes already consumed (0 = start of the file).
+        batch_size (int): Rows per batch.
+
+    Yields:
+        tuple[pd.DataFrame, int]: A batch and the offset just after it.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        if not header.endswith(b"\n"):
+            return
+        columns = header.decode().strip().split(",")
+        position = max(offset, len(header))
+        f.seek(position)
+        while True:
+            lines = []
+            while len(lines) < batch_size:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                lines.append(line)
+                position += len(line)
+            if not lines:
+                return
+            batch = pd.read_csv(
+                io.BytesIO(b"".join(lines)), names=columns, header=None
+            )
+            yield batch, position
+            if len(lines) < batch_size:
+                return
+
+
+def bootstrap_state(
+    epochs: int = ONLINE_BOOTSTRAP_EPOCHS,
+    batch_size: int = ONLINE_BATCH_SIZE,
+) -> OnlineState:
+    """
+    Creates the initial online model from ``RAW_DATA_PATH``.
+
+    This runs once, before any verified labels are consumed; the raw file
+    is sorted by species, so every epoch visits it in a shuffled order.
+
+    Args:
+        epochs (int): Passes over the raw data.
+        batch_size (int): Rows per mini-batch.
+
+    Returns:
+        OnlineState: A fitted pipeline positioned at the start of the
+            verified labels file.
+    """
+    X, y = split_labeled_rows(
+        load_data(filepath=RAW_DATA_PATH), classes=SPECIES
+    )
+    pipeline = build_online_pipeline()
+    rng = np.random.default_rng(RANDOM_SEED)
+    for epoch in range(epochs):
+        order = rng.permutation(len(X))
+        for start in range(0, len(order), batch_size):
+            rows = order[start : start + batch_size]
+            partial_fit(
+                pipeline, X.iloc[rows], y.iloc[rows], update_scaler=epoch == 0
+            )
+    logger.success(f"Online model bootstrapped from {len(X)} rows")
+    return OnlineState(pipeline=pipeline)
+
+
+class OnlineLearner:
+    """
+    Consumes verified labels in mini-batches and publishes the model.
+
+    The pipeline and the read position are saved together in ``state_path``
+    after every publish, so a restarted learner continues where it stopped.
+    The model is published to ``model_path``, by default a separate
+    artifact next to the tuned model; with ``MODEL_PATH`` the serving
+    processes pick it up via hot reload.
+    """
+
+    def __init__(
+        self,
+        labels_path: Path = VERIFIED_LABELS_PATH,
+        state_path: Path = ONLINE_STATE_PATH,
+        model_path: Path = ONLINE_MODEL_PATH,
+        batch_size: int = ONLINE_BATCH_SIZE,
+        publish_rows: int = ONLINE_PUBLISH_ROWS,
+        publish_interval: float = ONLINE_PUBLISH_INTERVAL_S,
+    ):
+        self.labels_path = Path(labels_path)
+        self.state_path = Path(state_path)
+        self.model_path = Path(model_path)
+        self.batch_size = batch_size
+        self.publish_rows = publish_rows
+        self.publish_interval = publish_interval
+        self.state = self._load_state()
+        self._unpublished = 0
+        self._published_at = time.monotonic()
+
+    def _load_state(self) -> OnlineState:
+        """Restores the saved state, or bootstraps a new model."""
+        if self.state_path.exists():
+            state = joblib.load(self.state_path)
+            logger.info(
+                f"Resuming online model after {state.rows_seen} rows "
+                f"(offset {state.offset})"
+            )
+            return state
+        return bootstrap_state(batch_size=self.batch_size)
+
+    def update(self) -> int:
+        """
+        Learns from all complete rows appended since the last update.
+
+        Returns:
+            int: Number of rows learned from.
+        """
+        if not self.labels_path.exists():
+            return 0
+        learned = 0
+        for batch, offset in read_label_batches(
+            self.labels_path, self.state.offset, self.batch_size
+        ):
+            X, y = split_labeled_rows(batch, classes=SPECIES)
+            if len(X):
+                partial_fit(self.state.pipeline, X, y)
+                self.state.batches += 1
+            self.state.offset = offset
+            self.state.rows_seen += len(X)
+            self._unpublished += len(X)
+            learned += len(X)
+            if self._publish_due():
+                self.publish()
+
+        if learned:
+            logger.info(f"Learned from {learned} verified rows")
+        if self._unpublished:
+            self.publish()
+        return learned
+
+    def publish(self) -> None:
+        """Writes the model for serving, then the learner state."""
+        publish_model(self.state.pipeline, self.model_path)
+        tmp_path = self.state_path.with_suffix(".joblib.tmp")
+        joblib.dump(value=self.state, filename=tmp_path)
+        os.replace(tmp_path, self.state_path)
+        self._unpublished = 0
+        self._published_at = time.monotonic()
+
+    def follow(
+        self,
+        poll_interval: float = ONLINE_POLL_INTERVAL_S,
+        stop: threading.Event | None = None,
+    ) -> None:
+        """
+        Keeps learning from new rows until ``stop`` is set.
+
+        Args:
+            poll_interval (float): Seconds between checks for new rows.
+            stop (threading.Event, optional): Ends the loop when set.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.update()
+            stop.wait(poll_interval)
+
+    def _publish_due(self) -> bool:
+        """True once enough rows or time have passed since publishing."""
+        return self._unpublished >= self.publish_rows or (
+            self._unpublished > 0
+            and time.monotonic() - self._published_at >= self.publish_interval
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for incremental training."""
+    parser = argparse.ArgumentParser(
+        description="Update the penguin classifier from verified labels."
+    )
+    parser.add_argument(
+        "--labels",
+        type=Path,
+        default=VERIFIED_LABELS_PATH,
+        help="CSV file with verified species (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep running and learn from rows as they are appended",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help=f"Publish to {MODEL_PATH.name}, replacing the tuned model "
+        f"served by the app (default: {ONLINE_MODEL_PATH.name})",
+    )
+    args = parser.parse_args(argv)
+
+    learner = OnlineLearner(
+        labels_path=args.labels,
+        model_path=MODEL_PATH if args.serve else ONLINE_MODEL_PATH,
+    )
+    if args.follow:
+        try:
+            learner.follow()
+        except KeyboardInterrupt:
+            logger.info("Stopped following verified labels")
+    else:
+        learner.update()
+        if not learner.state_path.exists():
+            learner.publish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Out-of-core training for datasets that do not fit into memory.
+Streams the CSV in chunks, splits rows by a hash of their content and fits
+an SGD classifier over several epochs, holding one shard at a time.
+"""
+
+import argparse
+import math
+from pathlib import Path
+import tempfile
+import time
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import confusion_matrix
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.penguin_classifier.config import (
+    CATEGORICAL_FEATURES,
+    FEATURES,
+    INTERIM_DATA_DIR,
+    NUMERICAL_FEATURES,
+    OOC_CHUNK_SIZE,
+    OOC_EPOCHS,
+    OOC_SHARD_BYTES,
+    RANDOM_SEED,
+    RAW_DATA_PATH,
+    TEST_SPLIT_SIZE,
+)
+from src.penguin_classifier.dataset import split_labeled_rows
+from src.penguin_classifier.modeling.online import build_online_pipeline
+from src.penguin_classifier.modeling.train import save_artifacts
+
+# Resolution of the hash-based split (TEST_SPLIT_SIZE in 1/10,000 steps)
+_SPLIT_BUCKETS = 10_000
+TEST_SHARD = "test.csv"
+
+
+def row_hashes(X: pd.DataFrame, y: pd.Series) -> np.ndarray:
+    """
+    Hashes the content of labeled rows.
+
+    The hash depends on nothing but the row values, so the split does not
+    change with the chunk size or the order of the file, and duplicates
+    always land on the same side.
+
+    Args:
+        X (pd.DataFrame): Features.
+        y (pd.Series): Species.
+
+    Returns:
+        np.ndarray: One uint64 per row.
+    """
+    rows = X[FEATURES].assign(species=y)
+    return pd.util.hash_pandas_object(rows, index=False).to_numpy()
+
+
+def is_test_row(
+    hashes: np.ndarray, test_size: float = TEST_SPLIT_SIZE
+) -> np.ndarray:
+    """
+    Assigns rows to the test split from their content hash.
+
+    Args:
+        hashes (np.ndarray): Output of ``row_hashes``.
+        test_size (float): Share of rows in the test split.
+
+    Returns:
+        np.ndarray: Boolean mask of test rows.
+    """
+    return hashes % _SPLIT_BUCKETS < round(test_size * _SPLIT_BUCKETS)
+
+
+def _classification_report(confusion: np.ndarray, classes: list[str]) -> dict:
+    """Builds ``classification_report(output_dict=True)`` from counts."""
+    true_positives = np.diag(confusion).astype(float)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.nan_to_num(true_positives / predicted)
+        recall = np.nan_to_num(true_positives / support)
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    report = {
+        label: {
+            "precision": float(precision[i]),
+            "recall": float(recall[i]),
+            "f1-score": float(f1[i]),
+            "support": float(support[i]),
+        }
+        for i, label in enumerate(classes)
+    }
+    total = support.sum()
+    report["accuracy"] = float(true_positives.sum() / max(total, 1))
+    for name, weights in (
+        ("macro avg", np.ones(len(classes))),
+        ("weighted avg", support),
+    ):
+        weights = weights / max(weights.sum(), 1)
+        report[name] = {
+            "precision": float(precision @ weights),
+            "recall": float(recall @ weights),
+            "f1-score": float(f1 @ weights),
+            "support": float(total),
+        }
+    return report
+
+
+class _ShardWriter:
+    """Appends training rows to hash-assigned CSV shards on disk."""
+
+    def __init__(self, directory: Path, n_shards: int):
+        self.paths = [
+            directory / f"train-{index:04d}.csv" for index in range(n_shards)
+        ]
+        self.test_path = directory / TEST_SHARD
+        self.rows = [0] * n_shards
+
+    def write(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        hashes: np.ndarray,
+        test: np.ndarray,
+    ) -> None:
+        """Spills one chunk, split into train shards and the test file."""
+        rows = X.assign(species=y)
+        self._append(self.test_path, rows[test])
+
+        shards = (hashes[~test] // _SPLIT_BUCKETS) % len(self.paths)
+        train = rows[~test]
+        for index in np.unique(shards):
+            part = train[shards == index]
+            self._append(self.paths[index], part)
+            self.rows[index] += len(part)
+
+    @staticmethod
+    def _append(path: Path, rows: pd.DataFrame) -> None:
+        """Appends rows to a CSV file, writing the header once."""
+        rows.to_csv(path, mode="a", header=not path.exists(), index=False)
+
+
+def _first_pass(
+    path: Path, writer: _ShardWriter, chunk_size: int
+) -> tuple[StandardScaler, list[list], list[str], dict]:
+    """Streams the source once: statistics, vocabularies and shards."""
+    scaler = StandardScaler()
+    categories = {column: set() for column in CATEGORICAL_FEATURES}
+    classes = set()
+    counts = {"rows": 0, "train_rows": 0, "test_rows": 0}
+
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        counts["rows"] += len(chunk)
+        X, y = split_labeled_rows(chunk)
+        if not len(X):
+            continue
+        hashes = row_hashes(X, y)
+        test = is_test_row(hashes)
+        writer.write(X, y, hashes, test)
+
+        train = X[~test]
+        if len(train):
+            scaler.partial_fit(train[NUMERICAL_FEATURES])
+            for column in CATEGORICAL_FEATURES:
+                categories[column].update(train[column].dropna().unique())
+            classes.update(y[~test].unique())
+        counts["train_rows"] += len(train)
+        counts["test_rows"] += int(test.sum())
+
+    if not counts["train_rows"]:
+        raise ValueError(f"No labeled training rows in {path}")
+    return (
+        scaler,
+        [sorted(categories[column]) for column in CATEGORICAL_FEATURES],
+        sorted(classes),
+        counts,
+    )
+
+
+def _fitted_preprocessor(
+    pipeline: Pipeline, scaler: StandardScaler, sample: pd.DataFrame
+) -> ColumnTransformer:
+    """Fits the pipeline's preprocessor with the streamed statistics."""
+    preprocessor = pipeline.named_steps["preprocessor"]
+    # Fitting on a sample sets up the column layout; the encoder uses the
+    # fixed vocabularies and the scaler is replaced by the one that saw
+    # the whole training split
+    preprocessor.fit(sample)
+    name, _, columns = preprocessor.transformers_[0]
+    preprocessor.transformers_[0] = (name, scaler, columns)
+    return preprocessor
+
+
+def train_out_of_core(
+    path: Path = RAW_DATA_PATH,
+    chunk_size: int = OOC_CHUNK_SIZE,
+    epochs: int = OOC_EPOCHS,
+    shard_bytes: int = OOC_SHARD_BYTES,
+) -> tuple[Pipeline, dict]:
+    """
+    Trains and evaluates a classifier without loading the whole file.
+
+    The first pass accumulates scaler statistics, categories and classes of
+    the training split and spills its rows to shards on disk. Every epoch
+    then visits the shards in a random order, shuffles the rows of one
+    shard in memory and updates the SGD classifier; peak memory is bounded
+    by ``chunk_size`` and ``shard_bytes``, not by the size of the file.
+
+    Args:
+        path (Path): CSV file with the raw data columns.
+        chunk_size (int): Rows parsed at a time.
+        epochs (int): Passes of the classifier over the training split.
+        shard_bytes (int): Approximate source bytes per shard.
+
+    Returns:
+        tuple[Pipeline, dict]: The fitted pipeline and the test report,
+            which includes a summary of the run under ``out_of_core``.
+    """
+    start = time.perf_counter()
+    n_shards = max(1, math.ceil(Path(path).stat().st_size / shard_bytes))
+    INTERIM_DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=INTERIM_DATA_DIR) as spill_dir:
+        writer = _ShardWriter(Path(spill_dir), n_shards)
+        scaler, categories, classes, counts = _first_pass(
+            path, writer, chunk_size
+        )
+        logger.info(
+            f"Streamed {counts['rows']} rows into {n_shards} shards "
+            f"({counts['train_rows']} train, {counts['test_rows']} test)"
+        )
+        first_pass = time.perf_counter() - start
+
+        pipeline = build_online_pipeline(categories=categories)
+        classifier = pipeline.named_steps["classifier"]
+        preprocessor = None
+        rng = np.random.default_rng(RANDOM_SEED)
+        for epoch in range(epochs):
+            for index in rng.permutation(n_shards):
+                if not writer.rows[index]:
+                    continue
+                shard = pd.read_csv(writer.paths[index])
+                shard = shard.iloc[rng.permutation(len(shard))]
+                if preprocessor is None:
+                    preprocessor = _fitted_preprocessor(
+                        pipeline, scaler, shard[FEATURES]
+                    )
+                classifier.partial_fit(
+                    preprocessor.transform(shard[FEATURES]),
+                    shard["species"],
+                    classes=classes,
+                )
+            logger.info(f"Epoch {epoch + 1}/{epochs} done")
+        fit = time.perf_counter() - start - first_pass
+
+        confusion = np.zeros((len(classes), len(classes)), dtype=np.int64)
+        if writer.test_path.exists():
+            for chunk in pd.read_csv(writer.test_path, chunksize=chunk_size):
+                confusion += confusion_matrix(
+                    chunk["species"],
+                    pipeline.predict(chunk[FEATURES]),
+                    labels=classes,
+                )
+
+    metrics = _classification_report(confusion, classes)
+    metrics["out_of_core"] = {
+        **counts,
+        "shards": n_shards,
+        "chunk_size": chunk_size,
+        "epochs": epochs,
+        "timings_s": {
+            "first_pass": round(first_pass, 4),
+            "fit": round(fit, 4),
+            "total": round(time.perf_counter() - start, 4),
+        },
+    }
+    logger.success(f"Test accuracy: {metrics['accuracy']:.2%}")
+    return pipeline, metrics
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for out-of-core training."""
+    parser = argparse.ArgumentParser(
+        description="Train the penguin classifier on a CSV of any size."
+    )
+    parser.add_argument(
+        "input",
+        type=Path,
+        nargs="?",
+        default=RAW_DATA_PATH,
+        help="CSV file with labeled penguins (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=OOC_CHUNK_SIZE,
+        help="Rows parsed at a time (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--epochs",
+        type=int,
+        default=OOC_EPOCHS,
+        help="Passes over the training split (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--shard-bytes",
+        type=int,
+        default=OOC_SHARD_BYTES,
+        help="Approximate size of the shards held in memory",
+    )
+    args = parser.parse_args(argv)
+
+    pipeline, metrics = train_out_of_core(
+        path=args.input,
+        chunk_size=args.chunk_size,
+        epochs=args.epochs,
+        shard_bytes=args.shard_bytes,
+    )
+    save_artifacts(pipeline=pipeline, metrics=metrics, cv_score=None)
+
+
+if __name__ == "__main__":
+    main()
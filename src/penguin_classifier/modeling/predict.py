@@ -2,20 +2,38 @@
 Logic for loading the trained model and performing predictions.
 """
 
+from dataclasses import dataclass
+import hashlib
+import io
+import os
+from pathlib import Path
+import threading
+import time
+from typing import TYPE_CHECKING
+
 import joblib
+from loguru import logger
 import numpy as np
 import pandas as pd
-from sklearn.pipeline import Pipeline
 
-from src.penguin_classifier.config import MODEL_PATH
+from src.penguin_classifier.config import (
+    MODEL_PATH,
+    MODEL_RELOAD_CHECK_INTERVAL,
+)
+from src.penguin_classifier.modeling.compiled import CompiledPipeline
+from src.penguin_classifier.monitoring import count_predictions, timed
+
+# scikit-learn is imported when the first model is unpickled
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
 
 
-def _load_pipeline(path: str) -> Pipeline:
+def _load_pipeline(path: str | io.BytesIO) -> "Pipeline":
     """
     Loads a trained scikit-learn pipeline from a joblib file.
 
     Args:
-        path (str): File path to the saved pipeline.
+        path (str | io.BytesIO): File path or buffer of the saved pipeline.
 
     Returns:
         Pipeline: The loaded scikit-learn Pipeline object.
@@ -23,8 +41,215 @@ def _load_pipeline(path: str) -> Pipeline:
     return joblib.load(path)
 
 
+def _file_digest(path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """
+    Immutable snapshot of a pipeline together with the artifact it came from.
+
+    Attributes:
+        pipeline (Pipeline): The unpickled scikit-learn pipeline.
+        digest (str): SHA-256 of the artifact content.
+        mtime_ns (int): Modification time of the artifact when it was read.
+        size (int): Size of the artifact in bytes when it was read.
+        compiled (CompiledPipeline | None): NumPy fast path, or None if the
+            pipeline layout is not supported by the compiler.
+    """
+
+    pipeline: "Pipeline"
+    digest: str
+    mtime_ns: int
+    size: int
+    compiled: CompiledPipeline | None = None
+
+    def predict(self, features) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts labels and class probabilities in one pass.
+
+        Uses the compiled engine when available and falls back to the
+        scikit-learn pipeline otherwise.
+
+        Args:
+            features: A DataFrame, a single record dict or a list of records.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Labels and probability matrix.
+        """
+        if self.compiled is not None:
+            return self.compiled.predict(features)
+
+        if not isinstance(features, pd.DataFrame):
+            features = pd.DataFrame(
+                [features] if isinstance(features, dict) else features
+            )
+        probabilities = self.pipeline.predict_proba(X=features)
+        classes = self.pipeline.classes_
+        return classes[np.argmax(probabilities, axis=1)], probabilities
+
+
+class ModelHolder:
+    """
+    Process-wide cache for the trained pipeline with hot reloading.
+
+    The artifact is unpickled once and kept in memory. At most every
+    ``check_interval`` seconds, a background thread compares the file's
+    mtime and size with the loaded snapshot and, if they differ, its
+    content hash. A changed artifact is loaded off the request path and
+    swapped in with a single reference assignment, so in-flight
+    predictions keep using the snapshot they already hold.
+    """
+
+    def __init__(
+        self,
+        path: Path = MODEL_PATH,
+        check_interval: float = MODEL_RELOAD_CHECK_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._current: LoadedModel | None = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> LoadedModel:
+        """
+        Returns the current model snapshot, loading it on first use.
+
+        Returns:
+            LoadedModel: The most recently loaded pipeline snapshot.
+        """
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self._load()
+                    self._last_check = time.monotonic()
+            return self._current
+
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self._schedule_refresh()
+        return current
+
+    @property
+    def current(self) -> LoadedModel | None:
+        """The loaded snapshot, without loading or checking the artifact."""
+        return self._current
+
+    def after_fork(self) -> None:
+        """
+        Gives a forked child process its own lock.
+
+        A background refresh of the parent may hold the lock at the time of
+        the fork; in the child, no thread would ever release it.
+        """
+        self._lock = threading.Lock()
+
+    def reload(self) -> bool:
+        """
+        Synchronously checks the artifact and swaps in a changed pipeline.
+
+        Returns:
+            bool: True if a new pipeline was loaded.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _schedule_refresh(self) -> None:
+        """Starts a background refresh unless one is already running."""
+        if not self._lock.acquire(blocking=False):
+            return
+        self._last_check = time.monotonic()
+
+        def _run():
+            try:
+                self._refresh()
+            except Exception:
+                logger.exception(f"Could not reload model from {self.path}")
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=_run, name="model-reload", daemon=True).start()
+
+    def _refresh(self) -> bool:
+        """Reloads the artifact if it changed. Caller must hold the lock."""
+        self._last_check = time.monotonic()
+        current = self._current
+        if current is None:
+            self._current = self._load()
+            return True
+
+        stat = self.path.stat()
+        if (stat.st_mtime_ns, stat.st_size) == (
+            current.mtime_ns,
+            current.size,
+        ):
+            return False
+
+        digest = _file_digest(self.path)
+        if digest == current.digest:
+            # Touched but identical content: remember the new stat only
+            self._current = LoadedModel(
+                pipeline=current.pipeline,
+                digest=digest,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                compiled=current.compiled,
+            )
+            return False
+
+        self._current = self._load()
+        logger.success(f"Reloaded model from {self.path}")
+        return True
+
+    @timed("model_load")
+    def _load(self) -> LoadedModel:
+        """Reads, hashes and unpickles the artifact from a single read."""
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        pipeline = _load_pipeline(io.BytesIO(content))
+        return LoadedModel(
+            pipeline=pipeline,
+            digest=digest,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            compiled=_compile(pipeline),
+        )
+
+
+def _compile(pipeline: "Pipeline") -> CompiledPipeline | None:
+    """Builds the NumPy fast path, or returns None if unsupported."""
+    try:
+        return CompiledPipeline.from_pipeline(pipeline)
+    except (AttributeError, TypeError) as e:
+        logger.warning(f"Using scikit-learn inference path: {e}")
+        return None
+
+
+# Shared by every request handled in this process
+model_holder = ModelHolder(MODEL_PATH)
+
+
+def get_pipeline() -> "Pipeline":
+    """
+    Returns the in-memory pipeline, loading or reloading it as needed.
+
+    Returns:
+        Pipeline: The currently active model pipeline.
+    """
+    return model_holder.get().pipeline
+
+
 def predict_batch_species(
-    features: pd.DataFrame, pipeline: Pipeline
+    features: pd.DataFrame, pipeline: "Pipeline"
 ) -> list[str]:
     """
     Predicts species for a collection of penguin observations.
@@ -39,23 +264,67 @@ def predict_batch_species(
     return pipeline.predict(X=features)
 
 
-def predict_single_penguin_proba(features: pd.DataFrame) -> tuple[str, float]:
+def predict_species_proba(features) -> tuple[np.ndarray, np.ndarray]:
     """
-    Predicts species and confidence score for a single penguin.
+    Predicts species and class probabilities with the in-memory model.
 
     Args:
-        features (pd.DataFrame): A single-row DataFrame with penguin features.
+        features: A DataFrame, a single record dict or a list of records.
 
     Returns:
-        tuple[str, float]: Predicted species name and the highest probability score.
+        tuple[np.ndarray, np.ndarray]: Predicted species per observation and
+            the probability matrix (columns ordered like ``get_classes()``).
+    """
+    species, probabilities, _ = predict_species_proba_with_classes(features)
+    return species, probabilities
+
+
+def predict_species_proba_with_classes(
+    features,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    pipeline = _load_pipeline(MODEL_PATH)
-    predicted_species = pipeline.predict(X=features)[0]
+    Predicts like ``predict_species_proba`` and returns the class labels.
 
-    all_probabilities = pipeline.predict_proba(X=features)
-    max_confidence = np.max(all_probabilities).round(4)
+    Labels and probabilities come from the same model snapshot, so they
+    match even if the model is reloaded in between.
+
+    Args:
+        features: A DataFrame, a single record dict or a list of records.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Predicted species, the
+            probability matrix and the species label of each column.
+    """
+    model = model_holder.get()
+    with timed("model_predict"):
+        species, probabilities = model.predict(features)
+    count_predictions(species)
+    return species, probabilities, model.pipeline.classes_
+
+
+def get_classes() -> np.ndarray:
+    """Returns the species labels known to the active model."""
+    return model_holder.get().pipeline.classes_
+
+
+def predict_single_penguin_proba(
+    features: pd.DataFrame | dict,
+) -> tuple[str, float]:
+    """
+    Predicts species and confidence score for a single penguin.
+
+    Args:
+        features (pd.DataFrame | dict): A single-row DataFrame or a record
+            dict with penguin features.
+
+    Returns:
+        tuple[str, float]: Predicted species name and the highest
+            probability score.
+    """
+    species, probabilities = predict_species_proba(features)
+    max_confidence = np.max(probabilities[0]).round(4)
 
-    return predicted_species, max_confidence
+    return species[0], max_confidence
 
 
 if __name__ == "__main__":
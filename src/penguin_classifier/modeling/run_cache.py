@@ -0,0 +1,166 @@
+"""
+Content-addressed cache of training runs.
+A run is identified by everything that determines its outcome, so an
+unchanged run can reuse the stored model and metrics instead of retraining.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import platform
+import shutil
+import uuid
+
+import joblib
+from loguru import logger
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.penguin_classifier.config import (
+    CATEGORICAL_FEATURES,
+    NUMERICAL_FEATURES,
+    RANDOM_SEED,
+    RUN_CACHE_DIR,
+    RUN_CACHE_MAX_ENTRIES,
+    SEARCH_CV_FOLDS,
+    TEST_SPLIT_SIZE,
+)
+
+# Bump when the training code changes in a way that alters its results
+_FORMAT_VERSION = 1
+
+MODEL_FILE = "pipeline.joblib"
+METRICS_FILE = "metrics.json"
+
+
+def run_cache_key(df_cleaned: pd.DataFrame, settings: dict) -> str:
+    """
+    Computes the cache key of a training run.
+
+    Args:
+        df_cleaned (pd.DataFrame): The cleaned training data.
+        settings (dict): JSON-serializable run settings, e.g. the parameter
+            grid and the search strategy.
+
+    Returns:
+        str: SHA-256 hex digest over data, configuration and versions.
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        pd.util.hash_pandas_object(df_cleaned, index=False)
+        .to_numpy()
+        .tobytes()
+    )
+    context = {
+        "format": _FORMAT_VERSION,
+        "columns": [
+            [column, str(dtype)] for column, dtype in df_cleaned.dtypes.items()
+        ],
+        "features": {
+            "numerical": NUMERICAL_FEATURES,
+            "categorical": CATEGORICAL_FEATURES,
+        },
+        "random_seed": RANDOM_SEED,
+        "test_split_size": TEST_SPLIT_SIZE,
+        "cv_folds": SEARCH_CV_FOLDS,
+        "settings": settings,
+        "versions": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scikit-learn": sklearn.__version__,
+            "joblib": joblib.__version__,
+        },
+    }
+    digest.update(json.dumps(context, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _install(source: Path, target: Path) -> None:
+    """Copies a file next to ``target`` and renames it into place."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+class RunCache:
+    """
+    Model artifacts and metrics of past training runs, keyed by run.
+
+    Every entry is a directory named after the ``run_cache_key`` holding
+    the pipeline and its metrics. Entries are written to a temporary
+    directory and renamed, so readers never see incomplete entries. The
+    least recently used entries are removed beyond ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = RUN_CACHE_DIR,
+        max_entries: int = RUN_CACHE_MAX_ENTRIES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def restore(self, key: str, model_path: Path, metrics_path: Path) -> bool:
+        """
+        Copies the artifacts of a cached run to their serving locations.
+
+        Args:
+            key (str): Output of ``run_cache_key``.
+            model_path (Path): Where to place the pipeline.
+            metrics_path (Path): Where to place the metrics.
+
+        Returns:
+            bool: True on a cache hit.
+        """
+        entry = self.cache_dir / key
+        if not (entry / MODEL_FILE).exists():
+            return False
+        _install(entry / METRICS_FILE, metrics_path)
+        _install(entry / MODEL_FILE, model_path)
+        os.utime(entry)  # Mark as recently used
+        return True
+
+    def store(self, key: str, model_path: Path, metrics_path: Path) -> None:
+        """
+        Adds the artifacts of a finished run to the cache.
+
+        Args:
+            key (str): Output of ``run_cache_key``.
+            model_path (Path): The saved pipeline.
+            metrics_path (Path): The saved metrics.
+        """
+        entry = self.cache_dir / key
+        if entry.exists():
+            return
+        tmp_dir = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp_dir.mkdir(parents=True)
+        shutil.copyfile(model_path, tmp_dir / MODEL_FILE)
+        shutil.copyfile(metrics_path, tmp_dir / METRICS_FILE)
+        try:
+            os.replace(tmp_dir, entry)
+        except OSError:  # Stored concurrently by another run
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.prune()
+
+    def prune(self) -> None:
+        """Removes the least recently used entries beyond the limit."""
+        entries = sorted(
+            (
+                p
+                for p in self.cache_dir.iterdir()
+                if not p.name.startswith(".")
+            ),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in entries[self.max_entries :]:
+            shutil.rmtree(entry, ignore_errors=True)
+            logger.info(f"Evicted cached run {entry.name[:12]}")
+
+
+# Shared by all training runs of this process
+run_cache = RunCache()
@@ -0,0 +1,428 @@
+"""
+Hyperparameter search for the classification pipeline.
+Preprocesses every cross-validation fold once, fits the regularization
+strengths of each configuration as one warm-started path and runs the
+selected search strategy within a time or compute budget.
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
+import math
+import time
+
+from joblib import Parallel, delayed, effective_n_jobs
+from loguru import logger
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+from sklearn.pipeline import Pipeline
+
+from src.penguin_classifier.config import RANDOM_SEED
+from src.penguin_classifier.features import build_preprocessor
+
+# Only the classifier is tuned; the preprocessor has no hyperparameters
+_PREFIX = "classifier__"
+_C = f"{_PREFIX}C"
+
+
+@dataclass
+class FoldData:
+    """Preprocessed training and validation matrices of one CV fold."""
+
+    X_train: np.ndarray
+    y_train: np.ndarray
+    X_val: np.ndarray
+    y_val: np.ndarray
+
+
+@dataclass(frozen=True)
+class SearchBudget:
+    """
+    Limits for a hyperparameter search; None means unlimited.
+
+    The budget is checked between batches of fits, so a search can exceed
+    it by at most one batch (one C path per worker).
+
+    Attributes:
+        max_seconds (float | None): Wall-clock limit for cross-validation.
+        max_fits (int | None): Limit for the number of model fits.
+    """
+
+    max_seconds: float | None = None
+    max_fits: int | None = None
+
+
+@dataclass
+class SearchResult:
+    """
+    Outcome of a hyperparameter search.
+
+    Attributes:
+        best_params (dict): Pipeline parameters of the best candidate.
+        best_score (float): Its mean cross-validation accuracy.
+        candidates (list[dict]): ``params``, ``mean_score``, ``std_score``
+            and ``folds`` of every evaluated candidate, in grid order.
+        timings (dict): Seconds spent per stage. ``preprocess``, ``fit`` and
+            ``score`` are summed over all folds and workers; ``cv`` is the
+            wall-clock time of the whole cross-validation.
+        fits (int): Number of model fits.
+        stopped_early (bool): Whether the budget ended the search.
+    """
+
+    best_params: dict
+    best_score: float
+    candidates: list[dict]
+    timings: dict
+    fits: int = 0
+    stopped_early: bool = False
+
+
+def _prepare_fold(
+    X: pd.DataFrame, y: np.ndarray, train_idx: np.ndarray, val_idx: np.ndarray
+) -> tuple[FoldData, float]:
+    """Fits the preprocessor on one training fold and transforms it once."""
+    start = time.perf_counter()
+    preprocessor = build_preprocessor()
+    fold = FoldData(
+        X_train=preprocessor.fit_transform(X.iloc[train_idx]),
+        y_train=y[train_idx],
+        X_val=preprocessor.transform(X.iloc[val_idx]),
+        y_val=y[val_idx],
+    )
+    return fold, time.perf_counter() - start
+
+
+def _fit_path(
+    classifier, fold: FoldData, C_values: list[float]
+) -> tuple[list[float], float, float]:
+    """
+    Fits ``classifier`` for increasing C, each fit starting from the last.
+
+    Returns:
+        tuple[list[float], float, float]: Validation accuracy per C value
+            (in the order of ``C_values``), fit and scoring seconds.
+    """
+    classifier = clone(classifier).set_params(warm_start=True)
+    scores = {}
+    fit_time = score_time = 0.0
+    # Strong to weak regularization: each solution is close to the next
+    for C in sorted(set(C_values)):
+        start = time.perf_counter()
+        classifier.set_params(C=C).fit(fold.X_train, fold.y_train)
+        fit_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores[C] = classifier.score(fold.X_val, fold.y_val)
+        score_time += time.perf_counter() - start
+    return [scores[C] for C in C_values], fit_time, score_time
+
+
+class CandidateEvaluator:
+    """
+    Scores candidates on preprocessed folds on behalf of a strategy.
+
+    Candidates that differ only in ``classifier__C`` share one warm-started
+    path per fold. Scores are kept, so asking for a fold again is free.
+    """
+
+    def __init__(
+        self,
+        classifier,
+        candidates: list[dict],
+        folds: list[FoldData],
+        parallel: Parallel,
+        budget: SearchBudget,
+    ):
+        self.classifier = classifier
+        self.candidates = candidates
+        self.folds = folds
+        self.parallel = parallel
+        self.budget = budget
+        self.scores: list[dict[int, float]] = [{} for _ in candidates]
+        self.fits = 0
+        self.timings = {"fit": 0.0, "score": 0.0}
+        self.stopped_early = False
+        self._batch_size = max(1, effective_n_jobs(parallel.n_jobs))
+        self._start = time.perf_counter()
+
+    def exhausted(self) -> bool:
+        """Checks whether the budget is used up."""
+        budget = self.budget
+        elapsed = time.perf_counter() - self._start
+        return (
+            budget.max_seconds is not None and elapsed >= budget.max_seconds
+        ) or (budget.max_fits is not None and self.fits >= budget.max_fits)
+
+    def evaluate(self, candidates: list[int], folds: list[int]) -> bool:
+        """
+        Scores candidates on folds, within the budget.
+
+        Args:
+            candidates (list[int]): Indices into ``self.candidates``.
+            folds (list[int]): Indices into ``self.folds``.
+
+        Returns:
+            bool: False if the budget ran out before all scores were known.
+        """
+        # Group candidates into C paths by their other parameters
+        paths: dict[tuple, list[int]] = {}
+        for index in candidates:
+            params = self.candidates[index]
+            key = tuple(sorted((k, v) for k, v in params.items() if k != _C))
+            paths.setdefault(key, []).append(index)
+
+        tasks = []
+        for key, members in paths.items():
+            estimator = clone(self.classifier).set_params(
+                **{name[len(_PREFIX) :]: value for name, value in key}
+            )
+            C_values = [
+                self.candidates[i].get(_C, estimator.get_params()["C"])
+                for i in members
+            ]
+            for fold in folds:
+                if any(fold not in self.scores[i] for i in members):
+                    tasks.append((members, fold, estimator, C_values))
+
+        for start in range(0, len(tasks), self._batch_size):
+            # At least one batch always runs, so there is a result
+            if self.fits and self.exhausted():
+                self.stopped_early = True
+                return False
+            batch = tasks[start : start + self._batch_size]
+            results = self.parallel(
+                delayed(_fit_path)(estimator, self.folds[fold], C_values)
+                for _, fold, estimator, C_values in batch
+            )
+            for (members, fold, _, C_values), result in zip(batch, results):
+                path_scores, fit_time, score_time = result
+                for index, score in zip(members, path_scores):
+                    self.scores[index][fold] = score
+                self.fits += len(set(C_values))
+                self.timings["fit"] += fit_time
+                self.timings["score"] += score_time
+        return True
+
+    def mean_score(self, index: int) -> float:
+        """Mean accuracy of a candidate over the folds scored so far."""
+        scores = self.scores[index]
+        return float(np.mean(list(scores.values()))) if scores else -np.inf
+
+
+class SearchStrategy(ABC):
+    """
+    Base class of search strategies.
+
+    A strategy chooses the candidates from the parameter grid and decides
+    which of them are scored on which folds. Subclasses implement ``run``.
+    """
+
+    name = "base"
+
+    def candidates(self, param_grid: dict) -> list[dict]:
+        """Returns all combinations in ``GridSearchCV`` order."""
+        return list(ParameterGrid(param_grid))
+
+    @abstractmethod
+    def run(self, evaluator: CandidateEvaluator) -> None:
+        """Scores candidates through ``evaluator`` until done."""
+
+    def describe(self) -> dict:
+        """Returns the strategy settings for the metrics report."""
+        return {"name": self.name, **vars(self)}
+
+
+class GridStrategy(SearchStrategy):
+    """Exhaustive search: every candidate on every fold."""
+
+    name = "grid"
+
+    def run(self, evaluator: CandidateEvaluator) -> None:
+        """Scores all candidates until done or out of budget."""
+        evaluator.evaluate(
+            list(range(len(evaluator.candidates))),
+            list(range(len(evaluator.folds))),
+        )
+
+
+class RandomStrategy(GridStrategy):
+    """Randomized search: a fixed-size random sample of the grid."""
+
+    name = "random"
+
+    def __init__(self, n_candidates: int = 10, seed: int = RANDOM_SEED):
+        self.n_candidates = n_candidates
+        self.seed = seed
+
+    def candidates(self, param_grid: dict) -> list[dict]:
+        """Samples up to ``n_candidates`` distinct combinations."""
+        grid = super().candidates(param_grid)
+        size = min(self.n_candidates, len(grid))
+        sampled = ParameterSampler(param_grid, size, random_state=self.seed)
+        # Grid order keeps tie breaking independent of the sampling order
+        return sorted(sampled, key=grid.index)
+
+
+class HalvingStrategy(SearchStrategy):
+    """
+    Successive halving with CV folds as the resource.
+
+    All candidates are scored on a few folds; only the best ``1 / factor``
+    continue to the next round, which uses ``factor`` times as many folds,
+    until the survivors are scored on all folds. Unpromising candidates are
+    dropped after cheap evaluations, so the cost grows sublinearly with the
+    size of the grid.
+    """
+
+    name = "halving"
+
+    def __init__(self, factor: int = 3, min_folds: int = 1):
+        self.factor = factor
+        self.min_folds = min_folds
+
+    def rounds(self, n_folds: int) -> Iterator[int]:
+        """Yields the number of folds used in each round."""
+        folds = max(1, min(self.min_folds, n_folds))
+        while folds < n_folds:
+            yield folds
+            folds *= self.factor
+        yield n_folds
+
+    def run(self, evaluator: CandidateEvaluator) -> None:
+        """Runs halving rounds until the final round or the budget ends."""
+        survivors = list(range(len(evaluator.candidates)))
+        for folds in self.rounds(len(evaluator.folds)):
+            logger.info(f"Halving: {len(survivors)} candidates, {folds} folds")
+            if not evaluator.evaluate(survivors, list(range(folds))):
+                return
+            keep = max(1, math.ceil(len(survivors) / self.factor))
+            # Stable sort: of equal candidates the earlier one survives
+            ranked = sorted(survivors, key=evaluator.mean_score, reverse=True)
+            survivors = sorted(ranked[:keep])
+
+
+# Available strategies by name; add an entry to plug in another one
+SEARCH_STRATEGIES: dict[str, type[SearchStrategy]] = {
+    "grid": GridStrategy,
+    "random": RandomStrategy,
+    "halving": HalvingStrategy,
+}
+
+
+def run_search(
+    pipeline: Pipeline,
+    param_grid: dict,
+    X: pd.DataFrame,
+    y: pd.Series,
+    cv,
+    strategy: SearchStrategy | None = None,
+    budget: SearchBudget = SearchBudget(),
+    n_jobs: int = -1,
+) -> SearchResult:
+    """
+    Cross-validated hyperparameter search with cached fold preprocessing.
+
+    Each fold is preprocessed once, and candidates that differ only in
+    ``classifier__C`` are fitted as one regularization path seeded with the
+    previous coefficients. The strategy decides which candidates are scored
+    on which folds. The best candidate is the one with the highest mean
+    accuracy among those scored on the most folds; ties go to the earlier
+    candidate in grid order, like in ``GridSearchCV``.
+
+    Args:
+        pipeline (Pipeline): Unfitted pipeline from ``build_pipeline``.
+        param_grid (dict): Candidate values per ``classifier__*`` parameter.
+        X (pd.DataFrame): Training features.
+        y (pd.Series): Training labels.
+        cv: Cross-validation splitter (e.g. ``StratifiedKFold``).
+        strategy (SearchStrategy, optional): How candidates are chosen and
+            scored (default: exhaustive ``GridStrategy``).
+        budget (SearchBudget): Time and fit limits for cross-validation.
+        n_jobs (int): Parallel workers (-1 = all CPU cores).
+
+    Returns:
+        SearchResult: Scores of the evaluated candidates and run statistics.
+
+    Raises:
+        ValueError: If the grid contains parameters of other steps.
+    """
+    unsupported = [key for key in param_grid if not key.startswith(_PREFIX)]
+    if unsupported:
+        raise ValueError(
+            f"Only classifier parameters can be searched: {unsupported}"
+        )
+
+    strategy = strategy or GridStrategy()
+    start = time.perf_counter()
+    y = np.asarray(y)
+    candidates = strategy.candidates(param_grid)
+    splits = list(cv.split(X, y))
+    logger.info(
+        f"{strategy.name} search: {len(candidates)} candidates, "
+        f"{len(splits)} folds, {budget}"
+    )
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        prepared = parallel(
+            delayed(_prepare_fold)(X, y, train_idx, val_idx)
+            for train_idx, val_idx in splits
+        )
+        evaluator = CandidateEvaluator(
+            classifier=pipeline.named_steps["classifier"],
+            candidates=candidates,
+            folds=[fold for fold, _ in prepared],
+            parallel=parallel,
+            budget=budget,
+        )
+        strategy.run(evaluator)
+
+    results = [
+        {
+            "params": params,
+            "mean_score": evaluator.mean_score(index),
+            "std_score": float(np.std(list(evaluator.scores[index].values()))),
+            "folds": len(evaluator.scores[index]),
+        }
+        for index, params in enumerate(candidates)
+        if evaluator.scores[index]
+    ]
+    # max() keeps the first of equal candidates
+    best = max(results, key=lambda r: (r["folds"], r["mean_score"]))
+    if evaluator.stopped_early:
+        logger.warning(
+            f"Search budget exhausted after {evaluator.fits} fits; "
+            f"{len(results)}/{len(candidates)} candidates evaluated"
+        )
+
+    timings = {
+        "preprocess": sum(seconds for _, seconds in prepared),
+        **evaluator.timings,
+        "cv": time.perf_counter() - start,
+    }
+    return SearchResult(
+        best_params=best["params"],
+        best_score=best["mean_score"],
+        candidates=results,
+        timings=timings,
+        fits=evaluator.fits,
+        stopped_early=evaluator.stopped_early,
+    )
+
+
+def warm_path_search(
+    pipeline: Pipeline,
+    param_grid: dict,
+    X: pd.DataFrame,
+    y: pd.Series,
+    cv,
+    n_jobs: int = -1,
+) -> SearchResult:
+    """
+    Exhaustive search over ``param_grid``; see ``run_search``.
+
+    Equivalent to ``GridSearchCV`` with accuracy scoring for grids over
+    classifier parameters.
+    """
+    return run_search(pipeline, param_grid, X, y, cv, n_jobs=n_jobs)
@@ -2,7 +2,11 @@
 Training module for the Penguin Classifier.
 Orchestrates data loading, preprocessing, model training, and evaluation.
 """
+import argparse
 import json
+import os
+from pathlib import Path
+import time
 import warnings
 
 import joblib
@@ -11,7 +15,7 @@ from loguru import logger
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
 from sklearn.model_selection import (
-    GridSearchCV,
+    ParameterGrid,
     StratifiedKFold,
     train_test_split,
 )
@@ -20,8 +24,15 @@ from sklearn.pipeline import Pipeline
 from src.penguin_classifier.config import (
     METRICS_PATH,
     MODEL_PATH,
+    PARAM_GRID,
     RANDOM_SEED,
     RAW_DATA_PATH,
+    SEARCH_CV_FOLDS,
+    SEARCH_HALVING_FACTOR,
+    SEARCH_MAX_FITS,
+    SEARCH_MAX_SECONDS,
+    SEARCH_RANDOM_CANDIDATES,
+    SEARCH_STRATEGY,
     TEST_SPLIT_SIZE,
 )
 from src.penguin_classifier.dataset import (
@@ -30,6 +41,18 @@ from src.penguin_classifier.dataset import (
     split_feature_from_target,
 )
 from src.penguin_classifier.features import build_preprocessor
+from src.penguin_classifier.modeling.run_cache import (
+    run_cache,
+    run_cache_key,
+)
+from src.penguin_classifier.modeling.search import (
+    HalvingStrategy,
+    RandomStrategy,
+    SEARCH_STRATEGIES,
+    SearchBudget,
+    SearchStrategy,
+    run_search,
+)
 
 # Suppress annoying warning from pkg_resources
 warnings.filterwarnings("ignore", category=UserWarning, module="pkg_resources")
@@ -57,15 +80,22 @@ def build_pipeline() -> Pipeline:
     )
 
 
-def load_and_split_data() -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+def load_and_split_data(
+    df_cleaned: pd.DataFrame | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
     """
     Loads raw data, cleans it, and performs a stratified train-test split.
 
+    Args:
+        df_cleaned (pd.DataFrame, optional): Already cleaned data to split
+            instead of loading ``RAW_DATA_PATH``.
+
     Returns:
         tuple: (X_train, X_test, y_train, y_test)
     """
-    df_raw = load_data(filepath=RAW_DATA_PATH)
-    df_cleaned = clean_data(df=df_raw)
+    if df_cleaned is None:
+        df_raw = load_data(filepath=RAW_DATA_PATH)
+        df_cleaned = clean_data(df=df_raw)
     X, y = split_feature_from_target(df=df_cleaned)
 
     # Returning the result of train_test_split directly unpacks into the tuple
@@ -78,48 +108,111 @@ def load_and_split_data() -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Ser
     )
 
 
-def run_grid_search(
-    X_train: pd.DataFrame, y_train: pd.Series
-) -> tuple[Pipeline, float]:
+def build_strategy(name: str = SEARCH_STRATEGY) -> SearchStrategy:
     """
-    Optimizes hyperparameters using GridSearchCV.
+    Creates a search strategy configured from ``config.py``.
+
+    Args:
+        name (str): Key of ``SEARCH_STRATEGIES``.
+
+    Returns:
+        SearchStrategy: The strategy instance.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+    """
+    if name not in SEARCH_STRATEGIES:
+        raise ValueError(
+            f"Unknown search strategy '{name}', "
+            f"expected one of {sorted(SEARCH_STRATEGIES)}"
+        )
+    if name == "random":
+        return RandomStrategy(
+            n_candidates=SEARCH_RANDOM_CANDIDATES, seed=RANDOM_SEED
+        )
+    if name == "halving":
+        return HalvingStrategy(factor=SEARCH_HALVING_FACTOR)
+    return SEARCH_STRATEGIES[name]()
+
+
+def run_hyperparameter_search(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    strategy: SearchStrategy | None = None,
+    budget: SearchBudget = SearchBudget(
+        max_seconds=SEARCH_MAX_SECONDS, max_fits=SEARCH_MAX_FITS
+    ),
+    param_grid: dict = PARAM_GRID,
+) -> tuple[Pipeline, float, dict]:
+    """
+    Optimizes hyperparameters with a cross-validated search.
+
+    Every fold is preprocessed once and the C values are fitted as a
+    warm-started regularization path (see ``run_search``).
 
     Args:
         X_train (pd.DataFrame): Training features.
         y_train (pd.Series): Training labels.
+        strategy (SearchStrategy, optional): Search strategy (default: the
+            one named by ``SEARCH_STRATEGY``).
+        budget (SearchBudget): Time and fit limits for cross-validation.
+        param_grid (dict): Candidate values per classifier parameter.
 
     Returns:
-        tuple[Pipeline, float]: The best fitted pipeline and its CV score.
+        tuple[Pipeline, float, dict]: The best fitted pipeline, its CV score
+            and a summary of the search for the metrics report.
     """
+    start = time.perf_counter()
     pipeline = build_pipeline()
-
-    param_grid = {
-        "classifier__C": [0.1, 1.0, 10.0],
-        "classifier__solver": ["lbfgs", "newton-cg"],
-    }
+    strategy = strategy or build_strategy()
 
     cv = StratifiedKFold(
-        n_splits=5,
+        n_splits=SEARCH_CV_FOLDS,
         shuffle=True,
         random_state=RANDOM_SEED
     )
 
-    grid_search = GridSearchCV(
-        estimator=pipeline,
+    logger.info(f"Starting {strategy.name} search...")
+    result = run_search(
+        pipeline=pipeline,
         param_grid=param_grid,
+        X=X_train,
+        y=y_train,
         cv=cv,
-        scoring="accuracy",
+        strategy=strategy,
+        budget=budget,
         n_jobs=-1,
-        verbose=1,
     )
 
-    logger.info("Starting Grid Search...")
-    grid_search.fit(X=X_train, y=y_train)
+    # Refit the best candidate on the complete training set
+    refit_start = time.perf_counter()
+    pipeline.set_params(**result.best_params)
+    pipeline.fit(X=X_train, y=y_train)
+    timings = {
+        **result.timings,
+        "refit": time.perf_counter() - refit_start,
+        "total": time.perf_counter() - start,
+    }
 
-    best_score = float(grid_search.best_score_)
+    best_score = float(result.best_score)
     logger.success(f"Best CV Accuracy: {best_score:.2%}")
-
-    return grid_search.best_estimator_, best_score
+    timings = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+    logger.info(f"Search timings (s): {timings}")
+
+    search = {
+        "strategy": strategy.describe(),
+        "budget": {
+            "max_seconds": budget.max_seconds,
+            "max_fits": budget.max_fits,
+        },
+        "stopped_early": result.stopped_early,
+        "fits": result.fits,
+        "candidates": len(result.candidates),
+        "grid_size": len(ParameterGrid(param_grid)),
+        "best_params": result.best_params,
+        "timings_s": timings,
+    }
+    return pipeline, best_score, search
 
 
 def evaluate_model(
@@ -148,7 +241,10 @@ def evaluate_model(
 
 
 def save_artifacts(
-    pipeline: Pipeline, metrics: dict, cv_score: float
+    pipeline: Pipeline,
+    metrics: dict,
+    cv_score: float | None,
+    search: dict = None,
 ) -> None:
     """
     Saves the trained model and metrics to disk.
@@ -156,29 +252,85 @@ def save_artifacts(
     Args:
         pipeline (Pipeline): The trained model.
         metrics (dict): The evaluation report.
-        cv_score (float): The best cross-validation score.
+        cv_score (float | None): The best cross-validation score, if the
+            model was cross-validated.
+        search (dict, optional): Summary of the hyperparameter search.
     """
-    metrics["cross_val_accuracy"] = round(cv_score, 4)
+    if cv_score is not None:
+        metrics["cross_val_accuracy"] = round(cv_score, 4)
+    if search is not None:
+        metrics["search"] = search
 
     METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
     with open(METRICS_PATH, "w") as f:
         json.dump(metrics, f, indent=4)
     logger.success(f"Metrics saved to {METRICS_PATH}")
 
-    joblib.dump(value=pipeline, filename=MODEL_PATH)
-    logger.success(f"Model saved to {MODEL_PATH}")
+    publish_model(pipeline, MODEL_PATH)
 
 
-def train_model() -> None:
-    """Main execution function for the training workflow."""
+def publish_model(pipeline: Pipeline, path: Path = MODEL_PATH) -> None:
+    """
+    Atomically replaces the model artifact served by the application.
+
+    Args:
+        pipeline (Pipeline): The fitted pipeline.
+        path (Path): Target artifact.
+    """
+    # Write next to the target and rename, so serving processes that
+    # hot-reload the model never observe a partially written artifact
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".joblib.tmp")
+    joblib.dump(value=pipeline, filename=tmp_path)
+    os.replace(tmp_path, path)
+    logger.success(f"Model saved to {path}")
+
+
+def train_model(
+    strategy: SearchStrategy | None = None,
+    budget: SearchBudget = SearchBudget(
+        max_seconds=SEARCH_MAX_SECONDS, max_fits=SEARCH_MAX_FITS
+    ),
+    use_cache: bool = True,
+) -> None:
+    """
+    Main execution function for the training workflow.
+
+    A run with the same cleaned data, configuration and library versions
+    as a cached one restores the cached artifacts instead of retraining.
+
+    Args:
+        strategy (SearchStrategy, optional): Hyperparameter search strategy.
+        budget (SearchBudget): Limits for the hyperparameter search.
+        use_cache (bool): Reuse and record runs in the run cache.
+    """
 
     # 1. Load Data
-    X_train, X_test, y_train, y_test = load_and_split_data()
+    df_cleaned = clean_data(df=load_data(filepath=RAW_DATA_PATH))
+    strategy = strategy or build_strategy()
+    cache_key = run_cache_key(
+        df_cleaned,
+        settings={
+            "param_grid": PARAM_GRID,
+            "strategy": strategy.describe(),
+            "budget": {
+                "max_seconds": budget.max_seconds,
+                "max_fits": budget.max_fits,
+            },
+        },
+    )
+    if use_cache and run_cache.restore(cache_key, MODEL_PATH, METRICS_PATH):
+        logger.success(f"Reused cached training run {cache_key[:12]}")
+        return
 
-    # 2. Train (Grid Search)
-    best_pipeline, best_cv_score = run_grid_search(
+    X_train, X_test, y_train, y_test = load_and_split_data(df_cleaned)
+
+    # 2. Train (Hyperparameter Search)
+    best_pipeline, best_cv_score, search = run_hyperparameter_search(
         X_train=X_train,
-        y_train=y_train
+        y_train=y_train,
+        strategy=strategy,
+        budget=budget,
     )
 
     # 3. Evaluate
@@ -189,12 +341,56 @@ def train_model() -> None:
     )
 
     # 4. Save
+    best_pipeline.run_cache_key_ = cache_key
+    metrics["run_cache_key"] = cache_key
     save_artifacts(
         pipeline=best_pipeline,
         metrics=metrics,
-        cv_score=best_cv_score
+        cv_score=best_cv_score,
+        search=search,
+    )
+    if use_cache:
+        run_cache.store(cache_key, MODEL_PATH, METRICS_PATH)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for training."""
+    parser = argparse.ArgumentParser(
+        description="Train the penguin classifier and save its artifacts."
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=sorted(SEARCH_STRATEGIES),
+        default=SEARCH_STRATEGY,
+        help="Hyperparameter search strategy (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=SEARCH_MAX_SECONDS,
+        help="Time budget for the search in seconds (default: unlimited)",
+    )
+    parser.add_argument(
+        "--max-fits",
+        type=int,
+        default=SEARCH_MAX_FITS,
+        help="Budget for the number of model fits (default: unlimited)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Retrain even if an identical run is in the run cache",
+    )
+    args = parser.parse_args(argv)
+
+    train_model(
+        strategy=build_strategy(args.strategy),
+        budget=SearchBudget(
+            max_seconds=args.max_seconds, max_fits=args.max_fits
+        ),
+        use_cache=not args.no_cache,
     )
 
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    main()
@@ -0,0 +1,427 @@
+"""
+Lightweight in-process metrics for the web server.
+Counters and latency histograms are rendered in the Prometheus text format
+on the ``/metrics`` endpoint of the Flask server behind the Dash app.
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+import functools
+import math
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from src.penguin_classifier.config import (
+    METRICS_ENABLED,
+    METRICS_ENDPOINT,
+    METRICS_LATENCY_BUCKETS,
+)
+
+# The model and data layers record metrics without the web stack
+if TYPE_CHECKING:
+    from flask import Flask, Response
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """Escapes a label value for the text exposition format."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Renders ``{name="value",...}``, or nothing without labels."""
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    """Renders a sample value, including the special float values."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """
+    Monotonically increasing count, optionally split by labels.
+
+    Args:
+        name (str): Metric name, e.g. ``penguin_predictions_total``.
+        documentation (str): One-line description (``# HELP``).
+        labelnames (Sequence[str]): Names of the labels passed to ``inc``.
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Adds ``amount`` to the series selected by ``labels``.
+
+        Args:
+            amount (float): Non-negative increment.
+            **labels: One value per name in ``labelnames``.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Returns the current count of one series (0 if never counted)."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def reset(self) -> None:
+        """Drops all series, e.g. in a freshly forked worker."""
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> list[str]:
+        """Renders the sample lines of all series."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} "
+            f"{_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Observing costs a binary search and an increment under a lock, so
+    request paths can be timed permanently.
+
+    Args:
+        name (str): Metric name, e.g. ``penguin_stage_duration_seconds``.
+        documentation (str): One-line description (``# HELP``).
+        labelnames (Sequence[str]): Names of the labels passed to
+            ``observe``.
+        buckets (Sequence[float]): Increasing upper bounds; ``+Inf`` is
+            always added.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = METRICS_LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # Per series: [count per bucket..., count above the last, sum]
+        self._series: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Records one value in the series selected by ``labels``.
+
+        Args:
+            value (float): The observation, e.g. a duration in seconds.
+            **labels: One value per name in ``labelnames``.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        """Returns the number of observations of one series."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return int(sum(series[:-1])) if series else 0
+
+    def reset(self) -> None:
+        """Drops all series, e.g. in a freshly forked worker."""
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> list[str]:
+        """Renders buckets, sum and count of all series."""
+        with self._lock:
+            series_items = sorted(
+                (key, list(series)) for key, series in self._series.items()
+            )
+        names = (*self.labelnames, "le")
+        lines = []
+        for key, series in series_items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), series[:-1]):
+                cumulative += count
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(
+                f"{self.name}_sum{labels} {_format_value(series[-1])}"
+            )
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class FunctionMetric:
+    """
+    Metric whose value is read from a callback when it is scraped.
+
+    Exposes state that is already tracked elsewhere, such as cache
+    counters, without touching the code that maintains it.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): One-line description (``# HELP``).
+        read (Callable[[], float]): Returns the current value.
+        kind (str): ``gauge`` or ``counter``.
+    """
+
+    labelnames = ()
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float],
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.kind = kind
+
+    def samples(self) -> list[str]:
+        """Renders the current value, or nothing if it is unavailable."""
+        value = self.read()
+        if value is None:
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    """
+    Named metrics of this process in registration order.
+
+    Every server process keeps its own registry; with several workers,
+    each one is scraped (or aggregated) separately.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | FunctionMetric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Adds a metric, or returns the one already registered by that name.
+
+        Args:
+            metric (Counter | Histogram | FunctionMetric): The new metric.
+
+        Returns:
+            The registered metric.
+
+        Raises:
+            ValueError: If the name is taken by a metric of another kind.
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric):
+            raise ValueError(f"Metric {metric.name} is already registered")
+        return existing
+
+    def reset(self) -> None:
+        """
+        Sets counters and histograms back to zero.
+
+        Called in forked workers, which would otherwise report what the
+        parent recorded before the fork (such as its warm-up) as their own.
+        Metrics read from callbacks are unaffected.
+        """
+        self._lock = threading.Lock()
+        for metric in list(self._metrics.values()):
+            if hasattr(metric, "reset"):
+                metric.reset()
+
+    def render(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: ``# HELP``, ``# TYPE`` and sample lines per metric.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every request handled in this process
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.register(
+    Histogram(
+        "penguin_stage_duration_seconds",
+        "Time spent per stage of request handling, model and data layer.",
+        labelnames=("stage",),
+    )
+)
+STAGE_ERRORS = registry.register(
+    Counter(
+        "penguin_stage_errors_total",
+        "Exceptions raised per stage.",
+        labelnames=("stage",),
+    )
+)
+PREDICTIONS = registry.register(
+    Counter(
+        "penguin_predictions_total",
+        "Penguins classified by the served model, per predicted species.",
+        labelnames=("species",),
+    )
+)
+INVALID_INPUTS = registry.register(
+    Counter(
+        "penguin_invalid_inputs_total",
+        "Classification requests rejected by input validation, per field.",
+        labelnames=("field",),
+    )
+)
+
+
+class StageTimer:
+    """
+    Times a block or a function as one stage (see ``timed``).
+
+    Args:
+        stage (str): Name of the stage (the ``stage`` label).
+    """
+
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._start = 0.0
+
+    def __enter__(self) -> "StageTimer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if METRICS_ENABLED:
+            STAGE_DURATION.observe(
+                time.perf_counter() - self._start, stage=self.stage
+            )
+            if exc_type is not None:
+                STAGE_ERRORS.inc(stage=self.stage)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        stage = self.stage
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh timer per call, so concurrent calls don't share state
+            with StageTimer(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def timed(stage: str) -> StageTimer:
+    """
+    Times a block or a function as one stage.
+
+    The duration is observed in ``penguin_stage_duration_seconds`` whether
+    the stage succeeds or not; exceptions are also counted in
+    ``penguin_stage_errors_total`` and re-raised. Does nothing if
+    ``METRICS_ENABLED`` is off.
+
+    Usage::
+
+        with timed("save_prediction"):
+            ...
+
+        @timed("model_load")
+        def load(): ...
+
+    Args:
+        stage (str): Name of the stage (the ``stage`` label).
+
+    Returns:
+        StageTimer: Context manager and decorator.
+    """
+    return StageTimer(stage)
+
+
+def count_predictions(species) -> None:
+    """
+    Counts predicted labels per species.
+
+    Args:
+        species: Iterable of predicted labels.
+    """
+    if not METRICS_ENABLED:
+        return
+    counts = {}
+    for label in species:
+        counts[label] = counts.get(label, 0) + 1
+    for label, count in counts.items():
+        PREDICTIONS.inc(count, species=label)
+
+
+def metrics_view() -> "Response":
+    """Serves the registry in the Prometheus text format."""
+    from flask import Response
+
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
+def register_metrics(server: "Flask") -> None:
+    """
+    Mounts the ``/metrics`` endpoint on the Flask server behind the Dash app.
+
+    Args:
+        server (Flask): The ``app.server`` instance.
+    """
+    if METRICS_ENABLED:
+        server.add_url_rule(
+            METRICS_ENDPOINT, endpoint="metrics", view_func=metrics_view
+        )
@@ -3,10 +3,130 @@ Visualization module for the Penguin Classifier.
 Uses Plotly to generate interactive charts for the Dash UI.
 """
 
+from collections import OrderedDict
+from collections.abc import Callable
+import threading
+
+from dash import Patch
+from loguru import logger
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
+from src.penguin_classifier.config import (
+    FEATURES,
+    FIGURE_CACHE_SIZE,
+    NUMERICAL_FEATURES,
+    PLOT_DENSITY_BINS,
+    PLOT_KEEP_NEWEST,
+    PLOT_MAX_POINTS,
+    PLOT_WEBGL_THRESHOLD,
+    RANDOM_SEED,
+)
+from src.penguin_classifier.monitoring import FunctionMetric, registry
+
+# Define a consistent color scheme for penguin species
+COLOR_MAP = {
+    "Adelie": "#636EFA",
+    "Chinstrap": "#EF553B",
+    "Gentoo": "#00CC96",
+}
+
+# Traces are always laid out in this order, followed by the highlight
+# trace, so a figure can be patched without knowing its content
+SPECIES_ORDER = list(COLOR_MAP)
+LATEST_TRACE_INDEX = len(SPECIES_ORDER)
+
+# Largest marker diameter in pixels (same default as Plotly Express)
+MAX_MARKER_SIZE = 20
+
+
+def _values(series: pd.Series) -> list:
+    """Plain lists keep trace arrays appendable by partial updates."""
+    return series.tolist()
+
+
+def _json_values(series: pd.Series) -> list:
+    """Like ``_values``, with missing values as null instead of NaN."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def downsample_for_plot(
+    df: pd.DataFrame,
+    max_points: int = PLOT_MAX_POINTS,
+    keep_newest: int = PLOT_KEEP_NEWEST,
+    bins: int = PLOT_DENSITY_BINS,
+) -> pd.DataFrame:
+    """
+    Reduces a large dataset to a representative sample for plotting.
+
+    Rows are grouped into cells by species and by binning every numerical
+    feature, so the sample looks right for any axis pair. Each occupied cell
+    keeps a share of rows proportional to its size, but at least one, which
+    preserves the density of clusters as well as sparse outliers. The grid
+    is coarsened if there are more occupied cells than points. The first
+    ``keep_newest`` rows (the newest, as the data is sorted newest first)
+    are always kept. The sample is deterministic for a given dataset.
+
+    Args:
+        df (pd.DataFrame): Data sorted newest first.
+        max_points (int): Target number of rows.
+        keep_newest (int): Number of leading rows that are always kept.
+        bins (int): Bins per numerical feature (finest grid).
+
+    Returns:
+        pd.DataFrame: ``df`` itself if small enough, otherwise a subset of
+            its rows in their original order.
+    """
+    if len(df) <= max_points:
+        return df
+
+    newest = min(keep_newest, max_points)
+    candidates = len(df) - newest
+    budget = max_points - newest
+
+    # Features scaled to [0, 1]; NaN marks missing values
+    species = pd.factorize(df["species"].iloc[newest:])[0].astype(np.int64)
+    scaled = []
+    for column in NUMERICAL_FEATURES:
+        values = pd.to_numeric(
+            df[column].iloc[newest:], errors="coerce"
+        ).to_numpy(dtype=float)
+        low, high = np.nanmin(values), np.nanmax(values)
+        scaled.append((values - low) / ((high - low) or 1.0))
+
+    # Cell id: species code followed by one bin index per feature (NaN in
+    # an extra bin). The grid gets coarser until every occupied cell can
+    # keep a row, so isolated points are never dropped for lack of budget.
+    while True:
+        cell = species.copy()
+        for unit in scaled:
+            index = np.where(
+                np.isnan(unit), bins, np.clip(unit * bins, 0, bins - 1)
+            )
+            cell = cell * (bins + 1) + index.astype(np.int64)
+        _, cell, counts = np.unique(
+            cell, return_inverse=True, return_counts=True
+        )
+        if len(counts) <= budget or bins == 1:
+            break
+        bins = max(1, bins // 2)
+
+    # Rank of every row within its cell, in a fixed random order
+    order = np.random.default_rng(RANDOM_SEED).permutation(candidates)
+    rank = np.empty(candidates, dtype=np.int64)
+    rank[order] = pd.Series(cell[order]).groupby(cell[order]).cumcount()
+
+    quota = np.maximum(1, np.floor(counts * (budget / candidates)))
+    selected = np.flatnonzero(rank < quota[cell])
+    if len(selected) > budget:
+        # Rounding up to one row per cell overshot: low ranks first
+        priority = np.argsort(rank[selected], kind="stable")
+        selected = np.sort(selected[priority[:budget]])
+
+    positions = np.concatenate([np.arange(newest), newest + selected])
+    return df.iloc[positions]
+
 
 def create_scatter_plot(
     df_historic: pd.DataFrame,
@@ -14,12 +134,16 @@ def create_scatter_plot(
     y_column: str = "bill_length_mm",
     size_column: str = None,
     new_data: pd.DataFrame = None,
+    max_points: int = PLOT_MAX_POINTS,
 ) -> go.Figure:
     """
     Generates an interactive scatter plot of the penguin population.
 
     Historical data is displayed with partial transparency, while the latest
-    prediction is highlighted as a distinct star icon.
+    prediction is highlighted as a distinct star icon. Every species gets a
+    trace (empty if absent) in ``SPECIES_ORDER``, followed by the highlight
+    trace at ``LATEST_TRACE_INDEX``. Large datasets are downsampled (see
+    ``downsample_for_plot``) and rendered with WebGL.
 
     Args:
         df_historic (pd.DataFrame): The base dataset containing past observations.
@@ -27,50 +151,270 @@ def create_scatter_plot(
         y_column (str): Feature to plot on the Y-axis.
         size_column (str, optional): Feature to determine marker size.
         new_data (pd.DataFrame, optional): The single most recent prediction to highlight.
+        max_points (int): Level of detail for large datasets.
 
     Returns:
         go.Figure: A Plotly figure object ready for rendering in the Dash UI.
     """
-    # Define a consistent color scheme for penguin species
-    color_map = {
-        "Adelie": "#636EFA",
-        "Chinstrap": "#EF553B",
-        "Gentoo": "#00CC96",
-    }
+    fig = go.Figure()
 
-    # Create the background scatter plot (historical data)
-    fig = px.scatter(
-        data_frame=df_historic,
-        x=x_column,
-        y=y_column,
-        color="species",
-        color_discrete_map=color_map,
-        title="Penguin Data Distribution",
-        size=size_column,
-        template="simple_white",
-        opacity=0.5,
+    # Area-proportional marker sizes, scaled like Plotly Express
+    size_ref = None
+    if size_column is not None and len(df_historic):
+        size_ref = 2.0 * df_historic[size_column].max() / MAX_MARKER_SIZE**2
+
+    title = "Penguin Data Distribution"
+    plotted = downsample_for_plot(df_historic, max_points=max_points)
+    if len(plotted) < len(df_historic):
+        title += f" ({len(plotted):,} of {len(df_historic):,} shown)"
+        logger.debug(f"Plotting {len(plotted)} of {len(df_historic)} rows")
+    scatter = (
+        go.Scattergl if len(plotted) > PLOT_WEBGL_THRESHOLD else go.Scatter
     )
 
-    # Overlay the latest prediction if available
-    if new_data is not None:
+    # Create the background scatter plot (historical data)
+    for species in SPECIES_ORDER:
+        subset = plotted[plotted["species"] == species]
+        hover = f"species={species}<br>{x_column}=%{{x}}<br>{y_column}=%{{y}}"
+        marker = dict(color=COLOR_MAP[species], opacity=0.5, symbol="circle")
+        if size_ref is not None:
+            marker.update(
+                size=_values(subset[size_column]),
+                sizemode="area",
+                sizeref=size_ref,
+            )
+            hover += f"<br>{size_column}=%{{marker.size}}"
         fig.add_trace(
-            go.Scatter(
-                x=new_data[x_column],
-                y=new_data[y_column],
+            scatter(
+                x=_values(subset[x_column]),
+                y=_values(subset[y_column]),
                 mode="markers",
-                marker=dict(
-                    color="yellow",
-                    size=15,
-                    opacity=1,
-                    symbol="star",
-                    line=dict(width=1, color="black"),
-                ),
-                name="Latest Prediction",
+                marker=marker,
+                name=species,
+                legendgroup=species,
+                hovertemplate=hover + "<extra></extra>",
             )
         )
 
+    # Overlay the latest prediction (empty trace if there is none)
+    fig.add_trace(
+        go.Scatter(
+            x=[] if new_data is None else _values(new_data[x_column]),
+            y=[] if new_data is None else _values(new_data[y_column]),
+            mode="markers",
+            marker=dict(
+                color="yellow",
+                size=15,
+                opacity=1,
+                symbol="star",
+                line=dict(width=1, color="black"),
+            ),
+            name="Latest Prediction",
+            showlegend=new_data is not None,
+        )
+    )
+
     fig.update_layout(
+        title=title,
+        template="simple_white",
         legend_title="Species",
+        legend_itemsizing="constant",
+        xaxis_title=x_column,
+        yaxis_title=y_column,
     )
 
     return fig
+
+
+def patch_scatter_plot(
+    new_data: pd.DataFrame,
+    x_column: str,
+    y_column: str,
+    size_column: str = None,
+) -> Patch:
+    """
+    Builds a partial figure update for one new prediction.
+
+    Appends the observation to its species trace and moves the "Latest
+    Prediction" star, instead of sending the whole figure again. Only valid
+    for figures created by ``create_scatter_plot`` with the same columns.
+
+    Args:
+        new_data (pd.DataFrame): Single row including its ``species``.
+        x_column (str): Feature on the X-axis of the displayed figure.
+        y_column (str): Feature on the Y-axis of the displayed figure.
+        size_column (str, optional): Feature used for marker sizes.
+
+    Returns:
+        Patch: The update for the ``figure`` property of the graph.
+    """
+    row = new_data.iloc[0]
+    patch = Patch()
+
+    trace = patch["data"][SPECIES_ORDER.index(row["species"])]
+    trace["x"].append(row[x_column])
+    trace["y"].append(row[y_column])
+    if size_column is not None:
+        trace["marker"]["size"].append(row[size_column])
+
+    latest = patch["data"][LATEST_TRACE_INDEX]
+    latest["x"] = [row[x_column]]
+    latest["y"] = [row[y_column]]
+    latest["showlegend"] = True
+    return patch
+
+
+def create_plot_data(
+    df_historic: pd.DataFrame,
+    version: int,
+    size_column: str = None,
+    max_points: int = PLOT_MAX_POINTS,
+) -> dict:
+    """
+    Collects the plottable columns of every species trace for the browser.
+
+    The client-side axis callback rebuilds the trace coordinates from this
+    data, so switching axes needs no server round trip. Traces follow
+    ``SPECIES_ORDER`` like the figure created by ``create_scatter_plot``,
+    and large datasets are downsampled the same way.
+
+    Args:
+        df_historic (pd.DataFrame): The data shown in the scatter plot.
+        version (int): Dataset version the data belongs to.
+        size_column (str, optional): Feature that determines marker size.
+        max_points (int): Level of detail for large datasets.
+
+    Returns:
+        dict: ``{"version", "size_column", "traces": [{column: [values]}]}``.
+    """
+    plotted = downsample_for_plot(df_historic, max_points=max_points)
+    traces = []
+    for species in SPECIES_ORDER:
+        subset = plotted[plotted["species"] == species]
+        traces.append(
+            {column: _json_values(subset[column]) for column in FEATURES}
+        )
+    return {"version": version, "size_column": size_column, "traces": traces}
+
+
+def patch_plot_data(new_rows: pd.DataFrame, version: int) -> Patch:
+    """
+    Builds a partial update that appends rows to the browser's plot data.
+
+    Args:
+        new_rows (pd.DataFrame): Rows added since the data was last sent.
+        version (int): Dataset version after adding the rows.
+
+    Returns:
+        Patch: The update for the plot data store.
+    """
+    patch = Patch()
+    patch["version"] = version
+    for index, species in enumerate(SPECIES_ORDER):
+        subset = new_rows[new_rows["species"] == species]
+        if subset.empty:
+            continue
+        for column in FEATURES:
+            patch["traces"][index][column].extend(_json_values(subset[column]))
+    return patch
+
+
+class FigureCache:
+    """
+    Bounded LRU cache of serialized figures per dataset version.
+
+    Figures are stored as plain dicts (``go.Figure.to_dict()``), which Dash
+    can send without rebuilding them; callers must not modify them. Entries
+    of older versions are dropped as soon as a newer version is requested.
+    """
+
+    def __init__(self, max_size: int = FIGURE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._figures: OrderedDict[tuple, dict] = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_or_create(
+        self, key: tuple, version: int, build: Callable[[], go.Figure]
+    ) -> dict:
+        """
+        Returns the cached figure for ``key`` at ``version`` or builds it.
+
+        Args:
+            key (tuple): Figure parameters, e.g. ``(x, y, size)`` columns.
+            version (int): Dataset version the figure is built from.
+            build (Callable[[], go.Figure]): Creates the figure on a miss.
+
+        Returns:
+            dict: The serialized figure.
+        """
+        with self._lock:
+            if self._version is None or version > self._version:
+                # The history advanced: older figures are stale
+                self._figures.clear()
+                self._version = version
+            figure = self._figures.get((version, key))
+            if figure is not None:
+                self._figures.move_to_end((version, key))
+                self.hits += 1
+                return figure
+            self.misses += 1
+
+        figure = build().to_dict()
+        with self._lock:
+            if version == self._version:
+                self._figures[(version, key)] = figure
+                while len(self._figures) > self.max_size:
+                    self._figures.popitem(last=False)
+        return figure
+
+    def clear(self) -> None:
+        """Drops all figures and resets the counters."""
+        with self._lock:
+            self._figures.clear()
+            self._version = None
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: ``hits``, ``misses``, ``size`` and ``version``.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._figures),
+                "version": self._version,
+            }
+
+
+# Figures shared by all sessions of this process
+figure_cache = FigureCache()
+registry.register(
+    FunctionMetric(
+        "penguin_figure_cache_hits_total",
+        "Figures served from the figure cache.",
+        lambda: figure_cache.stats()["hits"],
+        kind="counter",
+    )
+)
+registry.register(
+    FunctionMetric(
+        "penguin_figure_cache_misses_total",
+        "Figures built because they were not in the figure cache.",
+        lambda: figure_cache.stats()["misses"],
+        kind="counter",
+    )
+)
+registry.register(
+    FunctionMetric(
+        "penguin_figure_cache_size",
+        "Figures held in the figure cache.",
+        lambda: figure_cache.stats()["size"],
+    )
+)
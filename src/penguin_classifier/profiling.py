@@ -0,0 +1,353 @@
+"""
+Opt-in profiling of individual requests to the web server.
+Sampled or flagged requests run under cProfile and are dumped to
+timestamped files; a summary lists the functions with the most cumulative
+time, for one profile or many merged.
+"""
+
+import argparse
+import cProfile
+import io
+import os
+from pathlib import Path
+import pstats
+import random
+import re
+import threading
+import time
+
+from flask import Flask, Response, g, request
+from loguru import logger
+
+from src.penguin_classifier.config import (
+    PROFILE_HEADER,
+    PROFILE_MAX_FILES,
+    PROFILE_PATH_PREFIXES,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_TOP_FUNCTIONS,
+    PROFILES_DIR,
+)
+
+SAMPLE_RATE_ENV = "PENGUIN_PROFILE_SAMPLE"
+TOKEN_ENV = "PENGUIN_PROFILE_TOKEN"
+SUMMARY_ENDPOINT = "/debug/profiles"
+
+
+def _slug(text: str, max_length: int = 60) -> str:
+    """Turns a path or callback id into a short file name part."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-")
+    return slug[:max_length] or "request"
+
+
+def list_profiles(directory: Path = PROFILES_DIR) -> list[Path]:
+    """
+    Returns the profile files in a directory, newest first.
+
+    Args:
+        directory (Path): Where the profiles were written.
+
+    Returns:
+        list[Path]: ``.prof`` files sorted by name (their timestamp).
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    return sorted(directory.glob("*.prof"), reverse=True)
+
+
+def summarize_profiles(
+    paths: list[Path],
+    top: int = PROFILE_TOP_FUNCTIONS,
+    sort: str = "cumulative",
+) -> str:
+    """
+    Merges profiles and lists the most expensive functions.
+
+    Args:
+        paths (list[Path]): Profile files written by ``RequestProfiler``.
+        top (int): Number of functions to list.
+        sort (str): A ``pstats`` sort key, e.g. ``cumulative`` or
+            ``tottime``.
+
+    Returns:
+        str: The ``pstats`` report.
+
+    Raises:
+        ValueError: If no profile is given.
+    """
+    if not paths:
+        raise ValueError("No profiles to summarize")
+    buffer = io.StringIO()
+    stats = pstats.Stats(str(paths[0]), stream=buffer)
+    for path in paths[1:]:
+        stats.add(str(path))
+    buffer.write(f"{len(paths)} profile(s), newest: {Path(paths[0]).name}\n")
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return buffer.getvalue()
+
+
+class RequestProfiler:
+    """
+    Profiles a sample of requests, plus those that ask for it.
+
+    A request is profiled if its path starts with one of
+    ``path_prefixes`` and it is either sampled (``sample_rate``) or carries
+    ``header`` with the value of ``token``. Without a token, the header is
+    ignored, so clients cannot switch profiling on by themselves. One
+    request per process is profiled at a time; others are served normally
+    meanwhile. Each profile is written to ``output_dir`` as
+    ``<timestamp>_<pid>_<request>_<duration>ms.prof`` and only the newest
+    ``max_files`` are kept.
+
+    Args:
+        output_dir (Path): Directory for the profile files.
+        sample_rate (float, optional): Share of requests to profile;
+            defaults to ``PENGUIN_PROFILE_SAMPLE`` or
+            ``PROFILE_SAMPLE_RATE``.
+        token (str, optional): Secret expected in ``header``; defaults to
+            ``PENGUIN_PROFILE_TOKEN``.
+        header (str): Name of the request header that flags a request.
+        path_prefixes (tuple[str, ...]): Paths that may be profiled.
+        max_files (int): Profiles kept on disk.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path = PROFILES_DIR,
+        sample_rate: float | None = None,
+        token: str | None = None,
+        header: str = PROFILE_HEADER,
+        path_prefixes: tuple[str, ...] = PROFILE_PATH_PREFIXES,
+        max_files: int = PROFILE_MAX_FILES,
+    ):
+        if sample_rate is None:
+            sample_rate = float(
+                os.environ.get(SAMPLE_RATE_ENV, PROFILE_SAMPLE_RATE)
+            )
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV)
+        self.header = header
+        self.path_prefixes = tuple(path_prefixes)
+        self.max_files = max_files
+        self._busy = threading.Lock()
+        self._random = random.Random()
+
+    @property
+    def active(self) -> bool:
+        """Whether any request can be profiled at all."""
+        return self.sample_rate > 0 or bool(self.token)
+
+    def is_authorized(self, headers) -> bool:
+        """Whether the request headers carry the profiling token."""
+        return bool(self.token) and headers.get(self.header) == self.token
+
+    def wants(self, path: str, headers) -> bool:
+        """
+        Decides whether a request should be profiled.
+
+        Args:
+            path (str): The request path.
+            headers: The request headers (a mapping).
+
+        Returns:
+            bool: True if the request is flagged or sampled.
+        """
+        if not path.startswith(self.path_prefixes):
+            return False
+        if self.is_authorized(headers):
+            return True
+        return self._random.random() < self.sample_rate
+
+    def start(self) -> cProfile.Profile | None:
+        """
+        Starts profiling the current thread.
+
+        Returns:
+            cProfile.Profile | None: The running profiler, or None if
+                another request of this process is being profiled.
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception:
+            self._busy.release()
+            raise
+        return profile
+
+    def finish(
+        self, profile: cProfile.Profile, label: str, elapsed: float
+    ) -> Path:
+        """
+        Stops a profiler from ``start`` and writes its profile.
+
+        Args:
+            profile (cProfile.Profile): The running profiler.
+            label (str): Describes the request, e.g. the callback output.
+            elapsed (float): Wall time of the request in seconds.
+
+        Returns:
+            Path: The written profile file.
+        """
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+
+        now = time.time()
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(now))
+        millis = int(now % 1 * 1000)
+        path = self.output_dir / (
+            f"{stamp}.{millis:03d}_{os.getpid()}_{_slug(label)}_"
+            f"{round(elapsed * 1000)}ms.prof"
+        )
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(path)
+        self.prune()
+        return path
+
+    def prune(self) -> None:
+        """Deletes all but the newest ``max_files`` profiles."""
+        for path in list_profiles(self.output_dir)[self.max_files :]:
+            path.unlink(missing_ok=True)
+
+    # --- Flask hooks ---
+
+    def _before_request(self) -> None:
+        """Starts the profiler for flagged or sampled requests."""
+        if not self.wants(request.path, request.headers):
+            return
+        profile = self.start()
+        if profile is not None:
+            g.profile = profile
+            g.profile_start = time.perf_counter()
+
+    def _after_request(self, response: Response) -> Response:
+        """Writes the profile and names the file in a response header."""
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        elapsed = time.perf_counter() - g.pop("profile_start")
+        path = self.finish(profile, _request_label(), elapsed)
+        logger.info(f"Profiled {request.path} in {elapsed:.3f}s: {path.name}")
+        response.headers["X-Profile-File"] = path.name
+        return response
+
+    def _teardown_request(self, exc: BaseException | None) -> None:
+        """Stops a profiler left running by a failed request."""
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.disable()
+            self._busy.release()
+
+    def summary_view(self) -> Response:
+        """
+        Serves a summary of the newest profiles to holders of the token.
+
+        Query parameters: ``last`` (profiles to merge, default 20), ``top``
+        and ``sort`` (see ``summarize_profiles``).
+        """
+        if not self.is_authorized(request.headers):
+            return Response("Forbidden\n", status=403, mimetype="text/plain")
+        paths = list_profiles(self.output_dir)
+        paths = paths[: request.args.get("last", default=20, type=int)]
+        if not paths:
+            return Response("No profiles yet\n", mimetype="text/plain")
+        try:
+            summary = summarize_profiles(
+                paths,
+                top=request.args.get(
+                    "top", default=PROFILE_TOP_FUNCTIONS, type=int
+                ),
+                sort=request.args.get("sort", default="cumulative"),
+            )
+        except KeyError as e:
+            return Response(f"{e}\n", status=400, mimetype="text/plain")
+        return Response(summary, mimetype="text/plain")
+
+
+def _request_label() -> str:
+    """Names a request: the callback outputs for Dash, else the path."""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict) and isinstance(payload.get("output"), str):
+        return payload["output"]
+    return request.path
+
+
+# Shared by every request handled in this process
+request_profiler = RequestProfiler()
+
+
+def register_profiling(
+    server: Flask, profiler: RequestProfiler = request_profiler
+) -> None:
+    """
+    Installs the profiling hooks and the summary view on the Flask server.
+
+    The hooks are only installed if profiling is enabled by a sample rate
+    or a token, so it costs nothing otherwise.
+
+    Args:
+        server (Flask): The ``app.server`` instance.
+        profiler (RequestProfiler): Decides what to profile and where to
+            write it.
+    """
+    if not profiler.active:
+        return
+    server.before_request(profiler._before_request)
+    server.after_request(profiler._after_request)
+    server.teardown_request(profiler._teardown_request)
+    if profiler.token:
+        server.add_url_rule(
+            SUMMARY_ENDPOINT,
+            endpoint="profile_summary",
+            view_func=profiler.summary_view,
+        )
+    logger.info(
+        f"Request profiling on (sample rate {profiler.sample_rate}, "
+        f"header {'on' if profiler.token else 'off'})"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for summarizing request profiles."""
+    parser = argparse.ArgumentParser(
+        description="Summarize request profiles by cumulative time."
+    )
+    parser.add_argument(
+        "profiles",
+        type=Path,
+        nargs="*",
+        help=f"Profile files (default: the newest in {PROFILES_DIR})",
+    )
+    parser.add_argument(
+        "--last",
+        type=int,
+        default=20,
+        help="Newest profiles to merge if none are given "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=PROFILE_TOP_FUNCTIONS,
+        help="Functions to list (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--sort",
+        default="cumulative",
+        help="pstats sort key, e.g. cumulative or tottime "
+        "(default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    paths = args.profiles or list_profiles()[: args.last]
+    if not paths:
+        parser.error(f"No profiles found in {PROFILES_DIR}")
+    print(summarize_profiles(paths, top=args.top, sort=args.sort))
+
+
+if __name__ == "__main__":
+    main()
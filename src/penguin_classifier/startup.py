@@ -0,0 +1,221 @@
+"""
+Import-time report for the web app and the command line entry points.
+Each entry point is imported in a fresh interpreter with
+``python -X importtime``; the cost is broken down per package and per
+project module and checked against the budgets in config.py.
+"""
+
+import argparse
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import re
+import subprocess
+import sys
+
+from src.penguin_classifier.config import PROJ_ROOT, STARTUP_BUDGETS
+
+PROJECT_PACKAGE = "src.penguin_classifier"
+IMPORT_TIME_PATTERN = re.compile(
+    r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$"
+)
+
+
+@dataclass
+class ImportRecord:
+    """One line of ``-X importtime`` output (times in seconds)."""
+
+    module: str
+    self_s: float
+    cumulative_s: float
+    depth: int
+
+    @property
+    def package(self) -> str:
+        """Top-level package, or the project subpackage for own modules."""
+        if self.module.startswith(PROJECT_PACKAGE + "."):
+            parts = self.module.split(".")
+            return ".".join(parts[:3])
+        return self.module.split(".")[0]
+
+
+def parse_import_times(text: str) -> list[ImportRecord]:
+    """
+    Parses the ``-X importtime`` lines of an interpreter's stderr.
+
+    Args:
+        text (str): The stderr output; other lines are skipped.
+
+    Returns:
+        list[ImportRecord]: One record per imported module, in the order
+            the imports finished.
+    """
+    records = []
+    for line in text.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append(
+            ImportRecord(
+                module=module,
+                self_s=int(self_us) / 1e6,
+                cumulative_s=int(cumulative_us) / 1e6,
+                depth=len(indent) // 2,
+            )
+        )
+    return records
+
+
+def measure_imports(module: str) -> list[ImportRecord]:
+    """
+    Imports a module in a fresh interpreter and records every import.
+
+    Args:
+        module (str): Dotted module name, e.g. ``src.penguin_classifier.app``.
+
+    Returns:
+        list[ImportRecord]: The parsed ``-X importtime`` output.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJ_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        errors = [
+            line
+            for line in result.stderr.splitlines()
+            if not line.startswith("import time:")
+        ]
+        raise RuntimeError(
+            f"Importing {module} failed:\n" + "\n".join(errors[-20:])
+        )
+    return parse_import_times(result.stderr)
+
+
+def summarize_imports(
+    module: str, records: list[ImportRecord], top: int = 10
+) -> dict:
+    """
+    Breaks the import time of an entry point down per package and module.
+
+    Args:
+        module (str): The imported entry point.
+        records (list[ImportRecord]): Its ``-X importtime`` records.
+        top (int): Packages and project modules to list.
+
+    Returns:
+        dict: ``total_s`` (sum of self times), ``packages`` (self time
+            per top-level package), ``project_modules`` (cumulative time
+            per project module, including what it imports) and
+            ``imported`` (all top-level packages).
+    """
+    per_package = {}
+    for record in records:
+        per_package[record.package] = (
+            per_package.get(record.package, 0.0) + record.self_s
+        )
+    packages = sorted(per_package.items(), key=lambda item: -item[1])
+    project = sorted(
+        (r for r in records if r.module.startswith(PROJECT_PACKAGE + ".")),
+        key=lambda r: -r.cumulative_s,
+    )
+    return {
+        "module": module,
+        "total_s": round(sum(r.self_s for r in records), 4),
+        "packages": {name: round(s, 4) for name, s in packages[:top]},
+        "project_modules": {
+            r.module: round(r.cumulative_s, 4) for r in project[:top]
+        },
+        "imported": sorted({r.module.split(".")[0] for r in records}),
+    }
+
+
+def check_budget(summary: dict, budget: dict) -> list[str]:
+    """
+    Compares an import summary with its budget.
+
+    Args:
+        summary (dict): Output of ``summarize_imports``.
+        budget (dict): ``max_import_s`` and ``forbidden`` packages, as in
+            ``STARTUP_BUDGETS``.
+
+    Returns:
+        list[str]: One message per violation (empty if within budget).
+    """
+    violations = []
+    max_import_s = budget.get("max_import_s")
+    if max_import_s is not None and summary["total_s"] > max_import_s:
+        violations.append(
+            f"{summary['module']} takes {summary['total_s']:.2f}s to import "
+            f"(budget {max_import_s:.2f}s)"
+        )
+    for package in budget.get("forbidden", ()):
+        if package in summary["imported"]:
+            violations.append(f"{summary['module']} imports {package}")
+    return violations
+
+
+def format_summary(summary: dict) -> str:
+    """Renders a summary as a plain-text report."""
+    lines = [f"{summary['module']}: {summary['total_s']:.3f}s"]
+    lines.append("  by package (self time):")
+    for name, seconds in summary["packages"].items():
+        lines.append(f"    {seconds * 1000:9.1f} ms  {name}")
+    lines.append("  project modules (cumulative):")
+    for name, seconds in summary["project_modules"].items():
+        lines.append(f"    {seconds * 1000:9.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for the import-time report."""
+    parser = argparse.ArgumentParser(
+        description="Report the import time of the entry points."
+    )
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        help="Modules to import (default: those in STARTUP_BUDGETS)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Packages and modules listed per entry point "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if an entry point exceeds its budget",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Also write the summaries as JSON"
+    )
+    args = parser.parse_args(argv)
+
+    summaries = []
+    violations = []
+    for module in args.modules or list(STARTUP_BUDGETS):
+        summary = summarize_imports(module, measure_imports(module), args.top)
+        summaries.append(summary)
+        violations += check_budget(summary, STARTUP_BUDGETS.get(module, {}))
+        print(format_summary(summary), end="\n\n")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(summaries, indent=2))
+    for violation in violations:
+        print(f"Over budget: {violation}")
+    if args.check and violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Synthetic penguin data for load tests, benchmarks and scaling studies.
+Fits one multivariate normal per species, island and sex to the raw data
+and samples any number of rows from it, deterministically per seed.
+"""
+
+import argparse
+from collections.abc import Iterator
+from pathlib import Path
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+from src.penguin_classifier.cache import ColumnarCache, data_cache
+from src.penguin_classifier.config import (
+    FEATURE_CONSTRAINTS,
+    NUMERICAL_FEATURES,
+    RANDOM_SEED,
+    RAW_DATA_PATH,
+    SYNTHETIC_MIN_GROUP_ROWS,
+)
+from src.penguin_classifier.dataset import load_data
+
+GROUP_COLUMNS = ["species", "island", "sex"]
+
+# Measurement resolution of the raw data
+_RESOLUTION = {
+    "bill_length_mm": 0.1,
+    "bill_depth_mm": 0.1,
+    "flipper_length_mm": 1.0,
+    "body_mass_g": 25.0,
+}
+
+# Rows are drawn in blocks with one random stream per block, so the output
+# for a seed does not depend on how it is consumed. Changing this value
+# changes the generated data.
+_BLOCK_ROWS = 10_000
+
+
+class PenguinGenerator:
+    """
+    Samples realistic penguins from per-group feature distributions.
+
+    A group is a combination of species, island and sex (missing sex is
+    its own group, as in the raw data). Every group has a share of rows, a
+    mean and a covariance of the numerical features and a distribution of
+    survey years. Rows with missing measurements occur at the rate of the
+    raw data, so the cleaning steps are exercised as well.
+    """
+
+    def __init__(
+        self,
+        groups: pd.DataFrame,
+        means: np.ndarray,
+        covariances: np.ndarray,
+        years: np.ndarray,
+        year_probabilities: np.ndarray,
+        missing_rate: float,
+    ):
+        self.groups = groups
+        self.means = means
+        self.cholesky = np.linalg.cholesky(covariances)
+        self.years = years
+        self.year_cdf = np.cumsum(year_probabilities, axis=1)
+        self.missing_rate = missing_rate
+
+    @classmethod
+    def fit(
+        cls,
+        df: pd.DataFrame,
+        min_group_rows: int = SYNTHETIC_MIN_GROUP_ROWS,
+    ) -> "PenguinGenerator":
+        """
+        Estimates the group distributions from raw penguin data.
+
+        Args:
+            df (pd.DataFrame): Raw data with the columns of ``RAW_DATA_PATH``.
+            min_group_rows (int): Smaller groups use the covariance of
+                their species.
+
+        Returns:
+            PenguinGenerator: The fitted generator.
+        """
+        complete = df[NUMERICAL_FEATURES].notna().all(axis="columns")
+        missing_rate = float(1 - complete.mean())
+        df = df[complete & df["species"].notna()]
+        years = np.sort(df["year"].unique())
+
+        species_cov = {
+            species: np.cov(rows[NUMERICAL_FEATURES].to_numpy(), rowvar=False)
+            for species, rows in df.groupby("species")
+        }
+        groups, means, covariances, year_probabilities = [], [], [], []
+        for key, rows in df.groupby(GROUP_COLUMNS, dropna=False):
+            values = rows[NUMERICAL_FEATURES].to_numpy()
+            species = key[0]
+            if len(rows) >= min_group_rows:
+                covariance = np.cov(values, rowvar=False)
+            else:
+                covariance = species_cov[species]
+            groups.append(dict(zip(GROUP_COLUMNS, key), rows=len(rows)))
+            means.append(values.mean(axis=0))
+            covariances.append(covariance)
+            counts = rows["year"].value_counts().reindex(years, fill_value=0)
+            year_probabilities.append(counts.to_numpy() / len(rows))
+
+        groups = pd.DataFrame(groups)
+        groups["share"] = groups["rows"] / groups["rows"].sum()
+        return cls(
+            groups=groups,
+            means=np.array(means),
+            covariances=np.array(covariances),
+            years=years,
+            year_probabilities=np.array(year_probabilities),
+            missing_rate=missing_rate,
+        )
+
+    def sample(self, n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        """
+        Draws penguins with the columns of the raw data.
+
+        Args:
+            n_rows (int): Number of rows.
+            rng (np.random.Generator): Source of randomness.
+
+        Returns:
+            pd.DataFrame: The sampled rows.
+        """
+        group = rng.choice(
+            len(self.groups), size=n_rows, p=self.groups["share"]
+        )
+        noise = rng.standard_normal((n_rows, len(NUMERICAL_FEATURES)))
+        values = self.means[group] + np.einsum(
+            "nij,nj->ni", self.cholesky[group], noise
+        )
+        missing = rng.random(n_rows) < self.missing_rate
+        year = (rng.random((n_rows, 1)) > self.year_cdf[group]).sum(axis=1)
+
+        data = {
+            column: self.groups[column].to_numpy(dtype=object)[group]
+            for column in GROUP_COLUMNS
+        }
+        for position, column in enumerate(NUMERICAL_FEATURES):
+            limits = FEATURE_CONSTRAINTS[column]
+            step = _RESOLUTION[column]
+            column_values = np.clip(
+                values[:, position], limits["min"], limits["max"]
+            )
+            column_values = np.round(np.round(column_values / step) * step, 1)
+            column_values[missing] = np.nan
+            data[column] = column_values
+        data["year"] = self.years[np.minimum(year, len(self.years) - 1)]
+
+        columns = ["species", "island", *NUMERICAL_FEATURES, "sex", "year"]
+        return pd.DataFrame(data)[columns]
+
+    def iter_chunks(
+        self, n_rows: int, seed: int = RANDOM_SEED
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Generates ``n_rows`` penguins in blocks of bounded size.
+
+        Args:
+            n_rows (int): Total number of rows.
+            seed (int): The same seed always yields the same rows.
+
+        Yields:
+            pd.DataFrame: Consecutive blocks of rows.
+        """
+        for block, start in enumerate(range(0, n_rows, _BLOCK_ROWS)):
+            rng = np.random.default_rng([seed, block])
+            yield self.sample(min(_BLOCK_ROWS, n_rows - start), rng)
+
+    def categories(self) -> dict[str, list[str]]:
+        """Returns every value the text columns can take."""
+        return {
+            column: [
+                value
+                for value in self.groups[column].unique()
+                if pd.notna(value)
+            ]
+            for column in GROUP_COLUMNS
+        }
+
+
+def write_synthetic_csv(
+    output_path: Path,
+    n_rows: int,
+    seed: int = RANDOM_SEED,
+    source_path: Path = RAW_DATA_PATH,
+    cache: ColumnarCache | None = None,
+) -> Path:
+    """
+    Streams synthetic penguins to a CSV file with the raw data layout.
+
+    Args:
+        output_path (Path): The CSV file to create.
+        n_rows (int): Number of rows.
+        seed (int): Random seed.
+        source_path (Path): Data the distributions are fitted to.
+        cache (ColumnarCache, optional): Also store the rows as the cached
+            parse of the CSV, so ``load_data`` maps them without parsing.
+
+    Returns:
+        Path: The written file.
+
+    Raises:
+        ValueError: If ``n_rows`` is not positive.
+    """
+    if n_rows < 1:
+        raise ValueError("At least one row must be generated")
+    generator = PenguinGenerator.fit(load_data(filepath=source_path))
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def chunks() -> Iterator[pd.DataFrame]:
+        with open(output_path, "w", newline="") as f:
+            for index, chunk in enumerate(generator.iter_chunks(n_rows, seed)):
+                chunk.to_csv(f, header=index == 0, index=False)
+                yield chunk
+
+    if cache is None:
+        for _ in chunks():
+            pass
+    else:
+        cache.write_chunks(
+            output_path, "csv", chunks(), n_rows, generator.categories()
+        )
+    logger.success(f"Wrote {n_rows} synthetic penguins to {output_path}")
+    return output_path
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for generating synthetic data."""
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic penguins with the raw data layout."
+    )
+    parser.add_argument("output", type=Path, help="CSV file to write")
+    parser.add_argument(
+        "--rows", type=int, required=True, help="Number of penguins"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=RANDOM_SEED,
+        help="Random seed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Also fill the columnar data cache while writing",
+    )
+    args = parser.parse_args(argv)
+
+    write_synthetic_csv(
+        output_path=args.output,
+        n_rows=args.rows,
+        seed=args.seed,
+        cache=data_cache if args.cache else None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,88 @@ Defines the reactive logic for the Dash application.
 Handles user inputs, validation, model predictions, and UI updates.
 """
 
-from dash import Input, Output, State, callback, ctx, no_update
-import dash_bootstrap_components as dbc
+import base64
+import binascii
+
+from dash import (
+    ClientsideFunction,
+    Input,
+    Output,
+    State,
+    callback,
+    clientside_callback,
+    ctx,
+    dcc,
+    no_update,
+)
 from loguru import logger
 import pandas as pd
 
-from src.penguin_classifier.config import FEATURE_CONSTRAINTS
-from src.penguin_classifier.dataset import load_combined_data, save_prediction
+from src.penguin_classifier.config import (
+    FEATURE_CONSTRAINTS,
+    PLOT_DATA_MAX_PATCH_ROWS,
+)
+from src.penguin_classifier.dataset import (
+    dataset_store,
+    load_combined_data,
+    save_prediction,
+)
+from src.penguin_classifier.jobs import job_manager
 from src.penguin_classifier.modeling.predict import (
     predict_single_penguin_proba,
 )
-from src.penguin_classifier.plots import create_scatter_plot
+from src.penguin_classifier.monitoring import INVALID_INPUTS, timed
+from src.penguin_classifier.plots import (
+    SPECIES_ORDER,
+    create_plot_data,
+    create_scatter_plot,
+    figure_cache,
+    patch_plot_data,
+    patch_scatter_plot,
+)
+from src.penguin_classifier.ui.table import query_history_page
+
+
+def _cached_figure(x_column: str, y_column: str) -> tuple[dict, int]:
+    """
+    Returns the scatter plot of the current dataset without highlight.
+
+    Args:
+        x_column (str): Feature on the X-axis.
+        y_column (str): Feature on the Y-axis.
+
+    Returns:
+        tuple[dict, int]: The (shared) figure and its dataset version.
+    """
+    version = dataset_store.snapshot().version
+
+    def build():
+        with timed("load_combined_data"):
+            df_historic = load_combined_data()
+        with timed("create_scatter_plot"):
+            return create_scatter_plot(
+                df_historic=df_historic,
+                x_column=x_column,
+                y_column=y_column,
+                size_column="body_mass_g",
+            )
+
+    # Sessions opened on the same data and axes share one figure
+    figure = figure_cache.get_or_create(
+        key=(x_column, y_column, "body_mass_g"),
+        version=version,
+        build=build,
+    )
+    return figure, version
+
+
+def warm_up_figure() -> None:
+    """
+    Builds the scatter plot of the default axes into the figure cache.
 
-# Load initial dataset for session start
-prediction_history = load_combined_data()
+    The first page load of every session then gets a cached figure.
+    """
+    _cached_figure(x_column="flipper_length_mm", y_column="bill_length_mm")
 
 
 @callback(
@@ -26,11 +94,11 @@ prediction_history = load_combined_data()
     Output(component_id="classification_result", component_property="is_open"),
     Output(component_id="classification_result", component_property="color"),
     Output(component_id="scatter_graph", component_property="figure"),
-    Output(component_id="table_container", component_property="children"),
+    Output(component_id="dataset_version", component_property="data"),
     Output(component_id="latest_prediction_store", component_property="data"),
     Input(component_id="classify_button", component_property="n_clicks"),
-    Input(component_id="scatter_x_axis", component_property="value"),
-    Input(component_id="scatter_y_axis", component_property="value"),
+    State(component_id="scatter_x_axis", component_property="value"),
+    State(component_id="scatter_y_axis", component_property="value"),
     State(component_id="island_input", component_property="value"),
     State(component_id="bill_length_mm_input", component_property="value"),
     State(component_id="bill_depth_mm_input", component_property="value"),
@@ -38,7 +106,9 @@ prediction_history = load_combined_data()
     State(component_id="body_mass_g_input", component_property="value"),
     State(component_id="sex_input", component_property="value"),
     State(component_id="latest_prediction_store", component_property="data"),
+    State(component_id="dataset_version", component_property="data"),
 )
+@timed("classify_penguin")
 def classify_penguin(
     n_clicks,
     x_axis,
@@ -50,102 +120,78 @@ def classify_penguin(
     body_mass_g,
     sex,
     latest_prediction,
+    figure_version=None,
 ):
     """
     Main callback that manages UI updates based on user interaction.
 
-    Processes three main scenarios:
+    Processes two main scenarios:
     1. Initial page load (setup).
-    2. Dynamic plot axis changes.
-    3. Classification of a new penguin observation.
+    2. Classification of a new penguin observation.
+
+    Axis changes are handled in the browser (see ``remapAxes``).
+
+    ``figure_version`` is the dataset version the displayed figure was built
+    from. If a classification only adds its own row on top of that version,
+    the figure is patched instead of rebuilt.
+
+    Every stage is timed (see ``monitoring.py``).
     """
     msg = "Please enter values and press Classify"
-    new_penguin_data = None
     trigger_id = ctx.triggered_id
 
     # --- Scenario 1: Initial Page Load ---
-    if (
-        trigger_id
-        not in ["classify_button", "scatter_x_axis", "scatter_y_axis"]
-        and n_clicks is None
-    ):
-        current_data = load_combined_data()
-        fig = create_scatter_plot(
-            df_historic=current_data,
+    if trigger_id != "classify_button" and n_clicks is None:
+        fig, version = _cached_figure(
             x_column=x_axis or "flipper_length_mm",
             y_column=y_axis or "bill_length_mm",
-            size_column="body_mass_g",
-            new_data=new_penguin_data,
         )
-        try:
-            updated_data = load_combined_data()
-            table = dbc.Table.from_dataframe(
-                updated_data, striped=True, bordered=True, hover=True
-            )
-        except FileNotFoundError:
-            table = "No historical data available yet."
-
         logger.info("Initial callback complete")
-        return msg, True, "info", fig, table, no_update
-
-    # --- Scenario 2: Dynamic Plot Update (X/Y Axis change) ---
-    if trigger_id in ["scatter_x_axis", "scatter_y_axis"]:
-        current_data = load_combined_data()
-        new_data = None
-        if latest_prediction:
-            try:
-                new_data = pd.DataFrame(latest_prediction)
-            except Exception:
-                logger.warning("Could not restore classification from store")
-
-        fig = create_scatter_plot(
-            df_historic=current_data,
-            x_column=x_axis,
-            y_column=y_axis,
-            size_column="body_mass_g",
-            new_data=new_data,
-        )
-        logger.info("Dynamic plot axes updated")
-        return no_update, no_update, no_update, fig, no_update, no_update
+        return msg, True, "info", fig, version, no_update
 
-    # --- Scenario 3: Classification Process (Button Click) ---
+    # --- Scenario 2: Classification Process (Button Click) ---
     if trigger_id == "classify_button":
-        # Validate Island Selection
-        if not island:
-            logger.warning("Missing island input")
-            msg = "Please select an island."
-            return msg, True, "danger", no_update, no_update, no_update
-
-        # Validate Numerical Inputs
-        inputs_to_validate = {
-            "bill_length_mm": bill_length_mm,
-            "bill_depth_mm": bill_depth_mm,
-            "flipper_length_mm": flipper_length_mm,
-            "body_mass_g": body_mass_g,
-        }
-        for feature_name, value in inputs_to_validate.items():
-            if value is None or value == "":
-                logger.warning(f"Missing value for {feature_name}")
-                msg = f"Please enter a valid value for '{feature_name}'."
+        with timed("validation"):
+            # Validate Island Selection
+            if not island:
+                logger.warning("Missing island input")
+                INVALID_INPUTS.inc(field="island")
+                msg = "Please select an island."
                 return msg, True, "danger", no_update, no_update, no_update
 
+            # Validate Numerical Inputs
+            inputs_to_validate = {
+                "bill_length_mm": bill_length_mm,
+                "bill_depth_mm": bill_depth_mm,
+                "flipper_length_mm": flipper_length_mm,
+                "body_mass_g": body_mass_g,
+            }
+            for feature_name, value in inputs_to_validate.items():
+                if value is None or value == "":
+                    logger.warning(f"Missing value for {feature_name}")
+                    INVALID_INPUTS.inc(field=feature_name)
+                    msg = f"Please enter a valid value for '{feature_name}'."
+                    return msg, True, "danger", no_update, no_update, no_update
+
         try:
             # Prepare data for prediction
-            penguin_attributes = pd.DataFrame(
-                {
-                    "island": [island],
-                    "bill_length_mm": [float(bill_length_mm)],
-                    "bill_depth_mm": [float(bill_depth_mm)],
-                    "flipper_length_mm": [float(flipper_length_mm)],
-                    "body_mass_g": [float(body_mass_g)],
-                    "sex": [sex],
-                }
-            )
+            with timed("parse_input"):
+                penguin_attributes = pd.DataFrame(
+                    {
+                        "island": [island],
+                        "bill_length_mm": [float(bill_length_mm)],
+                        "bill_depth_mm": [float(bill_depth_mm)],
+                        "flipper_length_mm": [float(flipper_length_mm)],
+                        "body_mass_g": [float(body_mass_g)],
+                        "sex": [sex],
+                    }
+                )
 
             # Execute prediction
-            species, proba = predict_single_penguin_proba(
-                features=penguin_attributes
-            )
+            with timed("predict"):
+                species, proba = predict_single_penguin_proba(
+                    features=penguin_attributes
+                )
             msg = (
                 f"Species: {species} --- Confidence: {round(proba * 100, 2)}%"
             )
@@ -156,28 +202,44 @@ def classify_penguin(
 
             # Save prediction to history
             penguin_attributes["species"] = species
-            save_prediction(penguin_attributes)
+            before = dataset_store.snapshot().version
+            with timed("save_prediction"):
+                save_prediction(penguin_attributes)
 
             # Update Store and Visuals
             store_data = penguin_attributes.to_dict("records")
-            refreshed_data = load_combined_data()
-
-            figure = create_scatter_plot(
-                df_historic=refreshed_data,
-                x_column=x_axis,
-                y_column=y_axis,
-                size_column="body_mass_g",
-                new_data=penguin_attributes,
-            )
 
-            table = dbc.Table.from_dataframe(
-                refreshed_data,
-                striped=True,
-                bordered=True,
-                hover=True,
-            )
+            # The figure version also tells the history table to refresh
+            if (
+                before
+                and figure_version == before
+                and dataset_store.version == before + 1
+                and species in SPECIES_ORDER
+            ):
+                # Only our row was added: send a delta, not the history
+                with timed("patch_scatter_plot"):
+                    figure = patch_scatter_plot(
+                        new_data=penguin_attributes,
+                        x_column=x_axis,
+                        y_column=y_axis,
+                        size_column="body_mass_g",
+                    )
+                version = before + 1
+            else:
+                # Read the version first; the data may only be newer
+                version = dataset_store.version
+                with timed("load_combined_data"):
+                    df_historic = load_combined_data()
+                with timed("create_scatter_plot"):
+                    figure = create_scatter_plot(
+                        df_historic=df_historic,
+                        x_column=x_axis,
+                        y_column=y_axis,
+                        size_column="body_mass_g",
+                        new_data=penguin_attributes,
+                    )
 
-            return msg, True, "success", figure, table, store_data
+            return msg, True, "success", figure, version, store_data
 
         except Exception as e:
             logger.exception("Error in Classification Callback:")
@@ -191,3 +253,190 @@ def classify_penguin(
             )
 
     return no_update, no_update, no_update, no_update, no_update, no_update
+
+
+@callback(
+    Output(component_id="plot_data", component_property="data"),
+    Output(component_id="plot_data_version", component_property="data"),
+    Input(component_id="dataset_version", component_property="data"),
+    State(component_id="plot_data_version", component_property="data"),
+)
+def sync_plot_data(version, plot_version):
+    """
+    Keeps the browser's copy of the plot columns at the dataset version.
+
+    The columns are sent once; afterwards only rows added since
+    ``plot_version`` are appended, unless too many were added.
+    """
+    snapshot = dataset_store.snapshot()
+    if plot_version == snapshot.version:
+        return no_update, no_update
+
+    added = snapshot.version - (plot_version or 0)
+    if plot_version is not None and 0 < added <= PLOT_DATA_MAX_PATCH_ROWS:
+        # Newest rows come first in the snapshot
+        new_rows = snapshot.data.iloc[:added].iloc[::-1]
+        return patch_plot_data(new_rows, snapshot.version), snapshot.version
+
+    plot_data = create_plot_data(
+        snapshot.data, snapshot.version, size_column="body_mass_g"
+    )
+    return plot_data, snapshot.version
+
+
+# Axis changes remap the trace coordinates in the browser (assets/plots.js)
+clientside_callback(
+    ClientsideFunction(namespace="penguins", function_name="remapAxes"),
+    Output(
+        component_id="scatter_graph",
+        component_property="figure",
+        allow_duplicate=True,
+    ),
+    Input(component_id="scatter_x_axis", component_property="value"),
+    Input(component_id="scatter_y_axis", component_property="value"),
+    State(component_id="plot_data", component_property="data"),
+    State(component_id="latest_prediction_store", component_property="data"),
+    State(component_id="scatter_graph", component_property="figure"),
+    prevent_initial_call=True,
+)
+
+
+@callback(
+    Output(component_id="history_table", component_property="data"),
+    Output(component_id="history_table", component_property="page_count"),
+    Input(component_id="history_table", component_property="page_current"),
+    Input(component_id="history_table", component_property="page_size"),
+    Input(component_id="history_table", component_property="sort_by"),
+    Input(component_id="history_table", component_property="filter_query"),
+    Input(component_id="dataset_version", component_property="data"),
+)
+@timed("table_render")
+def update_history_table(
+    page_current, page_size, sort_by, filter_query, version
+):
+    """
+    Serves one page of the prediction history.
+
+    Filtering, sorting and paging happen on the server, so the response
+    size depends on the page size only, not on the length of the history.
+    """
+    snapshot = dataset_store.snapshot()
+    return query_history_page(
+        data=snapshot.data,
+        version=snapshot.version,
+        page_current=page_current,
+        page_size=page_size,
+        sort_by=sort_by,
+        filter_query=filter_query,
+    )
+
+
+@callback(
+    Output(component_id="batch_job_id", component_property="data"),
+    Output(component_id="batch_poll", component_property="disabled"),
+    Output(component_id="batch_status", component_property="children"),
+    Output(
+        component_id="batch_download_button", component_property="disabled"
+    ),
+    Input(component_id="batch_upload", component_property="contents"),
+    State(component_id="batch_upload", component_property="filename"),
+    prevent_initial_call=True,
+)
+def start_batch_job(contents, filename):
+    """
+    Hands an uploaded CSV file to a background classification job.
+
+    The request only decodes and stores the file; scoring happens in the
+    job process, whose progress is polled by ``poll_batch_job``.
+    """
+    if not contents:
+        return no_update, no_update, no_update, no_update
+    try:
+        _, encoded = contents.split(",", 1)
+        content = base64.b64decode(encoded, validate=True)
+    except (ValueError, binascii.Error):
+        logger.warning(f"Could not decode upload {filename}")
+        return no_update, True, "Could not read the uploaded file.", True
+
+    job_id = job_manager.submit(filename, content)
+    return job_id, False, f"Queued {filename} ...", True
+
+
+@callback(
+    Output(component_id="batch_progress", component_property="value"),
+    Output(component_id="batch_progress", component_property="label"),
+    Output(
+        component_id="batch_status",
+        component_property="children",
+        allow_duplicate=True,
+    ),
+    Output(
+        component_id="batch_poll",
+        component_property="disabled",
+        allow_duplicate=True,
+    ),
+    Output(
+        component_id="batch_download_button",
+        component_property="disabled",
+        allow_duplicate=True,
+    ),
+    Output(
+        component_id="scatter_graph",
+        component_property="figure",
+        allow_duplicate=True,
+    ),
+    Output(
+        component_id="dataset_version",
+        component_property="data",
+        allow_duplicate=True,
+    ),
+    Input(component_id="batch_poll", component_property="n_intervals"),
+    State(component_id="batch_job_id", component_property="data"),
+    State(component_id="scatter_x_axis", component_property="value"),
+    State(component_id="scatter_y_axis", component_property="value"),
+    prevent_initial_call=True,
+)
+def poll_batch_job(n_intervals, job_id, x_axis, y_axis):
+    """
+    Reports the progress of the running batch job.
+
+    Once the job is done, the download is enabled and the plot and table
+    are refreshed to include the newly classified rows.
+    """
+    status = job_manager.status(job_id)
+    if status is None:
+        return 0, "", "Unknown job.", True, True, no_update, no_update
+
+    total = status["rows_total"] or 1
+    progress = min(100, round(100 * status["rows_done"] / total))
+    if status["state"] == "failed":
+        msg = f"Job failed: {status.get('error', 'unknown error')}"
+        return progress, "", msg, True, True, no_update, no_update
+    if status["state"] != "done":
+        msg = f"Classifying {status['filename']}: {status['rows_done']} rows"
+        return progress, f"{progress}%", msg, False, True, no_update, no_update
+
+    figure, version = _cached_figure(x_axis, y_axis)
+    msg = (
+        f"Classified {status['valid_rows']} of {status['rows_total']} rows "
+        f"from {status['filename']}"
+    )
+    logger.info(f"Batch job {job_id} complete")
+    return 100, "100%", msg, True, False, figure, version
+
+
+@callback(
+    Output(component_id="batch_download", component_property="data"),
+    Input(component_id="batch_download_button", component_property="n_clicks"),
+    State(component_id="batch_job_id", component_property="data"),
+    prevent_initial_call=True,
+)
+def download_batch_result(n_clicks, job_id):
+    """Sends the scored file of the finished batch job to the browser."""
+    path = job_manager.result_path(job_id)
+    if path is None:
+        return no_update
+    filename = job_manager.status(job_id)["filename"]
+    return dcc.send_file(
+        path, filename=f"{filename.rsplit('.', 1)[0]}_predictions.csv"
+    )
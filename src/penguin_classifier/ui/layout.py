@@ -14,10 +14,13 @@ from src.penguin_classifier.config import (
     FEATURE_CONSTRAINTS,
     FEATURES,
     ISLAND_OPTIONS,
+    JOB_MAX_UPLOAD_BYTES,
+    JOB_POLL_INTERVAL_MS,
     METRICS_PATH,
     OFFSET,
     SEX_OPTIONS,
 )
+from src.penguin_classifier.ui.table import create_history_table
 
 # Human-readable labels for the UI
 FIELD_LABELS = {
@@ -127,6 +130,56 @@ def _create_performance_card() -> dbc.Card:
     )
 
 
+def _create_batch_card() -> dbc.Card:
+    """
+    Creates the card for classifying a whole CSV file in the background.
+
+    Shows the upload area, the progress of the running job and a download
+    button for the scored file.
+    """
+    return dbc.Card(
+        dbc.CardBody(
+            [
+                dbc.Label("Batch Classification"),
+                dcc.Upload(
+                    id="batch_upload",
+                    children=html.Div(
+                        ["Drop a CSV file or ", html.A("select one")]
+                    ),
+                    accept=".csv",
+                    max_size=JOB_MAX_UPLOAD_BYTES,
+                    multiple=False,
+                    className="border border-secondary rounded text-center p-2 small",
+                    style={"borderStyle": "dashed", "cursor": "pointer"},
+                ),
+                dbc.Progress(
+                    id="batch_progress",
+                    value=0,
+                    striped=True,
+                    className="mt-2",
+                ),
+                dbc.FormText(id="batch_status", color="secondary"),
+                dbc.Button(
+                    children="Download Results",
+                    id="batch_download_button",
+                    color="secondary",
+                    size="sm",
+                    disabled=True,
+                    className="w-100 mt-2",
+                ),
+                dcc.Download(id="batch_download"),
+                dcc.Interval(
+                    id="batch_poll",
+                    interval=JOB_POLL_INTERVAL_MS,
+                    disabled=True,
+                ),
+                dcc.Store(id="batch_job_id"),
+            ]
+        ),
+        className="shadow-sm border-0 mt-3",
+    )
+
+
 def _create_select(
     label: str, options: list[dict], required: bool = False
 ) -> dbc.Select:
@@ -215,6 +268,9 @@ def create_layout() -> dbc.Container:
     return dbc.Container(
         children=[
             dcc.Store(id="latest_prediction_store"),
+            dcc.Store(id="dataset_version"),
+            dcc.Store(id="plot_data"),
+            dcc.Store(id="plot_data_version"),
             dbc.Row(
                 children=[
                     # --- SIDEBAR: USER INPUT ---
@@ -273,6 +329,7 @@ def create_layout() -> dbc.Container:
                                 ),
                                 className="shadow-sm border-0",
                             ),
+                            _create_batch_card(),
                         ],
                     ),
                     # --- MAIN CONTENT: RESULTS & ANALYSIS ---
@@ -367,6 +424,7 @@ def create_layout() -> dbc.Container:
                                                     dbc.CardBody(
                                                         html.Div(
                                                             id="table_container",
+                                                            children=create_history_table(),
                                                             style={
                                                                 "maxHeight": "430px",
                                                                 "overflowY": "auto",
@@ -0,0 +1,201 @@
+"""
+Server-side paged, sorted and filtered prediction history table.
+Only the rows of the visible page are sent to the browser.
+"""
+
+from collections import OrderedDict
+import threading
+
+from dash import dash_table
+import numpy as np
+import pandas as pd
+
+from src.penguin_classifier.config import (
+    CSV_HEADER,
+    HISTORY_PAGE_SIZE,
+    NUMERICAL_FEATURES,
+)
+
+# Operators of the DataTable filter row: word and symbolic spellings,
+# longest match first
+FILTER_OPERATORS = [
+    (("ge ", ">="), ">="),
+    (("le ", "<="), "<="),
+    (("lt ", "<"), "<"),
+    (("gt ", ">"), ">"),
+    (("ne ", "!="), "!="),
+    (("eq ", "="), "="),
+    (("contains ",), "contains"),
+    (("datestartswith ",), "datestartswith"),
+]
+
+# Row orders for recent (version, sort, filter) combinations
+_ORDER_CACHE_SIZE = 16
+_order_cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+_order_cache_lock = threading.Lock()
+
+
+def create_history_table() -> dash_table.DataTable:
+    """
+    Creates the history DataTable with custom (server-side) paging.
+
+    Returns:
+        dash_table.DataTable: Empty table; pages are filled by a callback.
+    """
+    return dash_table.DataTable(
+        id="history_table",
+        columns=[
+            {
+                "name": column,
+                "id": column,
+                "type": "numeric" if column in NUMERICAL_FEATURES else "text",
+            }
+            for column in CSV_HEADER
+        ],
+        data=[],
+        page_current=0,
+        page_size=HISTORY_PAGE_SIZE,
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        style_table={"overflowX": "auto"},
+        style_cell={"fontSize": "0.85rem", "padding": "4px"},
+        style_header={"fontWeight": "bold"},
+        style_data_conditional=[
+            {"if": {"row_index": "odd"}, "backgroundColor": "#f8f9fa"}
+        ],
+    )
+
+
+def split_filter_part(filter_part: str) -> tuple[str, str, object]:
+    """
+    Parses one ``{column} operator value`` clause of a DataTable filter.
+
+    Args:
+        filter_part (str): A single clause of ``filter_query``.
+
+    Returns:
+        tuple[str, str, object]: Column, operator and value, or
+            ``(None, None, None)`` if the clause cannot be parsed.
+    """
+    name_end = filter_part.find("}")
+    if name_end == -1:
+        return None, None, None
+    name = filter_part[filter_part.find("{") + 1 : name_end]
+    rest = filter_part[name_end + 1 :].lstrip()
+    for tokens, operator in FILTER_OPERATORS:
+        token = next((t for t in tokens if rest.startswith(t)), None)
+        if token is None:
+            continue
+        value_part = rest[len(token) :].strip()
+        if value_part and value_part[0] == value_part[-1] in "'\"`":
+            value = value_part[1:-1].replace(
+                "\\" + value_part[0], value_part[0]
+            )
+        else:
+            try:
+                value = float(value_part)
+            except ValueError:
+                value = value_part
+        return name, operator, value
+    return None, None, None
+
+
+def _filter_mask(data: pd.DataFrame, filter_query: str) -> np.ndarray:
+    """Evaluates a DataTable filter query to a boolean row mask."""
+    mask = np.ones(len(data), dtype=bool)
+    for filter_part in (filter_query or "").split(" && "):
+        column, operator, value = split_filter_part(filter_part)
+        if column not in data.columns:
+            continue
+        series = data[column]
+        if operator == "contains":
+            matches = series.astype(str).str.contains(
+                str(value), case=False, regex=False
+            )
+        elif operator == "datestartswith":
+            matches = series.astype(str).str.startswith(str(value))
+        elif column not in NUMERICAL_FEATURES and operator in ("=", "!="):
+            matches = series.astype(str) == str(value)
+            if operator == "!=":
+                matches = ~matches
+        else:
+            try:
+                numeric = pd.to_numeric(series, errors="coerce")
+                matches = {
+                    ">=": numeric >= value,
+                    "<=": numeric <= value,
+                    "<": numeric < value,
+                    ">": numeric > value,
+                    "!=": numeric != value,
+                    "=": numeric == value,
+                }[operator]
+            except TypeError:
+                continue
+        mask &= matches.fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+def _row_order(
+    data: pd.DataFrame, version: int, sort_by: list, filter_query: str
+) -> np.ndarray:
+    """Positions of filtered rows in display order, cached per version."""
+    sort_key = tuple(
+        (item["column_id"], item["direction"]) for item in sort_by or []
+    )
+    key = (id(data), version, sort_key, filter_query or "")
+    with _order_cache_lock:
+        if key in _order_cache:
+            _order_cache.move_to_end(key)
+            return _order_cache[key]
+
+    positions = np.flatnonzero(_filter_mask(data, filter_query))
+    columns = [c for c, _ in sort_key if c in data.columns]
+    if columns:
+        ascending = [d == "asc" for c, d in sort_key if c in data.columns]
+        filtered = data.iloc[positions]
+        order = filtered.reset_index(drop=True).sort_values(
+            columns, ascending=ascending, kind="stable"
+        )
+        positions = positions[order.index.to_numpy()]
+
+    with _order_cache_lock:
+        _order_cache[key] = positions
+        while len(_order_cache) > _ORDER_CACHE_SIZE:
+            _order_cache.popitem(last=False)
+    return positions
+
+
+def query_history_page(
+    data: pd.DataFrame,
+    version: int,
+    page_current: int,
+    page_size: int,
+    sort_by: list | None = None,
+    filter_query: str = "",
+) -> tuple[list[dict], int]:
+    """
+    Computes one page of the filtered and sorted history.
+
+    Args:
+        data (pd.DataFrame): The combined dataset (newest first).
+        version (int): Dataset version ``data`` belongs to.
+        page_current (int): Zero-based page number.
+        page_size (int): Rows per page.
+        sort_by (list, optional): DataTable ``sort_by`` entries.
+        filter_query (str): DataTable ``filter_query`` expression.
+
+    Returns:
+        tuple[list[dict], int]: Records of the page and the page count.
+    """
+    positions = _row_order(data, version, sort_by, filter_query)
+    page_count = max(1, -(-len(positions) // page_size))
+    page_current = min(page_current or 0, page_count - 1)
+    start = page_current * page_size
+    page = data.iloc[positions[start : start + page_size]]
+    # NaN is not valid JSON; empty cells are sent as null
+    page = page.astype(object).where(page.notna(), None)
+    return page.to_dict("records"), page_count
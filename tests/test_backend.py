@@ -1,10 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import json
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+from flask import Flask
+import joblib
+import numpy as np
 import pandas as pd
 import pytest
-from src.penguin_classifier.dataset import clean_data
+from benchmarks.hot_paths import compare, isolated_dataset, run_benchmarks
+from benchmarks.load_test import LoadGenerator
+from src.penguin_classifier.api import MicroBatcher, register_api
+from src.penguin_classifier.cache import ColumnarCache
+from src.penguin_classifier.config import (
+    MODEL_PATH,
+    ONLINE_MODEL_PATH,
+    RAW_DATA_PATH,
+)
+from src.penguin_classifier.dataset import (
+    DatasetStore,
+    PredictionHistoryWriter,
+    clean_data,
+    split_labeled_rows,
+    verified_labels_writer,
+)
+from src.penguin_classifier.jobs import JobManager, run_job
+from src.penguin_classifier.modeling.batch import predict_csv
+from src.penguin_classifier.modeling.compiled import CompiledPipeline
+from src.penguin_classifier.modeling.online import OnlineLearner
+from src.penguin_classifier.modeling.out_of_core import (
+    is_test_row,
+    row_hashes,
+    train_out_of_core,
+)
+from src.penguin_classifier.modeling.search import (
+    HalvingStrategy,
+    RandomStrategy,
+    SearchBudget,
+    SearchStrategy,
+    run_search,
+    warm_path_search,
+)
 from src.penguin_classifier.modeling.predict import (
+    ModelHolder,
     predict_single_penguin_proba,
 )
+from sklearn.metrics import classification_report
+from src.penguin_classifier.startup import (
+    check_budget,
+    measure_imports,
+    summarize_imports,
+)
+from src.penguin_classifier.synthetic import write_synthetic_csv
 from sklearn.pipeline import Pipeline
+from src.penguin_classifier.modeling import train
+from src.penguin_classifier.modeling.run_cache import RunCache
 from src.penguin_classifier.modeling.train import build_pipeline
 
 from dash import html
@@ -85,3 +139,618 @@ def test_layout_creation():
     assert isinstance(layout, dbc.Container), (
         "Layout must be a Bootstrap Container"
     )
+
+
+def test_model_holder_reuses_and_hot_reloads(tmp_path):
+    """The holder keeps one snapshot and swaps it when the file changes."""
+    artifact = tmp_path / "pipeline.joblib"
+    joblib.dump({"version": 1}, artifact)
+    holder = ModelHolder(artifact, check_interval=3600)
+
+    first = holder.get()
+    assert first.pipeline == {"version": 1}
+    assert holder.get() is first, "unchanged artifact must not be reloaded"
+    assert holder.reload() is False
+
+    joblib.dump({"version": 2}, artifact)
+    assert holder.reload() is True
+    assert holder.get().pipeline == {"version": 2}
+    assert holder.get().digest != first.digest
+
+
+def test_compiled_pipeline_matches_sklearn(valid_penguin_features):
+    """The NumPy fast path must reproduce the sklearn pipeline exactly."""
+    pipeline = joblib.load(MODEL_PATH)
+    compiled = CompiledPipeline.from_pipeline(pipeline)
+
+    batch = pd.concat([valid_penguin_features] * 3, ignore_index=True)
+    batch.loc[1, "island"] = "Atlantis"  # unknown category
+    batch.loc[2, "sex"] = np.nan  # missing category seen in training
+    labels, proba = compiled.predict(batch)
+
+    np.testing.assert_array_equal(labels, pipeline.predict(batch))
+    np.testing.assert_allclose(proba, pipeline.predict_proba(batch))
+
+    record = valid_penguin_features.iloc[0].to_dict()
+    record["sex"] = None
+    _, single_proba = compiled.predict(record)
+    expected = pipeline.predict_proba(pd.DataFrame([record]))
+    np.testing.assert_allclose(single_proba, expected)
+
+
+def test_predict_csv_streams_chunks_in_order(tmp_path, raw_data_sample):
+    """Chunked scoring keeps every row in order and skips invalid ones."""
+    input_path = tmp_path / "survey.csv"
+    output_path = tmp_path / "scored.csv"
+    raw_data_sample.drop(columns="species").to_csv(input_path, index=False)
+
+    stats = predict_csv(input_path, output_path, chunk_size=1, workers=1)
+    scored = pd.read_csv(output_path)
+
+    assert stats == {"rows": 4, "valid_rows": 3}
+    assert scored["year"].tolist() == raw_data_sample["year"].tolist()
+    assert scored["predicted_species"].isna().tolist() == [
+        False,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    """Concurrent submissions are scored in fewer, larger model calls."""
+    batch_sizes = []
+
+    def fake_predict(records):
+        batch_sizes.append(len(records))
+        values = np.array([record["id"] for record in records])
+        # Labels of the probability columns of the model used for the call
+        return values, values.reshape(-1, 1), [f"model-{len(batch_sizes)}"]
+
+    batcher = MicroBatcher(fake_predict, window_ms=50, max_batch_size=64)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = list(
+            pool.map(lambda i: batcher.submit([{"id": i}]), range(32))
+        )
+    results = [future.result(timeout=5) for future in futures]
+
+    assert [int(species[0]) for species, _, _ in results] == list(range(32))
+    assert {classes[0] for _, _, classes in results} == {
+        f"model-{call + 1}" for call in range(len(batch_sizes))
+    }
+    assert sum(batch_sizes) == 32
+    assert len(batch_sizes) < 32, "requests should share model calls"
+
+
+def test_api_predict_single_and_batch(valid_penguin_features):
+    """The REST endpoint accepts one record or a list and validates input."""
+    server = Flask(__name__)
+    register_api(server)
+    client = server.test_client()
+    record = valid_penguin_features.iloc[0].to_dict()
+
+    single = client.post("/api/predict", json=record)
+    assert single.status_code == 200
+    assert len(single.get_json()["predictions"]) == 1
+
+    batch = client.post("/api/predict", json={"records": [record] * 3})
+    predictions = batch.get_json()["predictions"]
+    assert len(predictions) == 3
+    assert predictions[0]["species"] in ["Adelie", "Chinstrap", "Gentoo"]
+    assert 0 <= predictions[0]["confidence"] <= 1.0
+
+    invalid = client.post("/api/predict", json={**record, "body_mass_g": "x"})
+    assert invalid.status_code == 400
+    huge = client.post("/api/predict", json={**record, "body_mass_g": 10**400})
+    assert huge.status_code == 400
+    assert "out of range" in huge.get_json()["error"]
+
+
+def test_history_writer_group_commits(tmp_path, valid_penguin_features):
+    """Queued records stay visible until flushed and are written intact."""
+    history_path = tmp_path / "prediction_history.csv"
+    record = valid_penguin_features.iloc[0].to_dict() | {"species": "Adelie"}
+    writers = [
+        PredictionHistoryWriter(history_path, flush_interval=3600)
+        for _ in range(2)
+    ]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for i in range(40):
+            pool.submit(writers[i % 2].append, [record])
+    assert len(writers[0].pending()) == 20
+    assert not history_path.exists(), "no file I/O before a flush"
+
+    for writer in writers:
+        writer.close()
+    history = pd.read_csv(history_path)
+
+    assert len(history) == 40
+    assert history["species"].eq("Adelie").all()
+    assert history["body_mass_g"].eq(record["body_mass_g"]).all()
+    assert writers[0].pending() == []
+
+
+def test_history_writer_retries_failed_batch(tmp_path, valid_penguin_features):
+    """A batch that fails to write is queued again, ahead of newer records."""
+    history_path = tmp_path / "prediction_history.csv"
+    writer = PredictionHistoryWriter(history_path, flush_interval=3600)
+    record = valid_penguin_features.iloc[0].to_dict()
+    write = writer._write
+
+    def fail_once(records):
+        writer._write = write
+        raise OSError(28, "No space left on device")
+
+    writer.append([record | {"species": "Adelie"}])
+    writer._write = fail_once
+    with pytest.raises(OSError):
+        writer.flush()
+    assert [r["species"] for r in writer.pending()] == ["Adelie"]
+
+    writer.append([record | {"species": "Gentoo"}])
+    writer.close()
+
+    history = pd.read_csv(history_path)
+    assert history["species"].tolist() == ["Adelie", "Gentoo"]
+    assert writer.pending() == []
+
+
+def test_dataset_store_appends_incrementally(
+    tmp_path, raw_data_sample, valid_penguin_features
+):
+    """Own and foreign predictions each show up exactly once, newest first."""
+    raw_path = tmp_path / "data.csv"
+    history_path = tmp_path / "prediction_history.csv"
+    raw_data_sample.to_csv(raw_path, index=False)
+    writer = PredictionHistoryWriter(history_path, flush_interval=3600)
+    other_process = PredictionHistoryWriter(history_path, flush_interval=3600)
+    cache = ColumnarCache(tmp_path / "cache")
+    store = DatasetStore(raw_path, writer=writer, cache=cache)
+    record = valid_penguin_features.iloc[0].to_dict()
+
+    initial = store.snapshot()
+    assert initial.version == 2
+
+    store.append([record | {"species": "Gentoo"}])
+    assert store.snapshot().data.iloc[0]["species"] == "Gentoo"
+
+    writer.flush()
+    other_process.append([record | {"species": "Chinstrap"}])
+    other_process.flush()
+    latest = store.snapshot()
+
+    assert latest.version == 4
+    assert latest.data["species"].tolist()[:2] == ["Chinstrap", "Gentoo"]
+    assert len(initial.data) == 2, "older snapshots must not change"
+    assert store.snapshot() is latest, "unchanged data reuses the view"
+
+    writer.close()
+    restarted = DatasetStore(raw_path, writer=writer, cache=cache)
+    assert restarted.snapshot().data["species"].tolist() == (
+        latest.data["species"].tolist()
+    ), "a restart must rebuild the same data from the cached history"
+
+
+def test_columnar_cache_roundtrip_and_invalidation(tmp_path, raw_data_sample):
+    """Cached frames equal the parsed CSV and follow content changes."""
+    source = tmp_path / "data.csv"
+    raw_data_sample.to_csv(source, index=False)
+    cache = ColumnarCache(tmp_path / "cache")
+
+    cache.read_csv(source)
+    cached = cache.read_csv(source)
+    pd.testing.assert_frame_equal(
+        cached, pd.read_csv(source), check_index_type=False
+    )
+
+    raw_data_sample.assign(year=2020).to_csv(source, index=False)
+    assert cache.read_csv(source)["year"].eq(2020).all()
+
+    with open(source, "a") as f:
+        f.write("Adelie,Dream,40.0,18.0,190.0,3500.0,male,2021\n")
+    prefix, length = cache.read_prefix(source, "csv")
+    assert len(prefix) == len(raw_data_sample)
+    assert length < source.stat().st_size, "appends keep the prefix valid"
+
+
+def test_background_job_scores_upload_and_persists_chunks(
+    tmp_path, raw_data_sample
+):
+    """Uploads are queued on disk and scored chunk by chunk by the job."""
+    manager = JobManager(jobs_dir=tmp_path)
+    content = raw_data_sample.drop(columns="species").to_csv(index=False)
+    with patch("src.penguin_classifier.jobs.subprocess.Popen") as popen:
+        popen.return_value.pid = os.getpid()
+        job_id = manager.submit("survey.csv", content.encode())
+    popen.assert_called_once()
+    status = manager.status(job_id)
+    assert status["state"] == "queued"
+    assert status["rows_total"] == 4
+    assert manager.result_path(job_id) is None
+
+    with (
+        patch("src.penguin_classifier.jobs.JOB_CHUNK_SIZE", 2),
+        patch("src.penguin_classifier.jobs.save_prediction") as save,
+        patch("src.penguin_classifier.jobs.history_writer"),
+    ):
+        run_job(tmp_path / job_id)
+
+    status = manager.status(job_id)
+    assert status["state"] == "done"
+    assert (status["rows_done"], status["valid_rows"]) == (4, 3)
+    # One history append per chunk, invalid rows are not persisted
+    saved = [call.args[0] for call in save.call_args_list]
+    assert [len(frame) for frame in saved] == [2, 1]
+    assert saved[0]["species"].notna().all()
+    assert len(pd.read_csv(manager.result_path(job_id))) == 4
+    assert manager.status("../etc") is None
+
+
+def test_job_that_dies_before_starting_is_reported_failed(tmp_path):
+    """A job process that exits while queued does not stay queued."""
+    manager = JobManager(jobs_dir=tmp_path)
+    crashing = subprocess.Popen([sys.executable, "-c", "raise SystemExit(1)"])
+    with patch(
+        "src.penguin_classifier.jobs.subprocess.Popen", return_value=crashing
+    ):
+        job_id = manager.submit("survey.csv", b"island\nDream\n")
+    crashing.wait()
+
+    for _ in range(100):
+        status = manager.status(job_id)
+        if status["state"] != "queued":
+            break
+        time.sleep(0.05)
+    assert status["state"] == "failed"
+    assert status["pid"] == crashing.pid
+
+
+@pytest.fixture
+def synthetic_training_data():
+    rng = np.random.default_rng(0)
+    species = np.repeat(["Adelie", "Chinstrap", "Gentoo"], 40)
+    offset = np.repeat([0.0, 1.0, 2.0], 40)
+    X = pd.DataFrame(
+        {
+            "island": rng.choice(["Biscoe", "Dream", "Torgersen"], 120),
+            "bill_length_mm": 39 + 5 * offset + rng.normal(0, 3, 120),
+            "bill_depth_mm": 18 - offset + rng.normal(0, 1.5, 120),
+            "flipper_length_mm": 190 + 10 * offset + rng.normal(0, 8, 120),
+            "body_mass_g": 3700 + 600 * offset + rng.normal(0, 500, 120),
+            "sex": rng.choice(["male", "female"], 120),
+        }
+    )
+    return X, pd.Series(species, name="species")
+
+
+def test_warm_path_search_matches_grid_search(synthetic_training_data):
+    """Cached folds and warm starts select what GridSearchCV selects."""
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+
+    X, y = synthetic_training_data
+    param_grid = {
+        "classifier__C": [0.01, 0.1, 1.0],
+        "classifier__solver": ["lbfgs", "newton-cg"],
+    }
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=0)
+    reference = GridSearchCV(
+        build_pipeline(), param_grid, cv=cv, scoring="accuracy"
+    ).fit(X, y)
+
+    result = warm_path_search(build_pipeline(), param_grid, X, y, cv, n_jobs=1)
+
+    assert result.best_params == reference.best_params_
+    assert [c["params"] for c in result.candidates] == list(
+        reference.cv_results_["params"]
+    )
+    np.testing.assert_allclose(
+        [c["mean_score"] for c in result.candidates],
+        reference.cv_results_["mean_test_score"],
+        atol=0.02,
+    )
+    assert set(result.timings) == {"preprocess", "fit", "score", "cv"}
+
+    with pytest.raises(ValueError):
+        warm_path_search(
+            build_pipeline(), {"preprocessor__remainder": ["drop"]}, X, y, cv
+        )
+
+
+def test_search_strategies_respect_budget(synthetic_training_data):
+    """Halving and random search need fewer fits; budgets stop early."""
+    from sklearn.model_selection import StratifiedKFold
+
+    X, y = synthetic_training_data
+    param_grid = {
+        "classifier__C": [0.001, 0.01, 0.1, 1.0, 10.0, 100.0],
+        "classifier__solver": ["lbfgs", "newton-cg", "newton-cholesky"],
+    }
+    cv = StratifiedKFold(n_splits=4, shuffle=True, random_state=0)
+
+    def search(**kwargs):
+        return run_search(
+            build_pipeline(), param_grid, X, y, cv, n_jobs=1, **kwargs
+        )
+
+    grid = search()
+    assert grid.fits == 18 * 4 and not grid.stopped_early
+
+    halving = search(strategy=HalvingStrategy(factor=2, min_folds=1))
+    assert halving.fits < grid.fits
+    finalists = [c for c in halving.candidates if c["folds"] == 4]
+    assert 1 <= len(finalists) < len(halving.candidates) == 18
+    assert halving.best_params in [c["params"] for c in finalists]
+
+    random = search(strategy=RandomStrategy(n_candidates=5, seed=1))
+    assert len(random.candidates) == 5
+    assert random.fits == 5 * 4
+
+    limited = search(budget=SearchBudget(max_fits=6))
+    assert limited.stopped_early
+    assert limited.fits < grid.fits
+    assert limited.best_params in [c["params"] for c in limited.candidates]
+
+    class Incomplete(SearchStrategy):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_online_learner_consumes_only_new_rows(
+    tmp_path, synthetic_training_data
+):
+    """Each update learns the rows appended since the last one, once."""
+    X, y = synthetic_training_data
+    labeled = X.assign(species=y).sample(frac=1.0, random_state=0)
+    labels_path = tmp_path / "verified.csv"
+    labeled.iloc[:60].to_csv(labels_path, index=False)
+
+    def learner():
+        return OnlineLearner(
+            labels_path=labels_path,
+            state_path=tmp_path / "state.joblib",
+            model_path=tmp_path / "model.joblib",
+            batch_size=16,
+        )
+
+    first = learner()
+    scaler = first.state.pipeline.named_steps["preprocessor"]
+    bootstrap_rows = scaler.named_transformers_["num"].n_samples_seen_
+    bootstrap_accuracy = (first.state.pipeline.predict(X) == y).mean()
+    assert first.update() == 60
+    assert first.update() == 0
+
+    # A restarted learner resumes after the rows it already learned and
+    # leaves a row that is still being written for the next update
+    with open(labels_path, "a") as f:
+        f.write(labeled.iloc[60:].to_csv(index=False, header=False))
+        f.write("Adelie,Dream,39.0")
+    resumed = learner()
+    assert resumed.update() == 60
+    assert resumed.state.rows_seen == 120
+    scaler = resumed.state.pipeline.named_steps["preprocessor"]
+    assert scaler.named_transformers_["num"].n_samples_seen_ == (
+        bootstrap_rows + 120
+    )
+
+    published = joblib.load(tmp_path / "model.joblib")
+    labels, proba = CompiledPipeline.from_pipeline(published).predict(X)
+    np.testing.assert_array_equal(labels, published.predict(X))
+    np.testing.assert_allclose(proba, published.predict_proba(X))
+    assert (labels == y).mean() > bootstrap_accuracy
+
+
+def test_api_labels_feed_the_online_learner(tmp_path, valid_penguin_features):
+    """Verified labels posted to the API are learned by the online model."""
+    server = Flask(__name__)
+    register_api(server)
+    client = server.test_client()
+    record = {**valid_penguin_features.iloc[0].to_dict(), "species": "Gentoo"}
+    labels_path = tmp_path / "verified.csv"
+
+    with patch.object(verified_labels_writer, "path", labels_path):
+        missing = client.post("/api/labels", json={**record, "species": None})
+        assert missing.status_code == 400
+        assert not labels_path.exists()
+        response = client.post("/api/labels", json={"records": [record] * 3})
+    assert response.status_code == 200
+    assert response.get_json() == {"recorded": 3}
+
+    learner = OnlineLearner(
+        labels_path=labels_path,
+        state_path=tmp_path / "state.joblib",
+        model_path=tmp_path / "model.joblib",
+    )
+    assert learner.update() == 3
+    # Unless asked to, the learner does not replace the served model
+    default = inspect.signature(OnlineLearner).parameters["model_path"]
+    assert default.default == ONLINE_MODEL_PATH != MODEL_PATH
+
+
+def test_out_of_core_training_splits_by_content(
+    tmp_path, synthetic_training_data
+):
+    """Streamed training holds out the same rows for any chunk size."""
+    X, y = synthetic_training_data
+    rng = np.random.default_rng(1)
+    rows = X.assign(species=y).sample(n=1500, replace=True, random_state=1)
+    rows["bill_length_mm"] += rng.normal(0, 0.5, len(rows))
+    path = tmp_path / "survey.csv"
+    rows.to_csv(path, index=False)
+
+    pipeline, metrics = train_out_of_core(
+        path, chunk_size=200, epochs=3, shard_bytes=20_000
+    )
+    summary = metrics["out_of_core"]
+    assert summary["shards"] > 1
+    assert summary["train_rows"] + summary["test_rows"] == 1500
+
+    # The split depends only on row content, not on how the file is read
+    _, rechunked = train_out_of_core(path, chunk_size=1500, epochs=1)
+    assert rechunked["out_of_core"]["test_rows"] == summary["test_rows"]
+
+    features, labels = split_labeled_rows(pd.read_csv(path))
+    test = is_test_row(row_hashes(features, labels))
+    expected = classification_report(
+        labels[test], pipeline.predict(features[test]), output_dict=True
+    )
+    assert metrics["accuracy"] == pytest.approx(expected["accuracy"])
+    for key in ["Adelie", "Gentoo", "macro avg", "weighted avg"]:
+        assert metrics[key] == pytest.approx(expected[key])
+
+
+def test_row_hashes_do_not_depend_on_chunking(tmp_path):
+    """Rows hash the same whether their chunk has missing values or not."""
+    path = tmp_path / "survey.csv"
+    pd.DataFrame(
+        {
+            "species": ["Adelie", "Gentoo", "Adelie", "Gentoo", "Adelie"],
+            "island": ["Torgersen", "Biscoe", "Dream", "Biscoe", "Dream"],
+            "bill_length_mm": [39, 47, 40, 46, 38],
+            "bill_depth_mm": [18, 15, 19, 14, 17],
+            "flipper_length_mm": [181, 217, 190, 215, 185],
+            "body_mass_g": ["3750", "", "3800", "5200", ""],
+            "sex": ["male", "female", None, "male", None],
+        }
+    ).to_csv(path, index=False)
+
+    def hashes(chunk_size):
+        by_row = {}
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            features, labels = split_labeled_rows(chunk)
+            by_row.update(zip(features.index, row_hashes(features, labels)))
+        return by_row
+
+    whole = hashes(5)
+    assert sorted(whole) == [0, 2, 3]
+    assert hashes(1) == whole
+    assert hashes(2) == whole
+
+
+def test_unchanged_training_run_is_restored_from_run_cache(tmp_path):
+    model_path = tmp_path / "pipeline.joblib"
+    metrics_path = tmp_path / "metrics.json"
+    budget = SearchBudget(max_fits=2)
+
+    with (
+        patch.object(train, "MODEL_PATH", model_path),
+        patch.object(train, "METRICS_PATH", metrics_path),
+        patch.object(train, "run_cache", RunCache(tmp_path / "runs")),
+        patch.object(
+            train,
+            "run_hyperparameter_search",
+            wraps=train.run_hyperparameter_search,
+        ) as search,
+    ):
+        train.train_model(budget=budget)
+        first_metrics = metrics_path.read_text()
+        model_path.unlink()
+
+        train.train_model(budget=budget)
+        assert search.call_count == 1
+        assert metrics_path.read_text() == first_metrics
+
+        train.train_model(budget=SearchBudget(max_fits=3))
+        assert search.call_count == 2
+
+    key = joblib.load(model_path).run_cache_key_
+    assert key != json.loads(first_metrics)["run_cache_key"]
+    assert json.loads(metrics_path.read_text())["run_cache_key"] == key
+
+
+def test_synthetic_data_is_deterministic_and_realistic(tmp_path):
+    """Same seed, same file; species mix and accuracy match the survey."""
+    cache = ColumnarCache(tmp_path / "cache")
+    path = write_synthetic_csv(tmp_path / "a.csv", 25_000, seed=7, cache=cache)
+    again = write_synthetic_csv(tmp_path / "b.csv", 25_000, seed=7)
+    assert path.read_bytes() == again.read_bytes()
+
+    # Streamed into the cache as the exact parse of the written file
+    parsed = pd.read_csv(path)
+    pd.testing.assert_frame_equal(cache.read_csv(path), parsed)
+
+    raw = pd.read_csv(RAW_DATA_PATH)
+    shares = parsed["species"].value_counts(normalize=True)
+    expected = raw["species"].value_counts(normalize=True)
+    assert shares.to_dict() == pytest.approx(expected.to_dict(), abs=0.02)
+
+    cleaned = clean_data(parsed)
+    pipeline = joblib.load(MODEL_PATH)
+    accuracy = (pipeline.predict(cleaned) == cleaned["species"]).mean()
+    assert accuracy > 0.9
+
+
+def test_benchmarks_report_and_flag_regressions(tmp_path):
+    """Every hot path is timed and slowdowns past the threshold flagged."""
+    report = run_benchmarks(sizes=[300], repeat=2, workdir=tmp_path)
+    ids = {result["id"] for result in report["results"]}
+    assert "predict_batch_species[batch=100]" in ids
+    assert "classify_penguin[rows=300,figure=patch]" in ids
+    assert "history_table[rows=300]" in ids
+    assert all(result["min_s"] > 0 for result in report["results"])
+    json.dumps(report)
+
+    # Pretend the scatter plot used to be ten times faster
+    baseline = json.loads(json.dumps(report))
+    for result in baseline["results"]:
+        if result["name"] == "create_scatter_plot":
+            result["min_s"] /= 10
+    regressions = [
+        entry["id"] for entry in compare(report, baseline) if entry["regression"]
+    ]
+    assert regressions == ["create_scatter_plot[rows=300]"]
+
+    baseline["thresholds"] = {"create_scatter_plot": 20.0}
+    assert not any(entry["regression"] for entry in compare(report, baseline))
+
+
+def test_load_generator_replays_dash_callbacks(tmp_path):
+    """Replayed callbacks succeed, are timed per scenario and persist."""
+    from src.penguin_classifier.app import server
+
+    class InProcessClient:
+        def request(self, method, path, body=None):
+            client = server.test_client()
+            response = client.open(path, method=method, json=body)
+            return response.status_code, response.data
+
+    with isolated_dataset(300, tmp_path, fake_trigger=False) as env:
+        generator = LoadGenerator(
+            InProcessClient(), {"classify": 2, "figure": 1, "table": 1}, seed=1
+        )
+        summary = generator.run(concurrency=2, duration=1.5)
+        env.store.writer.flush()
+        history = pd.read_csv(env.store.history_path)
+
+    assert set(summary) == {"classify", "figure", "table", "total"}
+    total = summary["total"]
+    assert total["requests"] > 0
+    assert total["errors"] == {} and total["error_rate"] == 0.0
+    assert total["throughput_rps"] > 0
+    latency = total["latency_ms"]
+    assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"]
+    assert len(history) == summary["classify"]["requests"]
+    assert set(history["species"]) <= {"Adelie", "Chinstrap", "Gentoo"}
+
+
+def test_batch_entry_point_imports_neither_ui_nor_sklearn():
+    """The batch CLI starts without the web stack or scikit-learn."""
+    module = "src.penguin_classifier.modeling.batch"
+    records = measure_imports(module)
+    summary = summarize_imports(module, records)
+
+    assert module in summary["project_modules"]
+    assert summary["total_s"] > 0
+    for package in ("dash", "plotly", "flask", "sklearn", "scipy"):
+        assert package not in summary["imported"]
+    assert "pandas" in summary["imported"]
+
+    violations = check_budget(
+        summary, {"max_import_s": 0.0, "forbidden": ("pandas",)}
+    )
+    assert violations == [
+        f"{module} takes {summary['total_s']:.2f}s to import (budget 0.00s)",
+        f"{module} imports pandas",
+    ]
@@ -1,9 +1,31 @@
 import pytest
 from unittest.mock import patch, MagicMock
+import numpy as np
 import pandas as pd
 from dash import no_update
+from flask import Flask
 
-from src.penguin_classifier.ui.callbacks import classify_penguin
+from src.penguin_classifier.ui.callbacks import (
+    classify_penguin,
+    sync_plot_data,
+)
+from src.penguin_classifier.plots import (
+    FigureCache,
+    create_scatter_plot,
+    downsample_for_plot,
+)
+from src.penguin_classifier.ui.table import query_history_page
+from src.penguin_classifier.monitoring import (
+    INVALID_INPUTS,
+    STAGE_DURATION,
+    STAGE_ERRORS,
+    count_predictions,
+    register_metrics,
+)
+from src.penguin_classifier.profiling import (
+    RequestProfiler,
+    register_profiling,
+)
 
 
 # --- Fixtures ---
@@ -98,4 +120,344 @@ def test_callback_success(
     mock_save.assert_called_once()
 
     assert store_data is not None
-    assert store_data[0]["species"] == "Adelie"
\ No newline at end of file
+    assert store_data[0]["species"] == "Adelie"
+
+
+def test_history_page_is_filtered_sorted_and_bounded():
+    """Only one page of the filtered, sorted history is returned."""
+    history = pd.DataFrame(
+        {
+            "species": ["Adelie", "Gentoo", "Adelie", "Adelie"],
+            "body_mass_g": [3500.0, 5000.0, 4100.0, None],
+        }
+    )
+
+    rows, page_count = query_history_page(
+        data=history,
+        version=4,
+        page_current=0,
+        page_size=2,
+        sort_by=[{"column_id": "body_mass_g", "direction": "desc"}],
+        filter_query="{species} contains adelie",
+    )
+
+    assert page_count == 2
+    assert [row["body_mass_g"] for row in rows] == [4100.0, 3500.0]
+
+
+def test_history_filter_accepts_symbolic_operators():
+    """Queries typed in the filter row use =, >, >=, != and so on."""
+    history = pd.DataFrame(
+        {
+            "species": ["Adelie", "Gentoo", "Adelie", "Gentoo"],
+            "body_mass_g": [3500.0, 5000.0, 4100.0, None],
+            "sex": ["female", "male", "male", "female"],
+        }
+    )
+
+    def masses(filter_query):
+        rows, _ = query_history_page(
+            data=history,
+            version=7,
+            page_current=0,
+            page_size=10,
+            filter_query=filter_query,
+        )
+        return [row["body_mass_g"] for row in rows]
+
+    assert masses("{body_mass_g} = 3500") == [3500.0]
+    assert masses("{body_mass_g} > 4000") == [5000.0, 4100.0]
+    assert masses("{body_mass_g} >= 4100") == [5000.0, 4100.0]
+    assert masses("{body_mass_g} <= 4100") == [3500.0, 4100.0]
+    assert masses("{sex} = female") == [3500.0, None]
+    assert masses("{sex} != female") == [5000.0, 4100.0]
+    assert masses("{species} = Gentoo && {body_mass_g} gt 4000") == [5000.0]
+    assert masses("{species} contains a=b") == []
+
+
+@patch("src.penguin_classifier.ui.callbacks.ctx")
+@patch("src.penguin_classifier.ui.callbacks.predict_single_penguin_proba")
+@patch("src.penguin_classifier.ui.callbacks.save_prediction")
+@patch("src.penguin_classifier.ui.callbacks.load_combined_data")
+@patch("src.penguin_classifier.ui.callbacks.dataset_store")
+def test_callback_patches_figure_for_own_prediction(
+    mock_store, mock_load, mock_save, mock_predict, mock_ctx
+):
+    """Classifying on top of the displayed version sends only a delta."""
+    mock_ctx.triggered_id = "classify_button"
+    mock_predict.return_value = ("Gentoo", 0.9)
+    mock_store.snapshot.return_value.version = 10
+    mock_store.version = 10
+    mock_save.side_effect = lambda _: setattr(mock_store, "version", 11)
+
+    output = classify_penguin(**get_default_args(), figure_version=10)
+    _, _, color, fig, version, _ = output
+
+    assert color == "success"
+    assert version == 11
+    mock_load.assert_not_called()
+    operations = fig.to_plotly_json()["operations"]
+    locations = [op["location"] for op in operations]
+    # Gentoo is the third species trace, the star trace comes after
+    assert ["data", 2, "x"] in locations
+    assert ["data", 2, "marker", "size"] in locations
+    assert ["data", 3, "x"] in locations
+
+    # A stale figure (someone else appended meanwhile) is rebuilt
+    mock_store.version = 10
+    mock_load.return_value = pd.DataFrame(
+        {
+            "species": ["Adelie"],
+            "bill_length_mm": [39.0],
+            "body_mass_g": [3700.0],
+        }
+    )
+    output = classify_penguin(**get_default_args(), figure_version=9)
+    fig = output[3]
+    assert len(fig.data) == 4
+    assert fig.data[2].x == ()
+    assert list(fig.data[3].x) == [40.0]
+
+
+@patch("src.penguin_classifier.ui.callbacks.dataset_store")
+def test_plot_data_is_sent_once_then_patched(mock_store):
+    """The browser gets all plot columns once, later only new rows."""
+    rows = pd.DataFrame(
+        {
+            "species": ["Gentoo", "Adelie", "Adelie"],
+            "island": ["Biscoe", "Dream", "Torgersen"],
+            "bill_length_mm": [47.0, 39.0, 38.0],
+            "bill_depth_mm": [15.0, 18.0, 17.0],
+            "flipper_length_mm": [215.0, 190.0, 185.0],
+            "body_mass_g": [5000.0, 3700.0, None],
+            "sex": ["male", None, "female"],
+        }
+    )
+    mock_store.snapshot.return_value = MagicMock(version=3, data=rows)
+
+    plot_data, plot_version = sync_plot_data(3, None)
+    assert plot_version == 3
+    adelie = plot_data["traces"][0]
+    assert adelie["bill_length_mm"] == [39.0, 38.0]
+    assert adelie["body_mass_g"] == [3700.0, None]
+    assert plot_data["traces"][1]["island"] == []
+
+    assert sync_plot_data(3, 3) == (no_update, no_update)
+
+    # One row (the newest, listed first) was added since version 2
+    patch_data, plot_version = sync_plot_data(3, 2)
+    assert plot_version == 3
+    operations = patch_data.to_plotly_json()["operations"]
+    extends = {
+        tuple(op["location"]): op["params"]["value"]
+        for op in operations
+        if op["operation"] == "Extend"
+    }
+    assert extends[("traces", 2, "bill_length_mm")] == [47.0]
+    assert ("traces", 0, "bill_length_mm") not in extends
+
+
+def test_large_history_is_downsampled_and_drawn_with_webgl():
+    """Big datasets are sampled per species/density and keep the newest."""
+    rng = np.random.default_rng(0)
+    n = 5_000
+    df = pd.DataFrame(
+        {
+            "species": rng.choice(["Adelie", "Gentoo"], n, p=[0.8, 0.2]),
+            "bill_length_mm": rng.normal(45, 5, n),
+            "bill_depth_mm": rng.normal(17, 2, n),
+            "flipper_length_mm": rng.normal(200, 10, n),
+            "body_mass_g": rng.normal(4200, 500, n),
+        }
+    )
+    df.loc[n - 1, "bill_length_mm"] = 200.0  # isolated outlier
+
+    sample = downsample_for_plot(df, max_points=500, keep_newest=50)
+    assert len(sample) <= 500
+    assert list(sample.index[:50]) == list(range(50))
+    assert n - 1 in sample.index
+    share = (sample["species"] == "Gentoo").mean()
+    assert 0.15 < share < 0.3
+    pd.testing.assert_frame_equal(
+        sample, downsample_for_plot(df, max_points=500, keep_newest=50)
+    )
+    assert len(downsample_for_plot(df.head(100), max_points=500)) == 100
+
+    with patch("src.penguin_classifier.plots.PLOT_WEBGL_THRESHOLD", 100):
+        fig = create_scatter_plot(
+            df, size_column="body_mass_g", max_points=1_000
+        )
+    assert fig.data[0].type == "scattergl"
+    assert sum(len(trace.x) for trace in fig.data[:3]) <= 1_000
+    assert "of 5,000 shown" in fig.layout.title.text
+
+
+@patch("src.penguin_classifier.ui.callbacks.ctx")
+@patch("src.penguin_classifier.ui.callbacks.predict_single_penguin_proba")
+@patch("src.penguin_classifier.ui.callbacks.save_prediction")
+def test_callback_stages_are_timed_and_exposed(
+    mock_save, mock_predict, mock_ctx
+):
+    """Every stage of a classification is observed and served on /metrics."""
+    mock_ctx.triggered_id = "classify_button"
+    mock_predict.return_value = ("Adelie", 0.95)
+    server = Flask(__name__)
+    register_metrics(server)
+
+    def counts():
+        return {
+            stage: STAGE_DURATION.count(stage=stage)
+            for stage in ("validation", "predict", "save_prediction")
+        }
+
+    before = counts()
+    predict_errors = STAGE_ERRORS.value(stage="predict")
+    missing_island = INVALID_INPUTS.value(field="island")
+
+    classify_penguin(**get_default_args())
+    assert counts() == {stage: n + 1 for stage, n in before.items()}
+
+    mock_predict.side_effect = RuntimeError("model unavailable")
+    _, _, color, *_ = classify_penguin(**get_default_args())
+    assert color == "danger"
+    assert STAGE_ERRORS.value(stage="predict") == predict_errors + 1
+
+    classify_penguin(**{**get_default_args(), "island": None})
+    assert INVALID_INPUTS.value(field="island") == missing_island + 1
+
+    count_predictions(np.array(["Gentoo", "Gentoo", "Adelie"]))
+    response = server.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    lines = response.get_data(as_text=True).splitlines()
+    assert "# TYPE penguin_stage_duration_seconds histogram" in lines
+    count_line = 'penguin_stage_duration_seconds_count{stage="predict"} '
+    assert count_line + str(before["predict"] + 2) in lines
+    inf_bucket = (
+        'penguin_stage_duration_seconds_bucket{stage="predict",le="+Inf"}'
+    )
+    assert any(line.startswith(inf_bucket) for line in lines)
+    assert any(
+        line.startswith('penguin_predictions_total{species="Gentoo"}')
+        for line in lines
+    )
+    assert any(
+        line.startswith("penguin_figure_cache_hits_total ") for line in lines
+    )
+
+
+def test_flagged_requests_are_profiled_and_summarized(tmp_path):
+    """Only requests with the token are profiled; the summary needs it too."""
+    server = Flask(__name__)
+
+    def slow_sum():
+        return sum(i * i for i in range(20_000))
+
+    server.add_url_rule("/api/work", "work", lambda: str(slow_sum()))
+    server.add_url_rule("/other", "other", lambda: str(slow_sum()))
+    profiler = RequestProfiler(
+        output_dir=tmp_path, sample_rate=0.0, token="secret", max_files=2
+    )
+    register_profiling(server, profiler)
+    client = server.test_client()
+    flag = {profiler.header: "secret"}
+
+    assert "X-Profile-File" not in client.get("/api/work").headers
+    assert "X-Profile-File" not in client.get("/other", headers=flag).headers
+    assert "X-Profile-File" not in client.get(
+        "/api/work", headers={profiler.header: "guess"}
+    ).headers
+    assert list(tmp_path.iterdir()) == []
+
+    names = [
+        client.get("/api/work", headers=flag).headers["X-Profile-File"]
+        for _ in range(3)
+    ]
+    assert all("_api-work_" in name for name in names)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(names[1:])
+
+    assert client.get("/debug/profiles").status_code == 403
+    summary = client.get("/debug/profiles", headers=flag)
+    assert summary.status_code == 200
+    text = summary.get_data(as_text=True)
+    assert text.startswith("2 profile(s)")
+    assert "slow_sum" in text
+    bad_sort = client.get("/debug/profiles?sort=bogus", headers=flag)
+    assert bad_sort.status_code == 400
+
+
+def test_production_server_preloads_warm_state_before_forking():
+    """Workers are forked from a warm master and start with clean state."""
+    import gc
+    import threading
+    from gunicorn.app.base import BaseApplication
+    from src.penguin_classifier import app as app_module
+    from src.penguin_classifier.config import SPECIES
+    from src.penguin_classifier.monitoring import PREDICTIONS
+
+    holder = app_module.model_holder
+    with patch.object(BaseApplication, "run", autospec=True) as run, patch(
+        "src.penguin_classifier.app.available_cpus", return_value=3
+    ), patch.object(holder, "_current", None), patch.object(
+        holder, "check_interval", 0.0
+    ):
+        try:
+            app_module.main(["--production", "--port", "8099"])
+            assert not gc.isenabled()
+        finally:
+            gc.enable()
+
+        gunicorn_app = run.call_args.args[0]
+        cfg = gunicorn_app.cfg
+        assert cfg.preload_app is True
+        assert cfg.workers == 3
+        assert cfg.threads == 4
+        assert cfg.bind == ["0.0.0.0:8099"]
+
+        assert holder.current is None
+        assert gunicorn_app.load() is app_module.server
+        assert holder.current is not None
+        # Loaded synchronously: no reload thread may hold the lock at fork
+        assert not any(
+            t.name == "model-reload" for t in threading.enumerate()
+        )
+        assert not holder._lock.locked()
+        # The warm-up prediction is not counted as traffic
+        assert STAGE_DURATION.count(stage="model_load") == 0
+        assert sum(PREDICTIONS.value(species=s) for s in SPECIES) == 0
+
+        # A worker forked while the lock was held still gets a free one
+        holder._lock.acquire()
+        PREDICTIONS.inc(species="Adelie")
+        gc.disable()
+        cfg.post_fork(None, None)
+        assert gc.isenabled()
+        assert not holder._lock.locked()
+        assert PREDICTIONS.value(species="Adelie") == 0
+
+
+def test_figure_cache_hits_per_version_and_evicts():
+    """Figures are reused per (axes, version) and dropped on new versions."""
+    df = pd.DataFrame(
+        {
+            "species": ["Adelie", "Gentoo"],
+            "bill_length_mm": [39.0, 47.0],
+            "flipper_length_mm": [190.0, 215.0],
+            "body_mass_g": [3700.0, 5000.0],
+        }
+    )
+    build = MagicMock(side_effect=lambda: create_scatter_plot(df))
+    cache = FigureCache(max_size=2)
+
+    first = cache.get_or_create(("a", "b"), 1, build)
+    assert cache.get_or_create(("a", "b"), 1, build) is first
+    assert first["data"][0]["x"] == [190.0]
+    cache.get_or_create(("c", "d"), 1, build)
+    cache.get_or_create(("e", "f"), 1, build)  # evicts ("a", "b")
+    cache.get_or_create(("a", "b"), 1, build)
+    assert cache.stats() == {"hits": 1, "misses": 4, "size": 2, "version": 1}
+
+    # The store advanced: everything cached for version 1 is stale
+    cache.get_or_create(("a", "b"), 2, build)
+    assert cache.stats()["size"] == 1
+    assert build.call_count == 5